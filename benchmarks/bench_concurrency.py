@@ -0,0 +1,65 @@
+"""
+Throughput of authorized transactions from concurrent threads, each with its own session.
+
+Run with `python -m benchmarks.bench_concurrency`.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
+
+from benchmarks.bench_handlers import Base, Item, NoopPostAuthHandler, NoopSyncHandler
+from benchmarks.utils import emit, quiet_logging
+from sqlalchemy_auth_hooks.hooks import SQLAlchemyAuthHooks
+from sqlalchemy_auth_hooks.session import AuthorizedSession
+
+THREAD_COUNTS = (1, 8, 32)
+TRANSACTIONS = 200
+ROWS = 10
+
+
+class ConcurrentSession(AuthorizedSession):
+    pass
+
+
+def work(barrier: Barrier, thread: int) -> None:
+    # A database per thread, so threads only contend in the hooks and not on SQLite locks
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    barrier.wait()
+    for i in range(TRANSACTIONS):
+        with ConcurrentSession(engine, user=object()) as session:
+            session.add_all([Item(name=f"{thread}-{i}-{j}") for j in range(ROWS)])
+            session.commit()
+    engine.dispose()
+
+
+def main() -> None:
+    quiet_logging()
+    hooks = SQLAlchemyAuthHooks(NoopSyncHandler(), NoopPostAuthHandler())
+    for name in ("before_flush", "after_flush", "after_flush_postexec", "after_commit", "after_rollback"):
+        event.listen(ConcurrentSession, name, getattr(hooks, name))
+
+    for threads in THREAD_COUNTS:
+        barrier = Barrier(threads + 1)
+
+        with ThreadPoolExecutor(threads) as executor:
+            futures = [executor.submit(work, barrier, thread) for thread in range(threads)]
+            barrier.wait()
+            start = time.perf_counter()
+            for future in futures:
+                future.result()
+            elapsed = time.perf_counter() - start
+        emit(
+            "concurrency",
+            f"threads_{threads}",
+            threads=threads,
+            transactions_per_second=threads * TRANSACTIONS / elapsed,
+            seconds=elapsed,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Per-SELECT overhead of no-op synchronous and asynchronous handlers.
+
+Run with `python -m benchmarks.bench_handlers`.
+"""
+from typing import Any, AsyncIterator, Iterable
+
+from sqlalchemy import Column, Integer, String, create_engine, event, select, true
+from sqlalchemy.orm import Mapper, declarative_base
+from sqlalchemy.sql.roles import ExpressionElementRole
+
+from benchmarks.utils import emit, measure, quiet_logging
+from sqlalchemy_auth_hooks.auth_handler import AuthHandler, SyncAuthHandler
+from sqlalchemy_auth_hooks.hooks import SQLAlchemyAuthHooks
+from sqlalchemy_auth_hooks.post_auth_handler import PostAuthHandler
+from sqlalchemy_auth_hooks.references import EntityCondition, ReferencedEntity
+from sqlalchemy_auth_hooks.session import AuthorizedSession, UnauthorizedSession
+
+SELECTS = 1_000
+
+Base = declarative_base()
+
+Result = tuple[Mapper[Any], ExpressionElementRole[Any]]
+
+
+class Item(Base):
+    __tablename__ = "items"
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+
+class NoopAsyncHandler(AuthHandler):
+    async def before_select(
+        self, session: AuthorizedSession, referenced_entities: list[ReferencedEntity], condition: EntityCondition | None
+    ) -> AsyncIterator[Result]:
+        for entity in referenced_entities:
+            yield entity.entity, true()
+
+    async def before_insert(self, *_: Any) -> AsyncIterator[Result]:
+        return
+        yield
+
+    async def before_delete(self, *_: Any) -> AsyncIterator[Result]:
+        return
+        yield
+
+    async def before_update(self, *_: Any) -> AsyncIterator[Result]:
+        return
+        yield
+
+
+class NoopSyncHandler(SyncAuthHandler):
+    def before_select(
+        self, session: AuthorizedSession, referenced_entities: list[ReferencedEntity], condition: EntityCondition | None
+    ) -> Iterable[Result]:
+        return [(entity.entity, true()) for entity in referenced_entities]
+
+    def before_insert(self, *_: Any) -> Iterable[Result]:
+        return ()
+
+    def before_delete(self, *_: Any) -> Iterable[Result]:
+        return ()
+
+    def before_update(self, *_: Any) -> Iterable[Result]:
+        return ()
+
+
+class NoopPostAuthHandler(PostAuthHandler):
+    async def after_single_insert(self, *_: Any) -> None:
+        pass
+
+    async def after_single_delete(self, *_: Any) -> None:
+        pass
+
+    async def after_single_update(self, *_: Any) -> None:
+        pass
+
+    async def after_many_insert(self, *_: Any) -> None:
+        pass
+
+    async def after_many_delete(self, *_: Any) -> None:
+        pass
+
+    async def after_many_update(self, *_: Any) -> None:
+        pass
+
+
+class AsyncHandlerSession(AuthorizedSession):
+    pass
+
+
+class SyncHandlerSession(AuthorizedSession):
+    pass
+
+
+def main() -> None:
+    quiet_logging()
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    with UnauthorizedSession(engine) as session:
+        session.add(Item(id=1, name="item"))
+        session.commit()
+
+    # Listen on dedicated session classes only, so the handlers do not run for each other's sessions
+    for session_class, handler in ((AsyncHandlerSession, NoopAsyncHandler()), (SyncHandlerSession, NoopSyncHandler())):
+        event.listen(
+            session_class, "do_orm_execute", SQLAlchemyAuthHooks(handler, NoopPostAuthHandler()).do_orm_execute
+        )
+
+    statement = select(Item).where(Item.id == 1)
+    cases: list[tuple[str, Any]] = [
+        ("unauthorized", UnauthorizedSession(engine)),
+        ("async_handler", AsyncHandlerSession(engine, user=object())),
+        ("sync_handler", SyncHandlerSession(engine, user=object())),
+    ]
+    for case, session in cases:
+        with session:
+            emit("handlers", case, **measure(lambda session=session: session.execute(statement).all(), number=SELECTS))
+
+
+if __name__ == "__main__":
+    main()
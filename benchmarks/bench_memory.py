@@ -0,0 +1,147 @@
+"""
+Memory retained by the hooks over a long-lived session running many transactions.
+
+Cycles of ORM inserts, updates and deletes, rolled back flushes, bulk statements and relationship loads run through one
+session. Memory allocated from the hooks' modules is compared with tracemalloc between the end of the warm-up cycles and
+the end of the run, alongside the size of the hooks' per-session state and caches. Exceeding the bounds fails the run.
+
+Run with `python -m benchmarks.bench_memory`.
+"""
+import gc
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import create_engine, delete, insert, select, update
+from sqlalchemy.orm import InstanceState, Session
+from sqlalchemy.pool import StaticPool
+
+import sqlalchemy_auth_hooks
+from benchmarks.bench_handlers import NoopPostAuthHandler, NoopSyncHandler
+from benchmarks.bench_overhead import BATCH, PRODUCTS, Base, Customer, Product, populate
+from benchmarks.utils import emit, quiet_logging
+from sqlalchemy_auth_hooks.hooks import SQLAlchemyAuthHooks, register_hooks, unregister_hooks
+from sqlalchemy_auth_hooks.normalization import _normalize_cached
+from sqlalchemy_auth_hooks.references import _INTERN_LIMIT, _interned
+from sqlalchemy_auth_hooks.session import AuthorizedSession
+from sqlalchemy_auth_hooks.state import get_session_state
+
+WARMUP_CYCLES = 10
+CYCLES = 100
+# Bounds checked at the end of the run
+MAX_RETAINED_BYTES = 64 * 1024
+MAX_INSTANCE_STATES = 64
+
+PACKAGE_DIRECTORY = str(Path(sqlalchemy_auth_hooks.__file__).parent)
+
+
+def cycle(session: Session, number: int) -> None:
+    ids = range(PRODUCTS + number * BATCH, PRODUCTS + (number + 1) * BATCH)
+
+    # Flush and commit new objects, then update and delete them through the unit of work
+    products = [Product(id=id_, name="new", price=number) for id_ in ids]
+    session.add_all(products)
+    session.commit()
+    for product in products:
+        product.price += 1
+    session.commit()
+    for product in products:
+        session.delete(product)
+    session.commit()
+    del products
+
+    # Flush and roll back
+    session.add_all(Product(id=id_, name="rolled back", price=0) for id_ in ids)
+    session.flush()
+    session.rollback()
+
+    # Bulk statements
+    session.execute(insert(Product), [{"id": id_, "name": "bulk", "price": 0} for id_ in ids])
+    session.execute(update(Product).where(Product.id.in_(ids)).values(price=number))
+    session.execute(delete(Product).where(Product.id.in_(ids)))
+    session.commit()
+
+    # Relationship loads of objects dropped at the end of the cycle
+    for customer in session.scalars(select(Customer).where(Customer.id < 10)):
+        _ = customer.orders
+    session.commit()
+
+
+def hooks_state(session: Session, hooks: SQLAlchemyAuthHooks) -> dict[str, int]:
+    state = get_session_state(session, hooks.authorizer)
+    gc.collect()
+    return {
+        "pending_events": sum(len(events) for events in state.pending_events.values()),
+        "instance_states": sum(1 for obj in gc.get_objects() if isinstance(obj, InstanceState)),
+        "identity_map": len(session.identity_map),
+        "authorized_states": len(state.authorized_states),
+        "select_criteria": sum(len(criteria) for criteria in state.select_criteria.values()),
+        "unrestricted": len(state.unrestricted),
+        "interned_nodes": len(_interned),
+        "normalized_conditions": _normalize_cached.cache_info().currsize,
+    }
+
+
+def clear_bounded_caches() -> None:
+    # Their size is checked against their own limits, clearing them leaves only unbounded growth between snapshots
+    _interned.clear()
+    _normalize_cached.cache_clear()
+
+
+def retained_bytes(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot) -> tuple[int, list[str]]:
+    """
+    Return the growth of memory allocated from the hooks' modules and the lines allocating most of it.
+    """
+    filters = [tracemalloc.Filter(True, f"{PACKAGE_DIRECTORY}/*")]
+    statistics = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+    top = [str(statistic) for statistic in statistics[:5] if statistic.size_diff > 0]
+    return sum(statistic.size_diff for statistic in statistics), top
+
+
+def check(values: dict[str, Any]) -> None:
+    assert values["pending_events"] == 0, "Events left pending after the last commit"
+    assert values["instance_states"] <= MAX_INSTANCE_STATES, "Objects retained after their transaction"
+    assert values["authorized_states"] <= values["identity_map"], "Authorized states retained after their objects"
+    assert values["interned_nodes"] <= _INTERN_LIMIT, "Interned nodes over their limit"
+    assert values["normalized_conditions"] <= (_normalize_cached.cache_info().maxsize or 0), "Unbounded condition cache"
+    assert values["retained_bytes"] <= MAX_RETAINED_BYTES, "Memory retained by the hooks"
+
+
+def main() -> None:
+    quiet_logging()
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        populate(session)
+
+    # Caches of the authorizer are enabled, so their growth is measured too
+    hooks = register_hooks(
+        NoopSyncHandler(),
+        NoopPostAuthHandler(),
+        reuse_relationship_criteria=True,
+        trust_identity_map=True,
+    )
+    tracemalloc.start()
+    try:
+        with AuthorizedSession(engine, user=object()) as session:
+            for number in range(WARMUP_CYCLES):
+                cycle(session, number)
+            clear_bounded_caches()
+            gc.collect()
+            before = tracemalloc.take_snapshot()
+            for number in range(WARMUP_CYCLES, CYCLES):
+                cycle(session, number)
+            values: dict[str, Any] = {**hooks_state(session, hooks), "cycles": CYCLES}
+            clear_bounded_caches()
+            gc.collect()
+            after = tracemalloc.take_snapshot()
+            values["retained_bytes"], top = retained_bytes(before, after)
+    finally:
+        tracemalloc.stop()
+        unregister_hooks(hooks)
+    emit("memory", "long_lived_session", **values, top_allocations=top)
+    check(values)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+Per-operation overhead of `register_hooks` compared to plain SQLAlchemy sessions.
+
+Every case runs on in-memory and file-backed SQLite, through synchronous and asynchronous sessions, without hooks and
+then with hooks around a no-op handler and around `OsoAuthHandler` (skipped when `oso` is not installed).
+
+Run with `python -m benchmarks.bench_overhead`. Each line of output is a JSON object, `overhead` is the difference of
+the median per-operation time with the median of the plain session.
+"""
+import asyncio
+import sys
+import tempfile
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from sqlalchemy import Engine, ForeignKey, create_engine, delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import Mapped, Session, declarative_base, mapped_column, relationship
+from sqlalchemy.pool import NullPool, StaticPool
+
+from benchmarks.bench_handlers import NoopAsyncHandler, NoopPostAuthHandler
+from benchmarks.utils import emit, measure, quiet_logging
+from sqlalchemy_auth_hooks.auth_handler import AuthHandler
+from sqlalchemy_auth_hooks.hooks import register_hooks, unregister_hooks
+from sqlalchemy_auth_hooks.post_auth_handler import PostAuthHandler
+from sqlalchemy_auth_hooks.session import AuthorizedAsyncSession, AuthorizedSession
+
+CUSTOMERS = 50
+ORDERS_PER_CUSTOMER = 4
+PRODUCTS = 20
+# Rows written by the bulk and flush cases
+BATCH = 100
+NUMBER = 5
+REPEAT = 5
+
+Base = declarative_base()
+
+
+class Customer(Base):
+    __tablename__ = "customers"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str]
+    active: Mapped[bool]
+    orders: Mapped[list["Order"]] = relationship(back_populates="customer")
+
+
+class Order(Base):
+    __tablename__ = "orders"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    customer_id: Mapped[int] = mapped_column(ForeignKey("customers.id"))
+    customer: Mapped[Customer] = relationship(back_populates="orders")
+    lines: Mapped[list["OrderLine"]] = relationship(back_populates="order")
+
+
+class Product(Base):
+    __tablename__ = "products"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str]
+    price: Mapped[int]
+
+
+class OrderLine(Base):
+    __tablename__ = "order_lines"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id"))
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id"))
+    quantity: Mapped[int]
+    order: Mapped[Order] = relationship(back_populates="lines")
+    product: Mapped[Product] = relationship()
+
+
+class BenchUser:
+    pass
+
+
+POLICY = """
+allow(_: BenchUser, "query", customer: Customer) if customer.active = true;
+allow(_: BenchUser, "query", _: Order);
+allow(_: BenchUser, "query", _: Product);
+allow(_: BenchUser, "query", _: OrderLine);
+"""
+
+
+def populate(session: Session) -> None:
+    session.add_all(Product(id=id_, name=f"product {id_}", price=id_) for id_ in range(PRODUCTS))
+    for id_ in range(CUSTOMERS):
+        session.add(Customer(id=id_, name=f"customer {id_}", active=id_ % 2 == 0))
+        for order in range(ORDERS_PER_CUSTOMER):
+            order_id = id_ * ORDERS_PER_CUSTOMER + order
+            session.add(Order(id=order_id, customer_id=id_))
+            session.add(OrderLine(id=order_id, order_id=order_id, product_id=order_id % PRODUCTS, quantity=1))
+    session.commit()
+
+
+# Cases, each is one operation on a synchronous session and leaves the database unchanged
+
+
+def point_select(session: Session) -> None:
+    session.execute(select(Customer).where(Customer.id == 2)).all()
+    session.rollback()
+
+
+def wide_join(session: Session) -> None:
+    statement = (
+        select(OrderLine, Order, Customer, Product)
+        .join(OrderLine.order)
+        .join(Order.customer)
+        .join(OrderLine.product)
+        .where(Product.price < PRODUCTS // 2)
+    )
+    session.execute(statement).all()
+    session.rollback()
+
+
+def lazy_loads(session: Session) -> None:
+    for customer in session.scalars(select(Customer).limit(10)):
+        for order in customer.orders:
+            # Accessing the relationship triggers its lazy load
+            _ = order.lines
+    session.rollback()
+
+
+def bulk_insert(session: Session) -> None:
+    rows = [{"id": PRODUCTS + id_, "name": "new", "price": 0} for id_ in range(BATCH)]
+    session.execute(insert(Product), rows)
+    session.rollback()
+
+
+def bulk_update_delete(session: Session) -> None:
+    session.execute(update(OrderLine).where(OrderLine.quantity == 1).values(quantity=2))
+    session.execute(delete(OrderLine).where(OrderLine.product_id == 0))
+    session.rollback()
+
+
+def orm_flush(session: Session) -> None:
+    products = [Product(id=PRODUCTS + id_, name="new", price=0) for id_ in range(BATCH)]
+    session.add_all(products)
+    session.flush()
+    session.rollback()
+
+
+CASES: list[Callable[[Session], None]] = [
+    point_select,
+    wide_join,
+    lazy_loads,
+    bulk_insert,
+    bulk_update_delete,
+    orm_flush,
+]
+
+
+def noop_handlers() -> tuple[AuthHandler, PostAuthHandler]:
+    return NoopAsyncHandler(), NoopPostAuthHandler()
+
+
+def oso_handlers() -> tuple[AuthHandler, PostAuthHandler]:
+    from oso import Oso
+
+    from sqlalchemy_auth_hooks.oso.oso_handler import OsoAuthHandler, OsoPostAuthHandler
+    from sqlalchemy_auth_hooks.oso.sqlalchemy_oso.auth import register_models
+
+    oso = Oso()
+    register_models(oso, Base)
+    oso.register_class(BenchUser)
+    oso.load_str(POLICY)
+    permissions: Any = {"select": "query", "insert": "query", "update": "query", "delete": "query"}
+    handler = OsoAuthHandler(oso, {model: permissions for model in (Customer, Order, Product, OrderLine)})
+    return handler, OsoPostAuthHandler()
+
+
+# Both handlers are asynchronous, so their overhead includes the same dispatch to the hooks' loop thread
+HANDLERS: list[tuple[str, Callable[[], tuple[AuthHandler, PostAuthHandler]]]] = [
+    ("noop", noop_handlers),
+    ("oso", oso_handlers),
+]
+
+
+def sync_engines(directory: Path) -> Iterator[tuple[str, Engine]]:
+    yield "memory", create_engine("sqlite://", poolclass=StaticPool)
+    yield "file", create_engine(f"sqlite:///{directory / 'sync.db'}", poolclass=NullPool)
+
+
+def async_engines(directory: Path) -> Iterator[tuple[str, AsyncEngine]]:
+    yield "memory", create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    yield "file", create_async_engine(f"sqlite+aiosqlite:///{directory / 'async.db'}", poolclass=NullPool)
+
+
+def measure_sync(case: Callable[[Session], None], session_factory: Callable[[], Session]) -> Any:
+    with session_factory() as session:
+        return measure(lambda: case(session), number=NUMBER, repeat=REPEAT)
+
+
+def measure_async(
+    loop: asyncio.AbstractEventLoop, case: Callable[[Session], None], session_factory: Callable[[], AsyncSession]
+) -> Any:
+    session = session_factory()
+    try:
+        # The case runs in the greenlet of the asynchronous session, as awaited statements would
+        return measure(lambda: loop.run_until_complete(session.run_sync(case)), number=NUMBER, repeat=REPEAT)
+    finally:
+        loop.run_until_complete(session.close())
+
+
+def run(
+    backend: str,
+    api: str,
+    plain: Callable[[Callable[[Session], None]], Any],
+    authorized: Callable[[Callable[[Session], None]], Any],
+) -> None:
+    baselines = {}
+    for case in CASES:
+        baselines[case] = timings = plain(case)
+        emit("overhead", case.__name__, backend=backend, api=api, handler="none", overhead=0.0, **timings)
+    for name, make_handlers in HANDLERS:
+        try:
+            handlers = make_handlers()
+        except ImportError as e:
+            print(f"Skipping {name} handler: {e}", file=sys.stderr)
+            continue
+        hooks = register_hooks(*handlers)
+        try:
+            for case in CASES:
+                timings = authorized(case)
+                emit(
+                    "overhead",
+                    case.__name__,
+                    backend=backend,
+                    api=api,
+                    handler=name,
+                    overhead=timings["median"] - baselines[case]["median"],
+                    **timings,
+                )
+        finally:
+            unregister_hooks(hooks)
+
+
+def main() -> None:
+    quiet_logging()
+    user = BenchUser()
+    with tempfile.TemporaryDirectory() as directory:
+        for backend, engine in sync_engines(Path(directory)):
+            Base.metadata.create_all(engine)
+            with Session(engine) as session:
+                populate(session)
+            run(
+                backend,
+                "sync",
+                lambda case, engine=engine: measure_sync(case, partial(Session, engine)),
+                lambda case, engine=engine: measure_sync(case, partial(AuthorizedSession, engine, user=user)),
+            )
+            engine.dispose()
+
+        loop = asyncio.new_event_loop()
+        for backend, async_engine in async_engines(Path(directory)):
+
+            async def setup(async_engine: AsyncEngine = async_engine) -> None:
+                async with async_engine.begin() as connection:
+                    await connection.run_sync(Base.metadata.create_all)
+                async with AsyncSession(async_engine) as session:
+                    await session.run_sync(populate)
+
+            loop.run_until_complete(setup())
+            run(
+                backend,
+                "async",
+                lambda case, engine=async_engine: measure_async(loop, case, lambda: AsyncSession(engine)),
+                lambda case, engine=async_engine: measure_async(
+                    loop, case, lambda: AuthorizedAsyncSession(engine, user=user)
+                ),
+            )
+            loop.run_until_complete(async_engine.dispose())
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Authorized SELECT throughput from concurrent threads, on GIL and free-threaded builds alike.
+
+Run with `python -m benchmarks.bench_scaling`, and again with a free-threaded interpreter (i.e. `python3.13t`) to
+compare. Synchronous handlers authorize on the calling threads, asynchronous ones share the hooks' loop thread.
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+from typing import Any
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.pool import StaticPool
+
+from benchmarks.bench_handlers import Base, Item, NoopAsyncHandler, NoopPostAuthHandler, NoopSyncHandler
+from benchmarks.utils import emit, quiet_logging
+from sqlalchemy_auth_hooks.hooks import SQLAlchemyAuthHooks
+from sqlalchemy_auth_hooks.session import AuthorizedSession
+
+THREAD_COUNTS = (1, 4, 16)
+SELECTS = 500
+
+
+class AsyncScalingSession(AuthorizedSession):
+    pass
+
+
+class SyncScalingSession(AuthorizedSession):
+    pass
+
+
+def work(barrier: Barrier, session_class: type[AuthorizedSession]) -> None:
+    # A database per thread, so threads only contend in the hooks and not on SQLite locks
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    statement = select(Item).where(Item.id == 1)
+    with session_class(engine, user=object()) as session:
+        session.add(Item(id=1, name="item"))
+        session.commit()
+        barrier.wait()
+        for _ in range(SELECTS):
+            session.execute(statement).all()
+    engine.dispose()
+
+
+def main() -> None:
+    quiet_logging()
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    cases: list[tuple[str, type[AuthorizedSession], Any]] = [
+        ("async_handler", AsyncScalingSession, NoopAsyncHandler()),
+        ("sync_handler", SyncScalingSession, NoopSyncHandler()),
+    ]
+    for case, session_class, handler in cases:
+        hooks = SQLAlchemyAuthHooks(handler, NoopPostAuthHandler())
+        event.listen(session_class, "do_orm_execute", hooks.do_orm_execute)
+        for threads in THREAD_COUNTS:
+            barrier = Barrier(threads + 1)
+            with ThreadPoolExecutor(threads) as executor:
+                futures = [executor.submit(work, barrier, session_class) for _ in range(threads)]
+                barrier.wait()
+                start = time.perf_counter()
+                for future in futures:
+                    future.result()
+                elapsed = time.perf_counter() - start
+            emit(
+                "scaling",
+                f"{case}_threads_{threads}",
+                threads=threads,
+                gil=is_gil_enabled,
+                selects_per_second=threads * SELECTS / elapsed,
+                seconds=elapsed,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Condition and mapper extraction over very large statements.
+
+Run with `python -m benchmarks.bench_traversal`.
+"""
+from collections import defaultdict
+from itertools import pairwise
+from typing import Any, Callable
+
+from sqlalchemy import Column, ForeignKey, Integer, Select, String, or_, select
+from sqlalchemy.orm import Mapper, declarative_base
+
+from benchmarks.utils import emit, measure
+from sqlalchemy_auth_hooks.clauses import process_clauses
+from sqlalchemy_auth_hooks.conditions import traverse_conditions
+
+OR_TERMS = 10_000
+JOINED_TABLES = 30
+
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = "items"
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+
+def _chain_models(count: int) -> list[Any]:
+    models: list[Any] = []
+    for index in range(count):
+        attributes: dict[str, Any] = {"__tablename__": f"chain_{index}", "id": Column(Integer, primary_key=True)}
+        if index:
+            attributes["parent_id"] = Column(ForeignKey(f"chain_{index - 1}.id"))
+        models.append(type(f"Chain{index}", (Base,), attributes))
+    return models
+
+
+def _table_mappers() -> dict[Any, Mapper[Any]]:
+    return {mapper.local_table: mapper for mapper in Base.registry.mappers}
+
+
+def _extractor(statement: Select[Any]) -> Callable[[], Any]:
+    # get_final_froms compiles the statement inside SQLAlchemy, keep it out of the measured walk
+    froms = statement.get_final_froms()
+    table_mappers = _table_mappers()
+    return lambda: process_clauses(froms, defaultdict(dict), statement.whereclause, {}, table_mappers)
+
+
+def main() -> None:
+    wide_or = select(Item).where(or_(*[Item.id == i for i in range(OR_TERMS)]))
+    emit(
+        "traversal",
+        f"traverse_conditions_or_{OR_TERMS}",
+        **measure(lambda: traverse_conditions(wide_or.whereclause, {})),
+    )
+    emit("traversal", f"process_clauses_or_{OR_TERMS}", **measure(_extractor(wide_or)))
+
+    models = _chain_models(JOINED_TABLES)
+    join_chain: Select[Any] = select(models[0])
+    for parent, child in pairwise(models):
+        join_chain = join_chain.join(child, child.parent_id == parent.id)
+    emit("traversal", f"process_clauses_join_{JOINED_TABLES}", **measure(_extractor(join_chain), number=100))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Every benchmark prints one JSON object per measured case, so results can be collected and compared over time.
+"""
+import json
+import logging
+import statistics
+import sys
+import time
+from typing import Any, Callable
+
+import structlog
+
+
+def measure(func: Callable[[], Any], *, number: int = 1, repeat: int = 5) -> dict[str, float]:
+    """
+    Run `func` `number` times per round for `repeat` rounds and return per-call timings in seconds.
+    """
+    func()  # warm up caches
+    rounds: list[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        rounds.append((time.perf_counter() - start) / number)
+    return {
+        "min": min(rounds),
+        "median": statistics.median(rounds),
+        "mean": statistics.fmean(rounds),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def emit(benchmark: str, case: str, **values: Any) -> None:
+    json.dump({"benchmark": benchmark, "case": case, **values}, sys.stdout)
+    sys.stdout.write("\n")
+    sys.stdout.flush()
+
+
+def quiet_logging() -> None:
+    """
+    Drop the hooks' debug logging, which would otherwise dominate the measured time.
+    """
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
@@ -1,5 +1,5 @@
 import abc
-from typing import Any, AsyncIterator
+from typing import Any, AsyncIterator, Iterable, Literal
 
 from sqlalchemy.orm import Mapper
 from sqlalchemy.sql.roles import ExpressionElementRole
@@ -7,12 +7,31 @@ from sqlalchemy.sql.roles import ExpressionElementRole
 from sqlalchemy_auth_hooks.references import EntityCondition, ReferencedEntity
 from sqlalchemy_auth_hooks.session import AuthorizedSession
 
+Action = Literal["select", "insert", "update", "delete"]
+
 
 class AuthHandler(abc.ABC):
     """
     Abstract class for handling authorization of database calls.
     """
 
+    async def is_unrestricted(self, session: AuthorizedSession, mapper: Mapper[Any], action: Action) -> bool:
+        """
+        Declare `action` on `mapper` unrestricted for the user of `session`.
+
+        The answer is cached for the lifetime of the session, unrestricted entities are not passed to the handler
+        again. Nothing is unrestricted by default.
+        """
+        return False
+
+    async def check_objects(self, session: AuthorizedSession, action: Action, instances: list[Any]) -> list[bool]:
+        """
+        Check `action` on each of `instances`, returning whether it is allowed in the same order.
+
+        Used by the `"check"` select strategy, for backends that answer per object instead of producing SQL filters.
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def before_select(
         self,
@@ -61,3 +80,73 @@ class AuthHandler(abc.ABC):
         Handle any select operations.
         """
         raise NotImplementedError
+
+
+class SyncAuthHandler(abc.ABC):
+    """
+    Abstract class for handling authorization of database calls synchronously.
+
+    Meant for CPU-bound handlers such as local policy evaluation. They are called directly on the thread executing the
+    statement, without async iteration and the hop to the hooks' event loop thread.
+    """
+
+    def is_unrestricted(self, session: AuthorizedSession, mapper: Mapper[Any], action: Action) -> bool:
+        """
+        Declare `action` on `mapper` unrestricted for the user of `session`, see `AuthHandler.is_unrestricted`.
+        """
+        return False
+
+    def check_objects(self, session: AuthorizedSession, action: Action, instances: list[Any]) -> list[bool]:
+        """
+        Check `action` on each of `instances`, see `AuthHandler.check_objects`.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def before_select(
+        self,
+        session: AuthorizedSession,
+        referenced_entities: list[ReferencedEntity],
+        condition: EntityCondition | None,
+    ) -> Iterable[tuple[Mapper[Any], ExpressionElementRole[Any]]]:
+        """
+        Handle any select operations.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def before_insert(
+        self,
+        session: AuthorizedSession,
+        entity: ReferencedEntity,
+        values: list[dict[str, Any]],
+    ) -> Iterable[tuple[Mapper[Any], ExpressionElementRole[Any]]]:
+        """
+        Handle any insert operations.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def before_delete(
+        self,
+        session: AuthorizedSession,
+        referenced_entities: list[ReferencedEntity],
+        condition: EntityCondition | None,
+    ) -> Iterable[tuple[Mapper[Any], ExpressionElementRole[Any]]]:
+        """
+        Handle any delete operations.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def before_update(
+        self,
+        session: AuthorizedSession,
+        referenced_entities: list[ReferencedEntity],
+        condition: EntityCondition | None,
+        changes: dict[str, Any],
+    ) -> Iterable[tuple[Mapper[Any], ExpressionElementRole[Any]]]:
+        """
+        Handle any update operations.
+        """
+        raise NotImplementedError
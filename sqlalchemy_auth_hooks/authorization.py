@@ -1,156 +1,624 @@
+import asyncio
 import copy
-from typing import Any, Iterable, cast
+from contextlib import contextmanager
+from inspect import isawaitable
+from threading import Lock
+from time import perf_counter
+from typing import (
+    Any,
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    ContextManager,
+    Generator,
+    Iterable,
+    Literal,
+    Sequence,
+    TypeVar,
+    cast,
+)
 
 from sqlalchemy import (
     BindParameter,
     Column,
     Delete,
     Insert,
+    Result,
+    Row,
+    Select,
+    Table,
     Update,
+    inspect,
     true,
 )
+from sqlalchemy.engine import IteratorResult
+from sqlalchemy.engine.result import SimpleResultMetaData
 from sqlalchemy.orm import (
     InstanceState,
     Mapper,
     ORMExecuteState,
-    with_loader_criteria,
 )
+from sqlalchemy.orm.util import LoaderCriteriaOption
+from sqlalchemy.sql.elements import False_, True_
+from sqlalchemy.sql.functions import FunctionElement
 from sqlalchemy.sql.operators import and_, eq
+from sqlalchemy.sql.visitors import iterate
 
-from sqlalchemy_auth_hooks.auth_handler import AuthHandler
-from sqlalchemy_auth_hooks.clauses import collect_entities, extract_references
+from sqlalchemy_auth_hooks.auth_handler import Action, AuthHandler, SyncAuthHandler
+from sqlalchemy_auth_hooks.clauses import collect_entities, extract_references, required_mappers, select_mappers
+from sqlalchemy_auth_hooks.metrics import MetricsRecorder, NullRecorder
+from sqlalchemy_auth_hooks.policies import AccessPolicy
 from sqlalchemy_auth_hooks.references import (
     CompositeCondition,
-    LiteralExpression,
+    EntityCondition,
     ReferenceCondition,
     ReferencedEntity,
+    literal,
 )
 from sqlalchemy_auth_hooks.session import AuthorizedSession
-from sqlalchemy_auth_hooks.utils import get_insert_columns, get_table_mapper
+from sqlalchemy_auth_hooks.slow_log import mapper_names
+from sqlalchemy_auth_hooks.state import SessionAuthState, get_session_state
+from sqlalchemy_auth_hooks.tracing import Tracer, start_span
+from sqlalchemy_auth_hooks.utils import at_fork_in_child, get_insert_columns, get_table_mapper, get_table_mappers
+
+
+def _always_empty(orm_execute_state: ORMExecuteState, denied: list[Mapper[Any]]) -> bool:
+    """
+    Check whether a SELECT can not return any rows, either by its own WHERE clause or because a required entity was
+    denied entirely.
+    """
+    statement = orm_execute_state.statement
+    if not isinstance(statement, Select) or orm_execute_state.bind_mapper is None:
+        return False
+    if not denied and not isinstance(statement.whereclause, False_):
+        return False
+    if not statement._group_by_clauses and any(  # type: ignore
+        isinstance(element, FunctionElement) for column in statement.selected_columns for element in iterate(column)
+    ):
+        # Aggregates without GROUP BY return a row even when nothing matches
+        return False
+    if isinstance(statement.whereclause, False_):
+        return True
+    table_mappers = get_table_mappers(orm_execute_state.bind_mapper.registry)
+    required = required_mappers(statement.get_final_froms(), table_mappers)
+    return any(mapper in required for mapper in denied)
+
+
+def _empty_result(statement: Select[Any]) -> Result[Any]:
+    keys = [description["name"] for description in statement.column_descriptions]
+    return IteratorResult(SimpleResultMetaData(keys), iter(()))
+
+
+SelectStrategy = Literal["criteria", "check"]
+
+_EAGER_LOADS = frozenset({"joined", "selectin", "subquery", "immediate"})
+
+
+def _eager_loads(statement: Select[Any], mappers: Iterable[Mapper[Any]]) -> bool:
+    """
+    Check whether a SELECT loads related objects eagerly, by its loader options or by the mappers' defaults.
+    """
+    for option in statement._with_options:  # type: ignore
+        # Wildcard options carry their strategy themselves
+        for load in getattr(option, "context", None) or (option,):
+            strategy: dict[str, Any] = dict(getattr(load, "strategy", None) or ())
+            if strategy.get("lazy") in _EAGER_LOADS:
+                return True
+    return any(relationship.lazy in _EAGER_LOADS for mapper in mappers for relationship in mapper.relationships)
+
+
+class AuthorizationCriteria(LoaderCriteriaOption):
+    """
+    Loader criteria added by the authorizer, told apart from application criteria once propagated to relationship
+    loads.
+    """
+
+    __slots__ = ()
+    _traverse_internals = LoaderCriteriaOption._traverse_internals
+
+
+class _HandlerTimer:
+    __slots__ = ("timer", "state", "start")
+
+    def __init__(self, timer: ContextManager[None], state: SessionAuthState) -> None:
+        self.timer = timer
+        self.state = state
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.timer.__enter__()
+        self.start = perf_counter()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.state.handler_seconds += perf_counter() - self.start
+        self.timer.__exit__(*exc_info)
+
+
+class _Request:
+    """
+    Handler work yielded by the authorization steps, done on the calling thread for synchronous handlers and awaited
+    on the hooks' loop for asynchronous ones.
+    """
+
+    __slots__ = ()
+
+    def run_sync(self) -> Any:
+        raise NotImplementedError
+
+    async def run(self) -> Any:
+        raise NotImplementedError
+
+
+class _Collect(_Request):
+    """
+    Collect the filters returned by a `before_*` handler method.
+    """
+
+    __slots__ = ("results",)
+
+    def __init__(self, results: AsyncIterable[tuple[Any, Any]] | Iterable[tuple[Any, Any]]) -> None:
+        self.results = results
+
+    def run_sync(self) -> list[tuple[Any, Any]]:
+        return list(cast(Iterable[tuple[Any, Any]], self.results))
+
+    async def run(self) -> list[tuple[Any, Any]]:
+        return [item async for item in cast(AsyncIterable[tuple[Any, Any]], self.results)]
+
+
+class _Await(_Request):
+    __slots__ = ("awaitable",)
+
+    def __init__(self, awaitable: Awaitable[Any]) -> None:
+        self.awaitable = awaitable
+
+    async def run(self) -> Any:
+        return await self.awaitable
+
+
+class _CheckObjects(_Request):
+    """
+    Check batches of objects, concurrently for asynchronous handlers.
+    """
+
+    __slots__ = ("handler", "session", "batches", "concurrency")
+
+    def __init__(
+        self,
+        handler: AuthHandler | SyncAuthHandler,
+        session: AuthorizedSession,
+        batches: list[list[Any]],
+        concurrency: int,
+    ) -> None:
+        self.handler = handler
+        self.session = session
+        self.batches = batches
+        self.concurrency = concurrency
+
+    def run_sync(self) -> list[list[bool]]:
+        handler = cast(SyncAuthHandler, self.handler)
+        return [handler.check_objects(self.session, "select", batch) for batch in self.batches]
+
+    async def run(self) -> list[list[bool]]:
+        handler = cast(AuthHandler, self.handler)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def check(batch: list[Any]) -> list[bool]:
+            async with semaphore:
+                return await handler.check_objects(self.session, "select", batch)
+
+        return list(await asyncio.gather(*(check(batch) for batch in self.batches)))
+
+
+_T = TypeVar("_T")
+
+Steps = Generator[_Request, Any, _T]
+
+
+def run_sync(steps: Steps[_T]) -> _T:
+    """
+    Run authorization steps, calling a synchronous handler directly.
+    """
+    advance: Callable[[Any], _Request] = steps.send
+    value: Any = None
+    while True:
+        try:
+            request = advance(value)
+        except StopIteration as e:
+            return cast(_T, e.value)
+        try:
+            value, advance = request.run_sync(), steps.send
+        except Exception as e:
+            # Raised where the handler was called, so timers and spans around it see the error
+            value, advance = e, steps.throw
+
+
+async def run_async(steps: Steps[_T]) -> _T:
+    """
+    Run authorization steps, awaiting an asynchronous handler.
+    """
+    advance: Callable[[Any], _Request] = steps.send
+    value: Any = None
+    while True:
+        try:
+            request = advance(value)
+        except StopIteration as e:
+            return cast(_T, e.value)
+        try:
+            value, advance = await request.run(), steps.send
+        except Exception as e:
+            value, advance = e, steps.throw
 
 
 class StatementAuthorizer:
-    def __init__(self, auth_handler: AuthHandler) -> None:
+    def __init__(
+        self,
+        auth_handler: AuthHandler | SyncAuthHandler,
+        policy: AccessPolicy | None = None,
+        *,
+        reuse_relationship_criteria: bool = False,
+        trust_propagated_criteria: bool = False,
+        trust_identity_map: bool = False,
+        select_strategy: SelectStrategy = "criteria",
+        check_chunk_size: int = 500,
+        check_batch_size: int = 100,
+        check_concurrency: int = 4,
+        metrics: MetricsRecorder | None = None,
+        tracer: Tracer | None = None,
+    ) -> None:
+        """
+        :param reuse_relationship_criteria: Apply filters the handler already returned for a mapper in the session to
+            relationship loads of it, instead of invoking the handler for every load.
+        :param trust_propagated_criteria: Do not invoke the handler for relationship loads of mappers the parent query
+            was already authorized for, relying on the criteria propagated to the load.
+        :param trust_identity_map: Do not invoke the handler for column loads (refreshes, expired and deferred
+            attributes) of objects loaded or persisted under authorization in the same session.
+        :param select_strategy: `"criteria"` adds the handler's filters to SELECT statements. `"check"` leaves
+            statements loading whole entities unfiltered and drops result rows denied by `AuthHandler.check_objects`.
+        :param check_chunk_size: Rows fetched from a result before checking them, unless `yield_per` is set.
+        :param check_batch_size: Objects per `AuthHandler.check_objects` call.
+        :param check_concurrency: Concurrent `AuthHandler.check_objects` calls per chunk of rows.
+        :param metrics: Recorder of phase durations, i.e. a `HistogramRecorder`. Nothing is recorded by default.
+        :param tracer: Tracer for spans around authorization and handler calls, i.e. an OpenTelemetry tracer.
+        """
         self.auth_handler = auth_handler
+        # Synchronous handlers are run on the calling thread
+        self.is_sync = isinstance(auth_handler, SyncAuthHandler)
+        self.policy = policy if policy is not None else AccessPolicy()
+        self.reuse_relationship_criteria = reuse_relationship_criteria
+        self.trust_propagated_criteria = trust_propagated_criteria
+        self.trust_identity_map = trust_identity_map
+        self.select_strategy = select_strategy
+        self.check_chunk_size = check_chunk_size
+        self.check_batch_size = check_batch_size
+        self.check_concurrency = check_concurrency
+        self.metrics = metrics if metrics is not None else NullRecorder()
+        self.tracer = tracer
+        # Sum up handler time per session, read by the hooks' slow authorization log
+        self.tracks_handler_time = False
+        # Handler invocations avoided for relationship and column loads
+        self.saved_handler_calls = 0
+        self._counter_lock = Lock()
+        at_fork_in_child(self._after_fork)
+
+    def _after_fork(self) -> None:
+        self._counter_lock = Lock()
 
-    async def authorize_update(self, orm_execute_state: ORMExecuteState) -> None:
-        statement = cast(Update, orm_execute_state.statement)
-        conditions, references = extract_references(statement)
+    def _count_saved_call(self) -> None:
+        # Authorizations run concurrently from every session's thread
+        with self._counter_lock:
+            self.saved_handler_calls += 1
 
+    def _unrestricted(self, session: AuthorizedSession, mapper: Mapper[Any], action: Action) -> Steps[bool]:
+        if self.policy.is_public(mapper, action):
+            return True
+        cache = get_session_state(session, self).scope_to(session.user).unrestricted
+        unrestricted = cache.get((mapper, action))
+        if unrestricted is None:
+            answer = self.auth_handler.is_unrestricted(session, mapper, action)
+            if isawaitable(answer):
+                answer = yield _Await(answer)
+            unrestricted = cache[mapper, action] = cast(bool, answer)
+        return unrestricted
+
+    def _restricted(
+        self, session: AuthorizedSession, entities: list[ReferencedEntity], action: Action
+    ) -> Steps[list[ReferencedEntity] | None]:
+        """
+        Drop unrestricted entities, returns `None` if the handler does not need to be called at all.
+        """
+        restricted: list[ReferencedEntity] = []
+        for entity in entities:
+            if not (yield from self._unrestricted(session, entity.entity, action)):
+                restricted.append(entity)
+        return None if entities and not restricted else restricted
+
+    def _handler_call(
+        self, session: AuthorizedSession, action: Action, mappers: Sequence[Mapper[Any]]
+    ) -> ContextManager[None]:
+        """
+        Return a context manager around a handler call, measuring and tracing it as configured.
+        """
+        timer = self.metrics.time("handler", action, mappers)
+        if self.tracks_handler_time:
+            timer = _HandlerTimer(timer, get_session_state(session, self))
+        if self.tracer is None:
+            return timer
+        return self._traced_handler_call(timer, action, mappers)
+
+    @contextmanager
+    def _traced_handler_call(
+        self, timer: ContextManager[None], action: Action, mappers: Sequence[Mapper[Any]]
+    ) -> Generator[None, None, None]:
+        with start_span(self.tracer, "handler", {"action": action, "mappers": mapper_names(mappers)}), timer:
+            yield
+
+    def _apply_filters(
+        self,
+        orm_execute_state: ORMExecuteState,
+        filters: list[tuple[Any, Any]],
+        action: Action,
+        mappers: Iterable[Mapper[Any]],
+    ) -> None:
+        with self.metrics.time("criteria", action, mappers):
+            for selectable, filter_exp in filters:
+                self._add_criteria(orm_execute_state, selectable, filter_exp)
+
+    @staticmethod
+    def _add_criteria(orm_execute_state: ORMExecuteState, selectable: Any, filter_exp: Any) -> None:
+        if isinstance(filter_exp, True_):
+            # Nothing to restrict, keep the statement and its cache key as they are
+            return
+        where_clause = AuthorizationCriteria(selectable, filter_exp, include_aliases=True)
+        orm_execute_state.statement = orm_execute_state.statement.options(where_clause)
+
+    def _relationship_restricted(
+        self,
+        orm_execute_state: ORMExecuteState,
+        session: AuthorizedSession,
+        entities: list[ReferencedEntity],
+        denied: list[Mapper[Any]],
+    ) -> list[ReferencedEntity] | None:
+        """
+        Drop entities of a relationship load that are already authorized, returns `None` if the handler does not need
+        to be called at all.
+        """
+        remaining = entities
+        if self.trust_propagated_criteria:
+            propagated = {
+                option.entity
+                for option in orm_execute_state.statement._with_options  # type: ignore
+                if isinstance(option, AuthorizationCriteria)
+            }
+            remaining = [entity for entity in remaining if entity.entity not in propagated]
+        if self.reuse_relationship_criteria:
+            computed = get_session_state(session, self).scope_to(session.user).select_criteria
+            for entity in remaining:
+                for selectable, filter_exp in computed.get(entity.entity, ()):
+                    if isinstance(filter_exp, False_):
+                        denied.append(entity.entity)
+                    self._add_criteria(orm_execute_state, selectable, filter_exp)
+            remaining = [entity for entity in remaining if entity.entity not in computed]
+        if not remaining:
+            self._count_saved_call()
+            return None
+        return remaining
+
+    # Authorization steps yield the handler's work as requests, run by `run_sync` for `SyncAuthHandler` and by
+    # `run_async` for `AuthHandler`
+
+    def _authorize_references(
+        self, orm_execute_state: ORMExecuteState, action: Literal["update", "delete"]
+    ) -> Steps[None]:
+        statement = cast(Update | Delete, orm_execute_state.statement)
+        if self.policy.is_public(get_table_mapper(statement.entity_description["entity"]), action):
+            return
+        session = cast(AuthorizedSession, orm_execute_state.session)
+        with self.metrics.time("collect", action):
+            conditions, references = extract_references(statement, orm_execute_state.parameters)
+        changes: dict[str, Any] = {}
+        if action == "update":
+            parameters = cast(dict[Column[Any], BindParameter[Any]], statement._values or {})  # type: ignore
+            changes = {c.name: v.effective_value for c, v in parameters.items()}
         for refs in references.values():
-            parameters = cast(dict[Column[Any], BindParameter[Any]], statement._values)  # type: ignore
-            async for selectable, filter_exp in self.auth_handler.before_update(
-                cast(AuthorizedSession, orm_execute_state.session),
-                list(refs.values()),
-                conditions,
-                {c.name: v.effective_value for c, v in parameters.items()},
-            ):
-                where_clause = with_loader_criteria(selectable, filter_exp, include_aliases=True)
-                orm_execute_state.statement = orm_execute_state.statement.options(where_clause)
-
-    async def authorize_insert(self, orm_execute_state: ORMExecuteState) -> None:
+            restricted = yield from self._restricted(session, list(refs.values()), action)
+            if restricted is None:
+                continue
+            mappers = [entity.entity for entity in restricted]
+            with self._handler_call(session, action, mappers):
+                if action == "update":
+                    results = self.auth_handler.before_update(session, restricted, conditions, changes)
+                else:
+                    results = self.auth_handler.before_delete(session, restricted, conditions)
+                filters = yield _Collect(results)
+            self._apply_filters(orm_execute_state, filters, action, mappers)
+
+    def authorize_update(self, orm_execute_state: ORMExecuteState) -> Steps[None]:
+        return self._authorize_references(orm_execute_state, "update")
+
+    def authorize_delete(self, orm_execute_state: ORMExecuteState) -> Steps[None]:
+        return self._authorize_references(orm_execute_state, "delete")
+
+    def authorize_insert(self, orm_execute_state: ORMExecuteState) -> Steps[None]:
         statement = cast(Insert, orm_execute_state.statement)
-        entity = ReferencedEntity(
-            entity=get_table_mapper(statement.entity_description["entity"]), selectable=statement.table
-        )
+        session = cast(AuthorizedSession, orm_execute_state.session)
+        entity = ReferencedEntity(get_table_mapper(statement.entity_description["entity"]), statement.table)
         if statement.select is not None:
-            new_state = copy.copy(orm_execute_state)
-            new_state.statement = statement.select
-            await self.authorize_select(new_state)
+            select_state = copy.copy(orm_execute_state)
+            select_state.statement = statement.select
+            yield from self.authorize_select(select_state)
+        if (yield from self._unrestricted(session, entity.entity, "insert")):
+            return
         columns = get_insert_columns(statement)
-        async for selectable, filter_exp in self.auth_handler.before_insert(
-            cast(AuthorizedSession, orm_execute_state.session),
-            entity,
-            columns,
-        ):
-            where_clause = with_loader_criteria(selectable, filter_exp, include_aliases=True)
-            orm_execute_state.statement = orm_execute_state.statement.options(where_clause)
+        mappers = (entity.entity,)
+        with self._handler_call(session, "insert", mappers):
+            filters = yield _Collect(self.auth_handler.before_insert(session, entity, columns))
+        self._apply_filters(orm_execute_state, filters, "insert", mappers)
 
-    async def authorize_delete(self, orm_execute_state: ORMExecuteState) -> None:
-        statement = cast(Delete, orm_execute_state.statement)
-        conditions, references = extract_references(statement)
+    @staticmethod
+    def _object_reference(state: InstanceState[Any]) -> tuple[list[ReferencedEntity], EntityCondition]:
+        """
+        Return the entity of a persistent object and the condition on its primary key.
+        """
+        mapper: Mapper[Any] = state.mapper  # type: ignore
+        table = cast(Table, state.class_.__table__)
+        # The identity stays known when a commit expired the attributes
+        identity = cast(tuple[Any, ...], state.identity)
+        conditions: list[EntityCondition] = [
+            ReferenceCondition(left=cast(Column[Any], table.c[key.name]), operator=eq, right=literal(value))
+            for key, value in zip(mapper.primary_key, identity, strict=True)
+        ]
+        condition = conditions[0] if len(conditions) == 1 else CompositeCondition(operator=and_, conditions=conditions)
+        return [ReferencedEntity(mapper, table, frozenset((identity,)))], condition
 
-        for refs in references.values():
-            async for selectable, filter_exp in self.auth_handler.before_delete(
-                cast(AuthorizedSession, orm_execute_state.session),
-                list(refs.values()),
-                conditions,
-            ):
-                where_clause = with_loader_criteria(selectable, filter_exp, include_aliases=True)
-                orm_execute_state.statement = orm_execute_state.statement.options(where_clause)
-
-    async def authorize_object_insert(self, session: AuthorizedSession, states: Iterable[InstanceState[Any]]) -> None:
-        for state in states:
-            mapper: Mapper[Any] = state.mapper  # type: ignore
-            async for _, filter_exp in self.auth_handler.before_insert(
-                session,
-                ReferencedEntity(mapper, state.class_.__table__),
-                [{k: v for k, v in state.dict.items() if k in mapper.columns}],
-            ):
-                if filter_exp != true():
-                    session.rollback()
-                    return
-
-    async def authorize_object_delete(self, session: AuthorizedSession, states: Iterable[InstanceState[Any]]) -> None:
-        for state in states:
-            mapper: Mapper[Any] = state.mapper  # type: ignore
-            table = state.class_.__table__
-            condition = CompositeCondition(
-                operator=and_,
-                conditions=[
-                    ReferenceCondition(
-                        left=getattr(table.c, key.name),
-                        operator=eq,
-                        right=LiteralExpression(state.dict[key.name]),
-                    )
-                    for key in mapper.primary_key
-                ],
-            )
-            if len(condition.conditions) == 1:
-                condition = condition.conditions[0]
-            async for _, filter_exp in self.auth_handler.before_delete(
-                session,
-                [ReferencedEntity(mapper, state.class_.__table__)],
-                condition,
-            ):
-                if filter_exp != true():
-                    session.rollback()
-                    return
-
-    async def authorize_object_update(
-        self, session: AuthorizedSession, states: Iterable[tuple[InstanceState[Any], dict[str, Any]]]
-    ) -> None:
+    def _authorize_objects(
+        self,
+        session: AuthorizedSession,
+        states: Iterable[tuple[InstanceState[Any], dict[str, Any]]],
+        action: Literal["insert", "update", "delete"],
+    ) -> Steps[None]:
+        """
+        Authorize flushed objects one by one, rolling the session back on the first one denied.
+        """
         for state, changes in states:
             mapper: Mapper[Any] = state.mapper  # type: ignore
-            table = state.class_.__table__
-            condition = CompositeCondition(
-                operator=and_,
-                conditions=[
-                    ReferenceCondition(
-                        left=getattr(table.c, key.name),
-                        operator=eq,
-                        right=LiteralExpression(state.dict[key.name]),
-                    )
-                    for key in mapper.primary_key
-                ],
-            )
-            if len(condition.conditions) == 1:
-                condition = condition.conditions[0]
-            async for _, filter_exp in self.auth_handler.before_update(
-                session,
-                [ReferencedEntity(mapper, table)],
-                condition,
-                changes,
-            ):
-                if filter_exp != true():
-                    session.rollback()
-                    return
-
-    async def authorize_select(self, orm_execute_state: ORMExecuteState) -> None:
-        entities, conditions = collect_entities(orm_execute_state)
-
-        async for selectable, filter_exp in self.auth_handler.before_select(
-            cast(AuthorizedSession, orm_execute_state.session), entities, conditions
+            if (yield from self._unrestricted(session, mapper, action)):
+                continue
+            with self._handler_call(session, action, (mapper,)):
+                if action == "insert":
+                    values = [{k: v for k, v in state.dict.items() if k in mapper.columns}]
+                    entity = ReferencedEntity(mapper, state.class_.__table__)
+                    results = self.auth_handler.before_insert(session, entity, values)
+                else:
+                    entities, condition = self._object_reference(state)
+                    if action == "update":
+                        results = self.auth_handler.before_update(session, entities, condition, changes)
+                    else:
+                        results = self.auth_handler.before_delete(session, entities, condition)
+                filters: list[tuple[Any, Any]] = yield _Collect(results)
+            if any(filter_exp != true() for _, filter_exp in filters):
+                session.rollback()
+                return
+
+    def authorize_object_insert(self, session: AuthorizedSession, states: Iterable[InstanceState[Any]]) -> Steps[None]:
+        return self._authorize_objects(session, ((state, {}) for state in states), "insert")
+
+    def authorize_object_delete(self, session: AuthorizedSession, states: Iterable[InstanceState[Any]]) -> Steps[None]:
+        return self._authorize_objects(session, ((state, {}) for state in states), "delete")
+
+    def authorize_object_update(
+        self, session: AuthorizedSession, states: Iterable[tuple[InstanceState[Any], dict[str, Any]]]
+    ) -> Steps[None]:
+        return self._authorize_objects(session, states, "update")
+
+    def _collect_select(
+        self, orm_execute_state: ORMExecuteState
+    ) -> tuple[AuthorizedSession, list[ReferencedEntity], EntityCondition | None] | None:
+        """
+        Collect the entities of a SELECT, returns `None` if it needs no authorization.
+        """
+        if self.policy.all_public(select_mappers(orm_execute_state), "select"):
+            # Only public entities, skip extracting the statement's references
+            return None
+        session = cast(AuthorizedSession, orm_execute_state.session)
+        if self.trust_identity_map and orm_execute_state.is_column_load:
+            refresh_state = orm_execute_state.load_options._refresh_state  # type: ignore
+            authorized_states = get_session_state(session, self).scope_to(session.user).authorized_states
+            if refresh_state is not None and refresh_state in authorized_states:
+                self._count_saved_call()
+                return None
+        with self.metrics.time("collect", "select"):
+            entities, conditions = collect_entities(orm_execute_state)
+        return session, entities, conditions
+
+    def authorize_select(self, orm_execute_state: ORMExecuteState) -> Steps[Result[Any] | None]:
+        """
+        Apply the handler's filters to a SELECT.
+
+        If the statement can not return any rows with the filters applied, an empty result is returned instead, which
+        is used in place of executing the statement.
+        """
+        collected = self._collect_select(orm_execute_state)
+        if collected is None:
+            return None
+        session, entities, conditions = collected
+        restricted = yield from self._restricted(session, entities, "select")
+        denied: list[Mapper[Any]] = []
+        if restricted and orm_execute_state.is_relationship_load:
+            restricted = self._relationship_restricted(orm_execute_state, session, restricted, denied)
+        if restricted is not None:
+            computed: dict[Mapper[Any], list[tuple[Any, Any]]] = {entity.entity: [] for entity in restricted}
+            with self._handler_call(session, "select", list(computed)):
+                filters = yield _Collect(self.auth_handler.before_select(session, restricted, conditions))
+            for selectable, filter_exp in filters:
+                mapper = inspect(selectable).mapper
+                if isinstance(filter_exp, False_):
+                    denied.append(mapper)
+                computed.setdefault(mapper, []).append((selectable, filter_exp))
+            self._apply_filters(orm_execute_state, filters, "select", computed)
+            if self.reuse_relationship_criteria:
+                get_session_state(session, self).scope_to(session.user).select_criteria.update(computed)
+        if _always_empty(orm_execute_state, denied):
+            return _empty_result(cast(Select[Any], orm_execute_state.statement))
+        return None
+
+    def checks_rows(self, orm_execute_state: ORMExecuteState) -> bool:
+        """
+        Check whether the result of a SELECT is checked row by row instead of filtering the statement.
+        """
+        statement = orm_execute_state.statement
+        if (
+            self.select_strategy != "check"
+            or not isinstance(statement, Select)
+            or orm_execute_state.is_column_load
+            or orm_execute_state.is_relationship_load
+        ):
+            # Column loads refresh objects that were checked when they were loaded, relationship loads fill
+            # collections the ORM does not return as rows
+            return False
+        descriptions = statement.column_descriptions
+        # Only rows of whole entities can be checked object by object, anything else is filtered by the handler
+        if not descriptions or not all(
+            description["entity"] is not None and description["expr"] is description["entity"]
+            for description in descriptions
         ):
-            where_clause = with_loader_criteria(selectable, filter_exp, include_aliases=True)
-            orm_execute_state.statement = orm_execute_state.statement.options(where_clause)
+            return False
+        # Eagerly loaded related objects never show up in the rows
+        return not _eager_loads(
+            cast(Select[Any], statement), [inspect(description["entity"]).mapper for description in descriptions]
+        )
+
+    def check_rows(self, orm_execute_state: ORMExecuteState, rows: Sequence[Row[Any]]) -> Steps[list[Row[Any]]]:
+        """
+        Drop rows of a SELECT with any object the handler denies, checking distinct objects in batches.
+        """
+        session = cast(AuthorizedSession, orm_execute_state.session)
+        restricted: dict[Mapper[Any], bool] = {}
+        instances: dict[int, Any] = {}
+        for row in rows:
+            for value in row:
+                state = inspect(value, raiseerr=False)
+                if not isinstance(state, InstanceState) or id(value) in instances:
+                    continue
+                mapper: Mapper[Any] = state.mapper  # type: ignore
+                if mapper not in restricted:
+                    restricted[mapper] = not (yield from self._unrestricted(session, mapper, "select"))
+                if restricted[mapper]:
+                    instances[id(value)] = value
+        pending = list(instances.values())
+        batches = [pending[i : i + self.check_batch_size] for i in range(0, len(pending), self.check_batch_size)]
+        with self._handler_call(session, "select", [mapper for mapper, checked in restricted.items() if checked]):
+            answers = yield _CheckObjects(self.auth_handler, session, batches, self.check_concurrency)
+        denied = {
+            id(instance)
+            for batch, allowed in zip(batches, answers, strict=True)
+            for instance, ok in zip(batch, allowed, strict=True)
+            if not ok
+        }
+        if not denied:
+            return list(rows)
+        for instance in instances.values():
+            if id(instance) in denied and instance in session:
+                # Loaded by the unfiltered statement, the session must not hand it out later
+                session.expunge(instance)
+        return [row for row in rows if not any(id(value) in denied for value in row)]
@@ -0,0 +1,72 @@
+from typing import Any, Iterator
+
+from sqlalchemy.orm import Mapper
+
+from sqlalchemy_auth_hooks.references import EntityCondition, ReferencedEntity
+
+Identity = tuple[Any, ...]
+
+
+class MapperChanges:
+    """
+    Changes of a single mapper within a committed transaction.
+
+    Objects flushed through the session are recorded with their column values, identities and changed attributes.
+    Bulk statements are recorded as they were executed.
+    """
+
+    __slots__ = ("mapper", "inserted", "updated", "deleted", "bulk_inserted", "bulk_updated", "bulk_deleted")
+
+    def __init__(self, mapper: Mapper[Any]) -> None:
+        self.mapper = mapper
+        # Column values of inserted objects
+        self.inserted: list[dict[str, Any]] = []
+        # Identities of updated objects with their changes
+        self.updated: list[tuple[Identity, dict[str, Any]]] = []
+        # Identities of deleted objects
+        self.deleted: list[Identity] = []
+        self.bulk_inserted: list[tuple[ReferencedEntity, list[dict[str, Any]]]] = []
+        self.bulk_updated: list[tuple[ReferencedEntity, EntityCondition | None, dict[str, Any]]] = []
+        self.bulk_deleted: list[tuple[ReferencedEntity, EntityCondition | None]] = []
+
+    def __bool__(self) -> bool:
+        return any(getattr(self, attribute) for attribute in self.__slots__[1:])
+
+    def __repr__(self) -> str:
+        return (
+            f"MapperChanges(mapper={self.mapper}, inserted={len(self.inserted)}, updated={len(self.updated)}, "
+            f"deleted={len(self.deleted)}, bulk_inserted={len(self.bulk_inserted)}, "
+            f"bulk_updated={len(self.bulk_updated)}, bulk_deleted={len(self.bulk_deleted)})"
+        )
+
+
+class Changeset:
+    """
+    All changes of a committed transaction, grouped by mapper in the order the mappers were first changed.
+    """
+
+    __slots__ = ("_changes",)
+
+    def __init__(self) -> None:
+        self._changes: dict[Mapper[Any], MapperChanges] = {}
+
+    def for_mapper(self, mapper: Mapper[Any]) -> MapperChanges:
+        changes = self._changes.get(mapper)
+        if changes is None:
+            changes = self._changes[mapper] = MapperChanges(mapper)
+        return changes
+
+    def __getitem__(self, mapper: Mapper[Any]) -> MapperChanges:
+        return self._changes[mapper]
+
+    def __contains__(self, mapper: object) -> bool:
+        return mapper in self._changes
+
+    def __iter__(self) -> Iterator[MapperChanges]:
+        return iter(self._changes.values())
+
+    def __len__(self) -> int:
+        return len(self._changes)
+
+    def __repr__(self) -> str:
+        return f"Changeset({list(self._changes.values())})"
@@ -1,8 +1,9 @@
 from collections import defaultdict
-from typing import Any, Generator, Mapping, Sequence
+from typing import Any, Generator, Sequence, cast
 
 import structlog
 from sqlalchemy import (
+    ColumnClause,
     Delete,
     FromClause,
     Join,
@@ -12,16 +13,26 @@ from sqlalchemy import (
 )
 from sqlalchemy.orm import Mapper, ORMExecuteState
 from sqlalchemy.sql.elements import ColumnElement, ExpressionClauseList
-from sqlalchemy.sql.operators import and_
+from sqlalchemy.sql.operators import and_, eq
 from sqlalchemy.sql.selectable import Alias, ReturnsRows
 
-from sqlalchemy_auth_hooks.conditions import traverse_conditions
+from sqlalchemy_auth_hooks.conditions import (
+    ParameterIndex,
+    Parameters,
+    combine_rows,
+    traverse_conditions,
+    traverse_row_conditions,
+)
+from sqlalchemy_auth_hooks.lookups import resolve_primary_keys, with_primary_keys
+from sqlalchemy_auth_hooks.normalization import normalize_condition
 from sqlalchemy_auth_hooks.references import (
     CompositeCondition,
     EntityCondition,
+    ReferenceCondition,
     ReferencedEntity,
+    literal,
 )
-from sqlalchemy_auth_hooks.utils import get_table_mapper
+from sqlalchemy_auth_hooks.utils import get_table_mapper, get_table_mappers
 
 logger = structlog.get_logger()
 
@@ -29,19 +40,46 @@ logger = structlog.get_logger()
 def _extract_mappers_from_clause(
     clause: FromClause, table_mappers: dict[FromClause, Mapper[Any]]
 ) -> Generator[tuple[Mapper[Any], ReturnsRows], None, None]:
-    if isinstance(clause, Table):
-        if mapper := table_mappers.get(clause):
-            yield mapper, clause.selectable
-    elif isinstance(clause, Join):
-        yield from _extract_mappers_from_clause(clause.left, table_mappers)
-        yield from _extract_mappers_from_clause(clause.right, table_mappers)
-    elif isinstance(clause, Alias):
-        yield next(_extract_mappers_from_clause(clause.element, table_mappers))[0], clause.selectable
-
-
-def _process_join_clause(
-    from_clause: Join, parameters: Mapping[str, Any] | Sequence[Mapping[str, Any]] | None
-) -> list[EntityCondition]:
+    # Depth-first, left to right, without recursing into long join chains
+    stack: list[FromClause] = [clause]
+    while stack:
+        clause = stack.pop()
+        if isinstance(clause, Table):
+            if mapper := table_mappers.get(clause):
+                yield mapper, clause.selectable
+        elif isinstance(clause, Join):
+            stack.append(clause.right)
+            stack.append(clause.left)
+        elif isinstance(clause, Alias):
+            yield next(_extract_mappers_from_clause(clause.element, table_mappers))[0], clause.selectable
+
+
+def required_mappers(froms: Sequence[FromClause], table_mappers: dict[FromClause, Mapper[Any]]) -> set[Mapper[Any]]:
+    """
+    Return the mappers every result row of a SELECT over `froms` depends on.
+
+    Tables on the nullable side of an outer join are left out, an empty result for them does not empty the query.
+    """
+    mappers: set[Mapper[Any]] = set()
+    stack: list[FromClause] = list(froms)
+    while stack:
+        clause = stack.pop()
+        if isinstance(clause, Join):
+            if clause.full:
+                continue
+            stack.append(clause.left)
+            if not clause.isouter:
+                stack.append(clause.right)
+        elif isinstance(clause, Table):
+            if mapper := table_mappers.get(clause):
+                mappers.add(mapper)
+        elif isinstance(clause, Alias) and isinstance(clause.element, Table):
+            if mapper := table_mappers.get(clause.element):
+                mappers.add(mapper)
+    return mappers
+
+
+def _process_join_clause(from_clause: Join, parameters: ParameterIndex) -> list[EntityCondition]:
     all_conditions: list[EntityCondition] = []
     if isinstance(from_clause.onclause, ExpressionClauseList):
         for clause in from_clause.onclause.clauses:
@@ -59,9 +97,10 @@ def process_clauses(
     froms: Sequence[FromClause],
     intermediate_result: dict[Mapper[Any], dict[ReturnsRows, ReferencedEntity]],
     where_clause: Any,
-    parameters: Mapping[str, Any] | Sequence[Mapping[str, Any]],
+    parameters: ParameterIndex | Parameters,
     table_mappers: dict[FromClause, Mapper[Any]],
 ) -> tuple[dict[Mapper[Any], dict[ReturnsRows, ReferencedEntity]], EntityCondition | None]:
+    parameters = ParameterIndex.of(parameters)
     all_conditions: list[EntityCondition] = []
     for from_clause in froms:
         if isinstance(from_clause, Join):
@@ -71,7 +110,7 @@ def process_clauses(
             intermediate_result[mapper][selectable] = ReferencedEntity(entity=mapper, selectable=selectable)
 
     # Extract primary key conditions from the WHERE clause, if any
-    where_conditions = traverse_conditions(where_clause, parameters)
+    where_conditions = traverse_row_conditions(where_clause, parameters)
 
     if where_conditions is not None:
         all_conditions.append(where_conditions)
@@ -83,7 +122,22 @@ def process_clauses(
     else:
         conditions = CompositeCondition(conditions=all_conditions, operator=and_)
 
-    return intermediate_result, conditions
+    return intermediate_result, normalize_condition(conditions)
+
+
+def select_mappers(state: ORMExecuteState) -> list[Mapper[Any]]:
+    """
+    Return the mappers of every FROM a SELECT renders, including tables only referenced by its WHERE clause.
+    """
+    if not isinstance(state.statement, Select) or state.bind_mapper is None:
+        return []
+    statement = cast(Select[Any], state.statement)  # type: ignore
+    table_mappers = get_table_mappers(state.bind_mapper.registry)
+    return [
+        mapper
+        for from_clause in statement.get_final_froms()
+        for mapper, _ in _extract_mappers_from_clause(from_clause, table_mappers)
+    ]
 
 
 def collect_entities(state: ORMExecuteState) -> tuple[list[ReferencedEntity], EntityCondition | None]:
@@ -99,7 +153,7 @@ def collect_entities(state: ORMExecuteState) -> tuple[list[ReferencedEntity], En
         return [], None
     registry = state.bind_mapper.registry
     froms = select_statement.get_final_froms()
-    table_mappers = {mapper.local_table: mapper for mapper in registry.mappers}
+    table_mappers = get_table_mappers(registry)
 
     results, conditions = process_clauses(
         froms,
@@ -109,20 +163,47 @@ def collect_entities(state: ORMExecuteState) -> tuple[list[ReferencedEntity], En
         table_mappers,
     )
 
-    return [entity for mapper_ref in results.values() for entity in mapper_ref.values()], conditions
+    entities = [entity for mapper_ref in results.values() for entity in mapper_ref.values()]
+    return with_primary_keys(entities, conditions), conditions
+
+
+def _primary_key_row_conditions(mapper: Mapper[Any], parameters: ParameterIndex) -> EntityCondition | None:
+    """
+    Build per-row primary key conditions for an ORM bulk UPDATE by primary key.
+    """
+    keys = [
+        (cast(ColumnClause[Any], column), mapper.get_property_by_column(column).key) for column in mapper.primary_key
+    ]
+    rows: list[EntityCondition | None] = []
+    for row in parameters.rows:
+        if any(key not in row for _, key in keys):
+            return None
+        conditions = [ReferenceCondition(left=column, operator=eq, right=literal(row[key])) for column, key in keys]
+        rows.append(conditions[0] if len(conditions) == 1 else CompositeCondition(operator=and_, conditions=conditions))
+    return combine_rows(rows)
 
 
 def extract_references(
     statement: Update | Delete,
+    parameters: ParameterIndex | Parameters = None,
 ) -> tuple[EntityCondition | None, dict[Mapper[Any], dict[Table, ReferencedEntity]]]:
+    parameters = ParameterIndex.of(parameters)
     mapper = get_table_mapper(statement.entity_description["entity"])
+    table = statement.entity_description["table"]
     references: dict[Mapper[Any], dict[Table, ReferencedEntity]] = {
         mapper: {
-            statement.entity_description["table"]: ReferencedEntity(
+            table: ReferencedEntity(
                 entity=mapper,
-                selectable=statement.entity_description["table"],
+                selectable=table,
             )
         }
     }
-    conditions = traverse_conditions(statement.whereclause, {})
+    if statement.whereclause is None and parameters.is_many:
+        conditions = _primary_key_row_conditions(mapper, parameters)
+    else:
+        conditions = traverse_row_conditions(statement.whereclause, parameters)
+    conditions = normalize_condition(conditions)
+    references[mapper][table] = references[mapper][table].with_primary_keys(
+        resolve_primary_keys(references[mapper][table], conditions)
+    )
     return conditions, references
@@ -1,4 +1,4 @@
-from typing import Any, Mapping, Sequence
+from typing import Any, Iterable, Iterator, Mapping, Sequence, cast
 
 import structlog
 from sqlalchemy import (
@@ -6,8 +6,9 @@ from sqlalchemy import (
     ColumnClause,
     true,
 )
-from sqlalchemy.sql.elements import BinaryExpression, ColumnElement, ExpressionClauseList, UnaryExpression
-from sqlalchemy.sql.operators import is_true
+from sqlalchemy.sql.elements import BinaryExpression, ColumnElement, ExpressionClauseList, Grouping, UnaryExpression
+from sqlalchemy.sql.operators import OperatorType, is_true
+from sqlalchemy.sql.visitors import iterate
 
 from sqlalchemy_auth_hooks.references import (
     ColumnExpression,
@@ -17,51 +18,120 @@ from sqlalchemy_auth_hooks.references import (
     LiteralExpression,
     NestedExpression,
     ReferenceCondition,
+    RowsCondition,
     UnaryCondition,
+    ValueSet,
+    literal,
 )
 
 logger = structlog.get_logger()
 
 
+Parameters = Mapping[str, Any] | Sequence[Mapping[str, Any]] | None
+
+
+class ParameterIndex:
+    """
+    Index over the parameters of a single execution, built once and shared by every bind parameter lookup.
+
+    For executemany parameter sets, `first` holds the value of the first row providing each key, while
+    `rows` keeps every row so that per-row values can be resolved directly.
+    """
+
+    __slots__ = ("rows", "first")
+
+    def __init__(self, parameters: Parameters) -> None:
+        if parameters is None:
+            self.rows: tuple[Mapping[str, Any], ...] = ()
+        elif isinstance(parameters, Mapping):
+            self.rows = (parameters,)
+        else:
+            self.rows = tuple(parameters)
+        self.first: dict[str, Any] = {}
+        for row in reversed(self.rows):
+            self.first.update(row)
+
+    @classmethod
+    def of(cls, parameters: "ParameterIndex | Parameters") -> "ParameterIndex":
+        return parameters if isinstance(parameters, ParameterIndex) else cls(parameters)
+
+    @property
+    def is_many(self) -> bool:
+        return len(self.rows) > 1
+
+    def get(self, parameter: BindParameter[Any], row: int | None = None) -> Any | None:
+        if row is None:
+            return self.first.get(parameter.key, parameter.effective_value)
+        return self.rows[row].get(parameter.key, parameter.effective_value)
+
+
 def get_parameter_value(
-    parameter: BindParameter[Any], parameters: Mapping[str, Any] | Sequence[Mapping[str, Any]] | None
+    parameter: BindParameter[Any], parameters: ParameterIndex | Parameters, row: int | None = None
 ) -> Any | None:
-    effective_value = parameter.effective_value
-    if isinstance(parameters, dict):
-        return parameters.get(parameter.key, effective_value)
-    elif isinstance(parameters, list):
-        return next(
-            (param[parameter.key] for param in parameters if parameter.key in param),
-            effective_value,
-        )
-    else:
-        return effective_value
+    return ParameterIndex.of(parameters).get(parameter, row)
 
 
-def _process_expr(
-    expr: ColumnElement[Any] | BindParameter[Any],
-    parameters: Mapping[str, Any] | Sequence[Mapping[str, Any]] | None,
-) -> ColumnClause[Any] | Expression:
-    if isinstance(expr, BindParameter):
-        return LiteralExpression(get_parameter_value(expr, parameters))
+def _value_set(values: Any) -> Any:
+    if values is None or isinstance(values, ValueSet):
+        return values
+    try:
+        return ValueSet(values)
+    except TypeError:
+        # Unhashable items, keep the values as they were bound
+        return values
 
-    if isinstance(expr, BinaryExpression):
-        left = _process_expr(expr.left, parameters)
-        right = _process_expr(expr.right, parameters)
-        if isinstance(left, (ColumnClause, LiteralExpression)) and isinstance(right, (ColumnClause, LiteralExpression)):
-            return ColumnExpression(operator=expr.operator, left=left, right=right)
-        return NestedExpression(operator=expr.operator, left=left, right=right)
 
-    if isinstance(expr, ColumnClause):
-        return expr
+def _combine_expressions(
+    operator: OperatorType, left: ColumnClause[Any] | Expression, right: ColumnClause[Any] | Expression
+) -> Expression:
+    if isinstance(left, (ColumnClause, LiteralExpression)) and isinstance(right, (ColumnClause, LiteralExpression)):
+        return ColumnExpression(operator=operator, left=left, right=right)
+    return NestedExpression(operator=operator, left=left, right=right)
 
-    logger.warning("Could not process expression", expr=expr)
-    return LiteralExpression(None)
+
+def _process_expr(
+    expr: ColumnElement[Any] | BindParameter[Any],
+    parameters: ParameterIndex,
+    row: int | None,
+) -> ColumnClause[Any] | Expression:
+    # Post-order walk with an explicit stack; a non-zero count marks an element whose operands are all processed
+    results: list[ColumnClause[Any] | Expression] = []
+    stack: list[tuple[ColumnElement[Any], int]] = [(expr, 0)]
+    while stack:
+        element, operands = stack.pop()
+        if operands:
+            values = results[-operands:]
+            del results[-operands:]
+            operator = cast(BinaryExpression[Any] | ExpressionClauseList[Any], element).operator
+            # Flattened chains of associative operators are folded from the left
+            combined = values[0]
+            for value in values[1:]:
+                combined = _combine_expressions(operator, combined, value)
+            results.append(combined)
+        elif isinstance(element, BindParameter):
+            value = parameters.get(element, row)
+            results.append(LiteralExpression(_value_set(value)) if element.expanding else literal(value))
+        elif isinstance(element, Grouping):
+            stack.append((element.element, 0))  # type: ignore
+        elif isinstance(element, BinaryExpression):
+            stack.append((element, 2))
+            stack.append((element.right, 0))
+            stack.append((element.left, 0))
+        elif isinstance(element, ExpressionClauseList) and element.clauses:
+            stack.append((element, len(element.clauses)))
+            stack.extend((clause, 0) for clause in reversed(element.clauses))
+        elif isinstance(element, ColumnClause):
+            results.append(element)
+        else:
+            logger.warning("Could not process expression", expr=element)
+            results.append(literal(None))
+    return results[0]
 
 
 def _process_condition(
     condition: ColumnElement[Any],
-    parameters: Mapping[str, Any] | Sequence[Mapping[str, Any]] | None,
+    parameters: ParameterIndex,
+    row: int | None,
 ) -> EntityCondition | None:
     if isinstance(condition, UnaryExpression):
         if condition.operator == is_true and condition.element == true():
@@ -73,8 +143,8 @@ def _process_condition(
             return None
         return UnaryCondition(operator=condition.operator, value=condition.element)
 
-    left_expr = _process_expr(condition.left, parameters)
-    right_expr = _process_expr(condition.right, parameters)
+    left_expr = _process_expr(condition.left, parameters, row)
+    right_expr = _process_expr(condition.right, parameters, row)
     return ReferenceCondition(
         left=left_expr,
         operator=condition.operator,
@@ -84,15 +154,65 @@ def _process_condition(
 
 def traverse_conditions(
     condition: ColumnElement[Any] | None,
-    parameters: Mapping[str, Any] | Sequence[Mapping[str, Any]] | None,
+    parameters: ParameterIndex | Parameters,
+    row: int | None = None,
 ) -> EntityCondition | None:
     if condition is None:
         return None
+    parameters = ParameterIndex.of(parameters)
 
     if not isinstance(condition, ExpressionClauseList):
-        return _process_condition(condition, parameters)
-    conditions = CompositeCondition(conditions=[], operator=condition.operator)
-    for child in condition.clauses:
-        if child_condition := traverse_conditions(child, parameters):
-            conditions.conditions.append(child_condition)
-    return conditions
+        return _process_condition(condition, parameters, row)
+
+    # Explicit stack of clause lists being processed together with their already processed children
+    stack: list[tuple[ExpressionClauseList[Any], Iterator[ColumnElement[Any]], list[EntityCondition]]] = [
+        (condition, iter(condition.clauses), [])
+    ]
+    while True:
+        clause_list, clauses, children = stack[-1]
+        for child in clauses:
+            if isinstance(child, ExpressionClauseList):
+                stack.append((child, iter(child.clauses), []))  # type: ignore
+                break
+            if (child_condition := _process_condition(child, parameters, row)) is not None:
+                children.append(child_condition)
+        else:
+            stack.pop()
+            composite = CompositeCondition(conditions=children, operator=clause_list.operator)
+            if not stack:
+                return composite
+            stack[-1][2].append(composite)
+
+
+def combine_rows(conditions: Iterable[EntityCondition | None]) -> EntityCondition | None:
+    """
+    Combine per-row conditions into a single `RowsCondition`.
+
+    A row without any condition leaves the whole statement unrestricted, so `None` is returned in that case.
+    """
+    rows: list[EntityCondition] = []
+    for condition in conditions:
+        if condition is None:
+            return None
+        rows.append(condition)
+    return RowsCondition(rows)
+
+
+def traverse_row_conditions(
+    condition: ColumnElement[Any] | None,
+    parameters: ParameterIndex | Parameters,
+) -> EntityCondition | None:
+    """
+    Extract conditions for every parameter row of an executemany execution.
+
+    Rows are only traversed separately when the clause binds a key that is present in the parameters,
+    otherwise all the rows share a single condition.
+    """
+    if condition is None:
+        return None
+    parameters = ParameterIndex.of(parameters)
+    if not parameters.is_many or not any(
+        isinstance(element, BindParameter) and element.key in parameters.first for element in iterate(condition)
+    ):
+        return traverse_conditions(condition, parameters)
+    return combine_rows(traverse_conditions(condition, parameters, row) for row in range(len(parameters.rows)))
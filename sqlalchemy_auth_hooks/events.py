@@ -1,9 +1,11 @@
 import abc
+import weakref
 from typing import Any, Generic, TypeVar
 
 import structlog
-from sqlalchemy.orm import InstanceState
+from sqlalchemy.orm import InstanceState, Mapper
 
+from sqlalchemy_auth_hooks.changeset import Changeset
 from sqlalchemy_auth_hooks.post_auth_handler import PostAuthHandler
 from sqlalchemy_auth_hooks.references import EntityCondition, ReferencedEntity
 from sqlalchemy_auth_hooks.session import AuthorizedSession
@@ -13,18 +15,47 @@ logger = structlog.get_logger()
 _O = TypeVar("_O")
 
 
+def _column_values(state: InstanceState[Any]) -> dict[str, Any]:
+    return {prop.key: state.dict[prop.key] for prop in state.mapper.column_attrs if prop.key in state.dict}
+
+
 class Event(abc.ABC, Generic[_O]):
     @abc.abstractmethod
     async def trigger(self, session: AuthorizedSession, handler: PostAuthHandler) -> None:
         raise NotImplementedError  # pragma: no cover
 
+    @abc.abstractmethod
+    def collect(self, changeset: Changeset) -> None:
+        """
+        Add the event to the changeset of its transaction.
+        """
+        raise NotImplementedError  # pragma: no cover
+
 
 class SingleMutationEvent(Event[_O], abc.ABC):
+    """
+    Mutation of a single object, kept by identity so the object and its graph are not held until the commit.
+    """
+
     def __init__(self, state: InstanceState[_O]) -> None:
-        self.state = state
+        self.mapper: Mapper[_O] = state.mapper
+        self.identity_key: tuple[Any, ...] = state.identity_key  # type: ignore
+        # Deleted objects leave the identity map, a weak reference still finds them while they are in use
+        self._object = weakref.ref(state.obj())  # type: ignore
+
+    @property
+    def identity(self) -> tuple[Any, ...]:
+        return self.identity_key[1]  # type: ignore
+
+    def resolve(self, session: AuthorizedSession) -> _O | None:
+        """
+        Return the mutated object, `None` if it is no longer referenced anywhere.
+        """
+        instance: _O | None = session.identity_map.get(self.identity_key)
+        return instance if instance is not None else self._object()
 
     def __hash__(self) -> int:
-        return hash(self.state)
+        return hash(self.identity_key)
 
 
 class ManyMutationEvent(Event[_O], abc.ABC):
@@ -36,25 +67,40 @@ class ManyMutationEvent(Event[_O], abc.ABC):
 
 
 class CreateSingleEvent(SingleMutationEvent[_O]):
+    def __init__(self, state: InstanceState[_O]) -> None:
+        super().__init__(state)
+        # Snapshot the flushed values, the object may be expired once the transaction is committed
+        self.values = _column_values(state)
+
+    def collect(self, changeset: Changeset) -> None:
+        changeset.for_mapper(self.mapper).inserted.append(self.values)
+
     async def trigger(self, session: AuthorizedSession, handler: PostAuthHandler) -> None:
         logger.debug("Create event triggered")
-        await handler.after_single_insert(session, self.state.object)
+        await handler.after_single_insert(session, self.resolve(session))
 
 
 class DeleteSingleEvent(SingleMutationEvent[_O]):
+    def collect(self, changeset: Changeset) -> None:
+        changeset.for_mapper(self.mapper).deleted.append(self.identity)
+
     async def trigger(self, session: AuthorizedSession, handler: PostAuthHandler) -> None:
         logger.debug("Delete event triggered")
-        await handler.after_single_delete(session, self.state.object)
+        await handler.after_single_delete(session, self.resolve(session))
 
 
 class UpdateSingleEvent(SingleMutationEvent[_O]):
     def __init__(self, state: InstanceState[_O], changes: dict[str, Any]) -> None:
         super().__init__(state)
+        # Scalar values only, see `get_compact_changes`
         self.changes = changes
 
+    def collect(self, changeset: Changeset) -> None:
+        changeset.for_mapper(self.mapper).updated.append((self.identity, self.changes))
+
     async def trigger(self, session: AuthorizedSession, handler: PostAuthHandler) -> None:
         logger.debug("Update event triggered")
-        await handler.after_single_update(session, self.state.object, self.changes)
+        await handler.after_single_update(session, self.resolve(session), self.changes)
 
 
 class CreateManyEvent(ManyMutationEvent[_O]):
@@ -62,6 +108,9 @@ class CreateManyEvent(ManyMutationEvent[_O]):
         super().__init__(entity)
         self.values = values
 
+    def collect(self, changeset: Changeset) -> None:
+        changeset.for_mapper(self.entity.entity).bulk_inserted.append((self.entity, self.values))
+
     async def trigger(self, session: AuthorizedSession, handler: PostAuthHandler) -> None:
         logger.debug("Create many event triggered")
         await handler.after_many_insert(session, self.entity, self.values)
@@ -72,6 +121,9 @@ class DeleteManyEvent(ManyMutationEvent[_O]):
         super().__init__(entity)
         self.conditions = conditions
 
+    def collect(self, changeset: Changeset) -> None:
+        changeset.for_mapper(self.entity.entity).bulk_deleted.append((self.entity, self.conditions))
+
     async def trigger(self, session: AuthorizedSession, handler: PostAuthHandler) -> None:
         logger.debug("Delete many event triggered")
         await handler.after_many_delete(session, self.entity, self.conditions)
@@ -83,6 +135,9 @@ class UpdateManyEvent(ManyMutationEvent[_O]):
         self.conditions = conditions
         self.changes = changes
 
+    def collect(self, changeset: Changeset) -> None:
+        changeset.for_mapper(self.entity.entity).bulk_updated.append((self.entity, self.conditions, self.changes))
+
     async def trigger(self, session: AuthorizedSession, handler: PostAuthHandler) -> None:
         logger.debug("Update many event triggered")
         await handler.after_many_update(session, self.entity, self.conditions, self.changes)
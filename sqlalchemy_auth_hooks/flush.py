@@ -0,0 +1,127 @@
+from itertools import chain
+from typing import Any, Iterator
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import MANYTOONE, InstanceState, Mapper, Session, UOWTransaction
+
+# Key of the classification in `UOWTransaction.attributes`, shared by all registered hooks
+_ATTRIBUTES_KEY = "sqlalchemy_auth_hooks.flush"
+
+
+def get_state_changes(state: InstanceState[Any]) -> dict[str, Any]:
+    return {attr.key: attr.history.added[-1] for attr in state.attrs if attr.history.has_changes()}  # type: ignore
+
+
+def _related_identity(instance: Any) -> tuple[Any, ...] | None:
+    if instance is None:
+        return None
+    return tuple(inspect(instance).mapper.primary_key_from_instance(instance))
+
+
+def get_compact_changes(state: InstanceState[Any], changes: dict[str, Any]) -> dict[str, Any]:
+    """
+    Return the `changes` of a flushed state with related objects replaced by their primary keys.
+
+    Must be called after the statements of the flush ran, so that new related objects have their keys assigned. The
+    foreign keys the flush synchronized from changed many-to-one relationships are added to the changes.
+    """
+    mapper: Mapper[Any] = state.mapper
+    relationships = mapper.relationships
+    compact = dict(changes)
+    for key in changes.keys() & relationships.keys():
+        compact[key] = _related_identity(changes[key])
+        relationship = relationships[key]
+        if relationship.direction is MANYTOONE:
+            for column in relationship.local_columns:
+                attribute = mapper.get_property_by_column(column).key
+                compact[attribute] = state.dict.get(attribute)
+    return compact
+
+
+class MapperFlush:
+    """
+    States of a single mapper taking part in a flush.
+    """
+
+    __slots__ = ("inserts", "updates", "deletes")
+
+    def __init__(self) -> None:
+        self.inserts: list[InstanceState[Any]] = []
+        # Updated states with their changes, taken before the flush resets attribute history
+        self.updates: list[tuple[InstanceState[Any], dict[str, Any]]] = []
+        self.deletes: list[InstanceState[Any]] = []
+
+
+class FlushPlan:
+    """
+    Inserts, updates and deletes of a flush grouped by mapper.
+    """
+
+    __slots__ = ("mappers",)
+
+    def __init__(self) -> None:
+        self.mappers: dict[Mapper[Any], MapperFlush] = {}
+
+    def for_mapper(self, mapper: Mapper[Any]) -> MapperFlush:
+        bucket = self.mappers.get(mapper)
+        if bucket is None:
+            bucket = self.mappers[mapper] = MapperFlush()
+        return bucket
+
+    @property
+    def inserts(self) -> Iterator[InstanceState[Any]]:
+        return chain.from_iterable(bucket.inserts for bucket in self.mappers.values())
+
+    @property
+    def updates(self) -> Iterator[tuple[InstanceState[Any], dict[str, Any]]]:
+        return chain.from_iterable(bucket.updates for bucket in self.mappers.values())
+
+    @property
+    def deletes(self) -> Iterator[InstanceState[Any]]:
+        return chain.from_iterable(bucket.deletes for bucket in self.mappers.values())
+
+
+def classify_flush(session: Session) -> FlushPlan:
+    """
+    Classify the pending changes of `session` for authorizing them before the flush.
+    """
+    plan = FlushPlan()
+    new: dict[InstanceState[Any], Any] = session._new  # type: ignore
+    deleted: dict[InstanceState[Any], Any] = session._deleted  # type: ignore
+    for state in new:
+        plan.for_mapper(state.mapper).inserts.append(state)
+    for state in deleted:
+        plan.for_mapper(state.mapper).deletes.append(state)
+    for state in session._dirty_states:  # type: ignore
+        if state.modified and state.has_identity and state not in deleted:
+            plan.for_mapper(state.mapper).updates.append((state, get_state_changes(state)))
+    return plan
+
+
+def _classify_flushed(flush_context: UOWTransaction) -> FlushPlan:
+    plan = FlushPlan()
+    states: dict[InstanceState[Any], tuple[bool, bool]] = flush_context.states  # type: ignore
+    for state, (isdelete, listonly) in states.items():
+        if listonly:
+            continue
+        if isdelete:
+            plan.for_mapper(state.mapper).deletes.append(state)
+        elif not state.has_identity:
+            plan.for_mapper(state.mapper).inserts.append(state)
+        elif state.modified:
+            plan.for_mapper(state.mapper).updates.append((state, get_state_changes(state)))
+    return plan
+
+
+def get_flushed_plan(flush_context: UOWTransaction) -> FlushPlan:
+    """
+    Return the classification of the states the flush in `flush_context` wrote, classifying them on first use.
+
+    The first use must happen in `after_flush`, before the flush assigns identities to inserted states and resets the
+    attribute history. Unlike `classify_flush`, it includes the changes other `before_flush` listeners made after the
+    authorization and the states the unit of work deleted on its own, i.e. by delete-orphan cascades.
+    """
+    plan: FlushPlan | None = flush_context.attributes.get(_ATTRIBUTES_KEY)
+    if plan is None:
+        plan = flush_context.attributes[_ATTRIBUTES_KEY] = _classify_flushed(flush_context)
+    return plan
@@ -1,8 +1,9 @@
 import asyncio
-from collections import defaultdict
 from functools import partial
-from threading import Thread
-from typing import Any, Callable, Coroutine, TypeVar, cast
+from threading import Lock, Thread
+from time import perf_counter
+from typing import Any, Callable, Coroutine, Iterator, TypeVar, cast
+from weakref import WeakSet
 
 import structlog
 from sqlalchemy import (
@@ -10,20 +11,31 @@ from sqlalchemy import (
     Column,
     Delete,
     Insert,
+    Result,
+    Row,
     Update,
     event,
     inspect,
 )
+from sqlalchemy.engine import IteratorResult
 from sqlalchemy.orm import (
     InstanceState,
     ORMExecuteState,
     Session,
+    SessionTransaction,
     UOWTransaction,
 )
 from structlog.stdlib import BoundLogger
 
-from sqlalchemy_auth_hooks.auth_handler import AuthHandler
-from sqlalchemy_auth_hooks.authorization import StatementAuthorizer
+from sqlalchemy_auth_hooks.auth_handler import Action, AuthHandler, SyncAuthHandler
+from sqlalchemy_auth_hooks.authorization import (
+    AuthorizationCriteria,
+    StatementAuthorizer,
+    Steps,
+    run_async,
+    run_sync,
+)
+from sqlalchemy_auth_hooks.changeset import Changeset
 from sqlalchemy_auth_hooks.clauses import extract_references
 from sqlalchemy_auth_hooks.events import (
     CreateManyEvent,
@@ -34,10 +46,26 @@ from sqlalchemy_auth_hooks.events import (
     UpdateManyEvent,
     UpdateSingleEvent,
 )
+from sqlalchemy_auth_hooks.flush import classify_flush, get_compact_changes, get_flushed_plan
+from sqlalchemy_auth_hooks.policies import AccessPolicy
 from sqlalchemy_auth_hooks.post_auth_handler import PostAuthHandler
 from sqlalchemy_auth_hooks.references import ReferencedEntity
-from sqlalchemy_auth_hooks.session import check_skip
-from sqlalchemy_auth_hooks.utils import get_insert_columns, get_table_mapper, run_loop
+from sqlalchemy_auth_hooks.session import AuthorizedSession, check_skip
+from sqlalchemy_auth_hooks.slow_log import (
+    SlowAuthorization,
+    SlowAuthorizationLog,
+    criteria_size,
+    mapper_names,
+    statement_fingerprint,
+)
+from sqlalchemy_auth_hooks.state import get_session_state
+from sqlalchemy_auth_hooks.tracing import start_span
+from sqlalchemy_auth_hooks.utils import (
+    at_fork_in_child,
+    get_insert_columns,
+    get_table_mapper,
+    run_loop,
+)
 
 logger: BoundLogger = structlog.get_logger()
 
@@ -45,65 +73,99 @@ T = TypeVar("T")
 
 
 class SQLAlchemyAuthHooks:
-    def __init__(self, auth_handler: AuthHandler, post_auth_handler: PostAuthHandler) -> None:
+    def __init__(
+        self,
+        auth_handler: AuthHandler | SyncAuthHandler,
+        post_auth_handler: PostAuthHandler,
+        policy: AccessPolicy | None = None,
+        *,
+        slow_threshold: float | None = None,
+        slow_log_size: int = 20,
+        **authorizer_options: Any,
+    ) -> None:
+        """
+        :param slow_threshold: Seconds above which the authorization of a statement is logged and kept in `slow_log`.
+        :param slow_log_size: Number of the slowest statement shapes kept in `slow_log`.
+        """
         self.auth_handler = auth_handler
         self.post_auth_handler = post_auth_handler
-        self._pending_events: dict[Session, dict[tuple[Any, ...] | None, list[Event[Any]]]] = defaultdict(
-            lambda: defaultdict(list)
+        # Handlers overriding after_commit_batch get a single call per commit instead of one per event
+        self._batches_commits = (
+            getattr(type(post_auth_handler), "after_commit_batch", PostAuthHandler.after_commit_batch)
+            is not PostAuthHandler.after_commit_batch
         )
-        self._loop = asyncio.new_event_loop()
-        self._executor_thread = Thread(target=partial(run_loop, self._loop), daemon=True)
-        self._executor_thread.start()
-        self._authorizer = StatementAuthorizer(self.auth_handler)
+        # Started on first use, so hooks registered before a fork (i.e. in a preloading server) work in the children
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._executor_thread: Thread | None = None
+        self._loop_lock = Lock()
+        at_fork_in_child(self._after_fork)
+        self._policy = policy if policy is not None else AccessPolicy()
+        self._authorizer = StatementAuthorizer(self.auth_handler, self._policy, **authorizer_options)
+        self._slow_log = SlowAuthorizationLog(slow_threshold, slow_log_size) if slow_threshold is not None else None
+        self._authorizer.tracks_handler_time = self._slow_log is not None
+
+    def _pending_events(self, session: Session) -> dict[tuple[Any, ...] | None, list[Event[Any]]]:
+        # Kept on the session itself, concurrent sessions never share the store
+        return get_session_state(session, self._authorizer).pending_events
 
     @property
     def authorizer(self) -> StatementAuthorizer:
         return self._authorizer
 
-    def call_async(self, func: Callable[..., Coroutine[T, None, Any]], *args: Any) -> T:
-        future = asyncio.run_coroutine_threadsafe(func(*args), self._loop)
+    @property
+    def policy(self) -> AccessPolicy:
+        return self._policy
+
+    @property
+    def slow_log(self) -> SlowAuthorizationLog | None:
+        return self._slow_log
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        loop = self._loop
+        if loop is None:
+            with self._loop_lock:
+                loop = self._loop
+                if loop is None:
+                    loop = asyncio.new_event_loop()
+                    self._executor_thread = Thread(target=partial(run_loop, loop), daemon=True)
+                    self._executor_thread.start()
+                    self._loop = loop
+        return loop
+
+    def _after_fork(self) -> None:
+        # Only the forking thread exists in the child, the loop is started again on next use. Caches are kept.
+        self._loop = None
+        self._executor_thread = None
+        self._loop_lock = Lock()
+
+    async def _timed_dispatch(self, coroutine: Coroutine[Any, Any, T], submitted: float) -> T:
+        self._authorizer.metrics.record("dispatch", "", "", perf_counter() - submitted)
+        return await coroutine
+
+    def call_async(self, func: Callable[..., Coroutine[Any, Any, T]], *args: Any) -> T:
+        # The coroutine runs in a copy of the calling thread's context, carrying the current tracing span along
+        coroutine = func(*args)
+        if self._authorizer.metrics.enabled:
+            coroutine = self._timed_dispatch(coroutine, perf_counter())
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._get_loop())
         return future.result()
 
-    @staticmethod
-    def _get_state_changes(state: InstanceState[Any]) -> dict[str, Any]:
-        return {attr.key: attr.history.added[-1] for attr in state.attrs if attr.history.has_changes()}  # type: ignore
+    def authorize(self, steps: Callable[..., Steps[T]], *args: Any) -> T:
+        """
+        Run authorization steps of the authorizer, on the calling thread for synchronous handlers.
+        """
+        if self._authorizer.is_sync:
+            return run_sync(steps(*args))
+        return self.call_async(partial(run_async, steps(*args)))
 
     def after_flush(self, session: Session, flush_context: UOWTransaction) -> None:
         logger.debug("after_flush")
         if check_skip(session):
             return
-        for _mapper, states in flush_context.mappers.items():
-            for state in states:
-                if state.modified and state.has_identity and state.is_instance:
-                    # Update
-                    changes = self._get_state_changes(state)
-                    self._pending_events[session][state.identity_key].append(UpdateSingleEvent(state, changes))
-
-    def check_updates(self, session: Session) -> None:
-        pending_updates: list[tuple[InstanceState[Any], dict[str, Any]]] = []
-        for instance in session.dirty:
-            state = inspect(instance)
-            if state.modified and state.has_identity and state.is_instance:
-                changes = self._get_state_changes(state)
-                pending_updates.append((state, changes))
-        if pending_updates:
-            self.call_async(self._authorizer.authorize_object_update, session, pending_updates)
-
-    def check_inserts(self, session: Session) -> None:
-        pending_inserts: list[InstanceState[Any]] = []
-        for instance in session.new:
-            state = inspect(instance)
-            pending_inserts.append(state)
-        if pending_inserts:
-            self.call_async(self._authorizer.authorize_object_insert, session, pending_inserts)
-
-    def check_deletes(self, session: Session) -> None:
-        pending_deletes: list[InstanceState[Any]] = []
-        for instance in session.deleted:
-            state = inspect(instance)
-            pending_deletes.append(state)
-        if pending_deletes:
-            self.call_async(self._authorizer.authorize_object_delete, session, pending_deletes)
+        for state, changes in get_flushed_plan(flush_context).updates:
+            # New related objects have keys by now
+            compact = get_compact_changes(state, changes)
+            self._pending_events(session)[state.identity_key].append(UpdateSingleEvent(state, compact))
 
     def before_flush(
         self, session: Session, _flush_context: UOWTransaction, _instances: list[InstanceState[Any]] | None
@@ -111,56 +173,101 @@ class SQLAlchemyAuthHooks:
         logger.debug("before_flush")
         if check_skip(session):
             return
-        self.check_inserts(session)
-        self.check_deletes(session)
-        self.check_updates(session)
+        plan = classify_flush(session)
+        pending_inserts = list(plan.inserts)
+        pending_deletes = list(plan.deletes)
+        pending_updates = list(plan.updates)
+        attributes = {"inserts": len(pending_inserts), "deletes": len(pending_deletes), "updates": len(pending_updates)}
+        with start_span(self._authorizer.tracer, "flush", attributes):
+            if pending_inserts:
+                self.authorize(self._authorizer.authorize_object_insert, session, pending_inserts)
+            if pending_deletes:
+                self.authorize(self._authorizer.authorize_object_delete, session, pending_deletes)
+            if pending_updates:
+                self.authorize(self._authorizer.authorize_object_update, session, pending_updates)
 
     def after_flush_postexec(self, session: Session, flush_context: UOWTransaction) -> None:
         logger.debug("after_flush_postexec")
         if check_skip(session):
             return
-        for _mapper, states in flush_context.mappers.items():
-            for state in states:
-                if not state.deleted and not state.detached and state.has_identity and state.is_instance:
-                    # Create
-                    self._pending_events[session][state.identity_key].append(CreateSingleEvent(state))
-                elif state.deleted and state.has_identity and state.is_instance:
-                    # Delete
-                    self._pending_events[session][state.identity_key].append(DeleteSingleEvent(state))
+        plan = get_flushed_plan(flush_context)
+        for state in plan.inserts:
+            # Objects that were garbage collected after the flush are detached
+            if not state.detached and state.has_identity:
+                self._pending_events(session)[state.identity_key].append(CreateSingleEvent(state))
+        for state in plan.deletes:
+            if state.deleted and state.has_identity:
+                self._pending_events(session)[state.identity_key].append(DeleteSingleEvent(state))
 
     def after_commit(self, session: Session) -> None:
         logger.debug("after_commit")
         if check_skip(session):
             return
-        if session not in self._pending_events:
+        pending_events = get_session_state(session, self._authorizer).take_pending_events()
+        if not pending_events:
             logger.debug("No tracked session states to process")
             return
-        for pending_instance_key in self._pending_events[session]:
-            for hook in self._pending_events[session][pending_instance_key]:
-                self.call_async(hook.trigger, session, self.post_auth_handler)
-        del self._pending_events[session]
+        with self._authorizer.metrics.time("post_commit", "commit"):
+            if self._batches_commits:
+                changeset = Changeset()
+                for events in pending_events.values():
+                    for hook in events:
+                        hook.collect(changeset)
+                with start_span(self._authorizer.tracer, "post_commit", {"event": "batch", "mappers": len(changeset)}):
+                    self.call_async(self.post_auth_handler.after_commit_batch, session, changeset)
+                return
+            for events in pending_events.values():
+                for hook in events:
+                    with start_span(self._authorizer.tracer, "post_commit", {"event": type(hook).__name__}):
+                        self.call_async(hook.trigger, session, self.post_auth_handler)
 
     def after_rollback(self, session: Session) -> None:
         logger.debug("after_rollback")
         if check_skip(session):
             return
-        if session not in self._pending_events:
-            logger.debug("No tracked session states to process")
-            return
-        del self._pending_events[session]
+        get_session_state(session, self._authorizer).take_pending_events()
+
+    def _trusts_identity_map(self, session: Session) -> bool:
+        # Runs for every loaded object, so check the session class directly instead of warning through check_skip
+        return self._authorizer.trust_identity_map and isinstance(session, AuthorizedSession)
+
+    def after_transaction_end(self, session: Session, transaction: SessionTransaction) -> None:
+        if self._trusts_identity_map(session):
+            # Objects inserted in a rolled back transaction and those of a closed session are expunged without a
+            # detach event
+            self._prune_authorized(session)
+
+    def _authorized_states(self, session: Session) -> WeakSet[InstanceState[Any]]:
+        user = cast(AuthorizedSession, session).user
+        return get_session_state(session, self._authorizer).scope_to(user).authorized_states
+
+    def _prune_authorized(self, session: Session) -> None:
+        authorized_states = self._authorized_states(session)
+        # Garbage collected objects leave both, so only expunged objects make the states outnumber the identity map
+        if len(authorized_states) > len(session.identity_map):
+            authorized_states.intersection_update(session.identity_map.all_states())
+
+    def track_authorized(self, session: Session, instance: Any) -> None:
+        if self._trusts_identity_map(session):
+            self._prune_authorized(session)
+            self._authorized_states(session).add(inspect(instance))
+
+    def untrack_authorized(self, session: Session, instance: Any) -> None:
+        if self._trusts_identity_map(session):
+            self._authorized_states(session).discard(inspect(instance))
 
     def handle_update(self, orm_execute_state: ORMExecuteState) -> None:
         statement = cast(Update, orm_execute_state.statement)
         if "entity" not in statement.entity_description:
             # ORM update
             return
-        conditions, references = extract_references(statement)
+        conditions, references = extract_references(statement, orm_execute_state.parameters)
 
-        parameters = cast(dict[Column[Any], BindParameter[Any]], statement._values)  # type: ignore
+        parameters = cast(dict[Column[Any], BindParameter[Any]], statement._values or {})  # type: ignore
         updated_data: dict[str, Any] = {col.name: parameter.value for col, parameter in parameters.items()}
         for mapped_dict in references.values():
             for referenced_entity in mapped_dict.values():
-                self._pending_events[orm_execute_state.session][None].append(
+                self._pending_events(orm_execute_state.session)[None].append(
                     UpdateManyEvent(referenced_entity, conditions, updated_data)
                 )
 
@@ -171,7 +278,7 @@ class SQLAlchemyAuthHooks:
             return
         reference = get_table_mapper(statement.entity_description["entity"])
         inserted_data = get_insert_columns(statement)
-        self._pending_events[orm_execute_state.session][None].append(
+        self._pending_events(orm_execute_state.session)[None].append(
             CreateManyEvent(ReferencedEntity(reference, statement.table), inserted_data)
         )
 
@@ -180,42 +287,149 @@ class SQLAlchemyAuthHooks:
         if "entity" not in statement.entity_description:
             # ORM delete
             return
-        conditions, references = extract_references(statement)
+        conditions, references = extract_references(statement, orm_execute_state.parameters)
         for mapped_dict in references.values():
             for referenced_entity in mapped_dict.values():
-                self._pending_events[orm_execute_state.session][None].append(
+                self._pending_events(orm_execute_state.session)[None].append(
                     DeleteManyEvent(referenced_entity, conditions)
                 )
 
-    def do_orm_execute(self, orm_execute_state: ORMExecuteState) -> None:
+    def check_result(self, orm_execute_state: ORMExecuteState) -> Result[Any]:
+        """
+        Execute a SELECT unfiltered and drop the rows the handler denies, chunk by chunk as they are fetched.
+
+        Every chunk is authorized, traced and reported to the slow authorization log like a statement of its own.
+        """
+        result = orm_execute_state.invoke_statement()
+        chunk_size = orm_execute_state.execution_options.get("yield_per") or self._authorizer.check_chunk_size
+
+        def rows() -> Iterator[Row[Any]]:
+            try:
+                for partition in result.partitions(chunk_size):
+                    yield from self.authorize_statement(
+                        orm_execute_state, "select", self._authorizer.check_rows, partition
+                    )
+            finally:
+                # Also reached when the handler raises or the checked result is dropped before being exhausted
+                result.close()
+
+        # Closing the checked result closes the unfiltered one along with it
+        return IteratorResult(result._metadata, rows(), raw=result)  # type: ignore
+
+    def authorize_statement(
+        self,
+        orm_execute_state: ORMExecuteState,
+        action: Action,
+        steps: Callable[..., Steps[T]],
+        *args: Any,
+    ) -> T:
+        """
+        Authorize a statement, tracing it and reporting it to the slow authorization log as configured.
+
+        `steps` is called with the execute state followed by `args`.
+        """
+        tracer = self._authorizer.tracer
+        if tracer is None:
+            return self._authorize_statement(orm_execute_state, action, steps, *args)
+        attributes = {"action": action, "mappers": mapper_names(orm_execute_state.all_mappers)}
+        with start_span(tracer, "authorize", attributes):
+            return self._authorize_statement(orm_execute_state, action, steps, *args)
+
+    def _authorize_statement(
+        self,
+        orm_execute_state: ORMExecuteState,
+        action: Action,
+        steps: Callable[..., Steps[T]],
+        *args: Any,
+    ) -> T:
+        if self._slow_log is None:
+            return self.authorize(steps, orm_execute_state, *args)
+        statement = orm_execute_state.statement
+        options = len(statement._with_options)  # type: ignore
+        session_state = get_session_state(orm_execute_state.session, self._authorizer)
+        session_state.handler_seconds = 0.0
+        start = perf_counter()
+        result = self.authorize(steps, orm_execute_state, *args)
+        seconds = perf_counter() - start
+        if seconds >= self._slow_log.threshold:
+            criteria = [
+                option
+                for option in orm_execute_state.statement._with_options[options:]  # type: ignore
+                if isinstance(option, AuthorizationCriteria)
+            ]
+            self._slow_log.observe(
+                SlowAuthorization(
+                    fingerprint=statement_fingerprint(statement),
+                    action=action,
+                    mappers=mapper_names(orm_execute_state.all_mappers),
+                    seconds=seconds,
+                    handler_seconds=session_state.handler_seconds,
+                    criteria=len(criteria),
+                    filter_size=criteria_size(criteria),
+                )
+            )
+        return result
+
+    def do_orm_execute(self, orm_execute_state: ORMExecuteState) -> Result[Any] | None:
         logger.debug("do_orm_execute")
         if check_skip(orm_execute_state.session):
-            return
+            return None
+        if orm_execute_state.is_select and self._authorizer.checks_rows(orm_execute_state):
+            return self.check_result(orm_execute_state)
         if orm_execute_state.is_select:
-            self.call_async(self._authorizer.authorize_select, orm_execute_state)
+            # A returned result replaces execution of the statement
+            return self.authorize_statement(orm_execute_state, "select", self._authorizer.authorize_select)
         elif orm_execute_state.is_update:
-            self.call_async(self._authorizer.authorize_update, orm_execute_state)
+            self.authorize_statement(orm_execute_state, "update", self._authorizer.authorize_update)
             self.handle_update(orm_execute_state)
         elif orm_execute_state.is_insert:
-            self.call_async(self._authorizer.authorize_insert, orm_execute_state)
+            self.authorize_statement(orm_execute_state, "insert", self._authorizer.authorize_insert)
             self.handle_insert(orm_execute_state)
         elif orm_execute_state.is_delete:
-            self.call_async(self._authorizer.authorize_delete, orm_execute_state)
+            self.authorize_statement(orm_execute_state, "delete", self._authorizer.authorize_delete)
             self.handle_delete(orm_execute_state)
         else:
             logger.debug("Unhandled ORM execute type: %s", orm_execute_state)
+        return None
+
 
+# Session events and the hooks' methods listening to them
+_LISTENERS = (
+    ("after_flush", "after_flush"),
+    ("before_flush", "before_flush"),
+    ("after_flush_postexec", "after_flush_postexec"),
+    ("after_commit", "after_commit"),
+    ("after_rollback", "after_rollback"),
+    ("after_transaction_end", "after_transaction_end"),
+    ("do_orm_execute", "do_orm_execute"),
+    ("loaded_as_persistent", "track_authorized"),
+    ("pending_to_persistent", "track_authorized"),
+    ("persistent_to_detached", "untrack_authorized"),
+    ("deleted_to_detached", "untrack_authorized"),
+)
 
-def register_hooks(handler: AuthHandler, post_auth_handler: PostAuthHandler) -> SQLAlchemyAuthHooks:
+
+def register_hooks(
+    handler: AuthHandler | SyncAuthHandler,
+    post_auth_handler: PostAuthHandler,
+    policy: AccessPolicy | None = None,
+    **authorizer_options: Any,
+) -> SQLAlchemyAuthHooks:
     """
     Register hooks for SQLAlchemy ORM events.
+
+    Additional keyword arguments are passed on to `SQLAlchemyAuthHooks` and `StatementAuthorizer`.
     """
 
-    hooks = SQLAlchemyAuthHooks(handler, post_auth_handler)
-    event.listen(Session, "after_flush", hooks.after_flush)
-    event.listen(Session, "before_flush", hooks.before_flush)
-    event.listen(Session, "after_flush_postexec", hooks.after_flush_postexec)
-    event.listen(Session, "after_commit", hooks.after_commit)
-    event.listen(Session, "after_rollback", hooks.after_rollback)
-    event.listen(Session, "do_orm_execute", hooks.do_orm_execute)
+    hooks = SQLAlchemyAuthHooks(handler, post_auth_handler, policy, **authorizer_options)
+    for event_name, method in _LISTENERS:
+        event.listen(Session, event_name, getattr(hooks, method))
     return hooks
+
+
+def unregister_hooks(hooks: SQLAlchemyAuthHooks) -> None:
+    """
+    Remove hooks registered with `register_hooks`.
+    """
+    for event_name, method in _LISTENERS:
+        event.remove(Session, event_name, getattr(hooks, method))
@@ -0,0 +1,130 @@
+from collections.abc import Iterable
+from collections.abc import Set as AbstractSet
+from itertools import product
+from typing import Any, cast
+
+from sqlalchemy import ColumnClause
+from sqlalchemy.sql.operators import and_, eq, in_op, or_
+
+from sqlalchemy_auth_hooks.references import (
+    CompositeCondition,
+    EntityCondition,
+    LiteralExpression,
+    ReferenceCondition,
+    ReferencedEntity,
+)
+
+PrimaryKeys = frozenset[tuple[Any, ...]]
+
+# Upper bound of identities produced from IN lists over composite primary keys
+_MAX_PRODUCT = 10_000
+
+
+def _primary_key_columns(entity: ReferencedEntity) -> list[ColumnClause[Any]] | None:
+    columns: list[ColumnClause[Any]] = []
+    for column in entity.entity.primary_key:
+        corresponding = cast(ColumnClause[Any] | None, entity.selectable.corresponding_column(column))  # type: ignore
+        if corresponding is None:
+            return None
+        columns.append(corresponding)
+    return columns
+
+
+def _column_index(column: Any, columns: list[ColumnClause[Any]]) -> int | None:
+    if not isinstance(column, ColumnClause):
+        return None
+    for index, pk_column in enumerate(columns):
+        if column is pk_column or column.compare(pk_column):
+            return index
+    return None
+
+
+def _column_values(
+    condition: ReferenceCondition, columns: list[ColumnClause[Any]]
+) -> tuple[int, AbstractSet[Any]] | None:
+    """
+    Return the primary key column index and the values it is restricted to by an equality or IN condition.
+    """
+    index = _column_index(condition.left, columns)
+    if index is None or not isinstance(condition.right, LiteralExpression):
+        return None
+    value = condition.right.value
+    try:
+        if condition.operator is eq:
+            return None if value is None else (index, {value})
+        if condition.operator is in_op and isinstance(value, frozenset):
+            return index, value  # type: ignore
+        if condition.operator is in_op and isinstance(value, Iterable) and not isinstance(value, (str, bytes)):
+            return index, set(value)  # type: ignore
+    except TypeError:
+        # Unhashable values cannot form an identity
+        pass
+    return None
+
+
+def _resolve_and(
+    conditions: Iterable[EntityCondition], columns: list[ColumnClause[Any]]
+) -> set[tuple[Any, ...]] | None:
+    per_column: dict[int, AbstractSet[Any]] = {}
+    keys: set[tuple[Any, ...]] | None = None
+    for condition in conditions:
+        column_values = _column_values(condition, columns) if isinstance(condition, ReferenceCondition) else None
+        if column_values is not None:
+            index, values = column_values
+            per_column[index] = per_column[index] & values if index in per_column else values
+            continue
+        resolved = _resolve(condition, columns)
+        if resolved is not None:
+            keys = resolved if keys is None else keys & resolved
+    if len(per_column) == len(columns):
+        sizes = 1
+        for values in per_column.values():
+            sizes *= len(values)
+        if sizes <= _MAX_PRODUCT:
+            combined = set(product(*(per_column[index] for index in range(len(columns)))))
+            return combined if keys is None else keys & combined
+    if keys is None:
+        return None
+    return {key for key in keys if all(key[index] in values for index, values in per_column.items())}
+
+
+def _resolve(condition: EntityCondition, columns: list[ColumnClause[Any]]) -> set[tuple[Any, ...]] | None:
+    if isinstance(condition, ReferenceCondition):
+        column_values = _column_values(condition, columns)
+        if column_values is None or len(columns) != 1:
+            return None
+        return {(value,) for value in column_values[1]}
+    if isinstance(condition, CompositeCondition):
+        if condition.operator is and_:
+            return _resolve_and(condition.conditions, columns)
+        if condition.operator is or_:
+            keys: set[tuple[Any, ...]] = set()
+            for child in condition.conditions:
+                resolved = _resolve(child, columns)
+                if resolved is None:
+                    return None
+                keys |= resolved
+            return keys
+    return None
+
+
+def resolve_primary_keys(entity: ReferencedEntity, condition: EntityCondition | None) -> PrimaryKeys | None:
+    """
+    Return the primary key identities `condition` restricts `entity` to, or `None` if it is not a point lookup.
+
+    Only equality and IN predicates on the primary key columns of the entity's selectable, combined with AND/OR, are
+    recognized. Identities are tuples in mapper primary key order, as used by the session identity map.
+    """
+    if condition is None:
+        return None
+    columns = _primary_key_columns(entity)
+    if not columns:
+        return None
+    keys = _resolve(condition, columns)
+    return None if keys is None else frozenset(keys)
+
+
+def with_primary_keys(
+    entities: Iterable[ReferencedEntity], condition: EntityCondition | None
+) -> list[ReferencedEntity]:
+    return [entity.with_primary_keys(resolve_primary_keys(entity, condition)) for entity in entities]
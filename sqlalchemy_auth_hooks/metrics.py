@@ -0,0 +1,229 @@
+import abc
+import json
+from bisect import bisect_left
+from threading import Lock
+from time import perf_counter
+from types import TracebackType
+from typing import Any, Iterable, Literal
+
+from sqlalchemy.orm import Mapper
+
+from sqlalchemy_auth_hooks.utils import at_fork_in_child
+
+# collect: entities and conditions extracted from a statement
+# handler: `AuthHandler` calls, including iterating their results
+# criteria: filters added to the statement
+# dispatch: hop from the calling thread into the hooks' loop thread
+# post_commit: post authorization events delivered after a commit
+Phase = Literal["collect", "handler", "criteria", "dispatch", "post_commit"]
+
+DEFAULT_BUCKETS = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+)
+
+MetricKey = tuple[str, str, str]
+
+
+def mapper_label(mappers: Iterable[Mapper[Any]]) -> str:
+    return ",".join(sorted({mapper.class_.__name__ for mapper in mappers}))
+
+
+class _Timer:
+    __slots__ = ("recorder", "phase", "action", "mappers", "start")
+
+    def __init__(self, recorder: "MetricsRecorder", phase: Phase, action: str, mappers: Iterable[Mapper[Any]]) -> None:
+        self.recorder = recorder
+        self.phase: Phase = phase
+        self.action = action
+        self.mappers = mappers
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = perf_counter()
+
+    def __exit__(
+        self, _type: type[BaseException] | None, _value: BaseException | None, _traceback: TracebackType | None
+    ) -> None:
+        self.recorder.record(self.phase, self.action, mapper_label(self.mappers), perf_counter() - self.start)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *_: Any) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRecorder(abc.ABC):
+    """
+    Receives durations of the authorization phases, tagged by action and mapper.
+    """
+
+    # Disabled recorders are skipped without reading the clock
+    enabled = True
+
+    @abc.abstractmethod
+    def record(self, phase: Phase, action: str, mapper: str, seconds: float) -> None:
+        raise NotImplementedError  # pragma: no cover
+
+    def time(self, phase: Phase, action: str, mappers: Iterable[Mapper[Any]] = ()) -> _Timer | _NullTimer:
+        """
+        Return a context manager recording the duration of its block.
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, phase, action, mappers)
+
+
+class NullRecorder(MetricsRecorder):
+    """
+    Records nothing, the default.
+    """
+
+    enabled = False
+
+    def record(self, phase: Phase, action: str, mapper: str, seconds: float) -> None:
+        pass
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size: int) -> None:
+        # Observations per bucket, the last one counts those above the largest bound
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+    def copy(self) -> "Histogram":
+        histogram = Histogram(0)
+        histogram.counts = list(self.counts)
+        histogram.sum = self.sum
+        histogram.count = self.count
+        return histogram
+
+
+class HistogramRecorder(MetricsRecorder):
+    """
+    Aggregates durations in memory into fixed bucket histograms per phase, action and mapper.
+    """
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._histograms: dict[MetricKey, Histogram] = {}
+        self._lock = Lock()
+        at_fork_in_child(self._after_fork)
+
+    def _after_fork(self) -> None:
+        self._lock = Lock()
+
+    def record(self, phase: Phase, action: str, mapper: str, seconds: float) -> None:
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._histograms.get((phase, action, mapper))
+            if histogram is None:
+                histogram = self._histograms[phase, action, mapper] = Histogram(len(self.buckets) + 1)
+            histogram.counts[index] += 1
+            histogram.sum += seconds
+            histogram.count += 1
+
+    def snapshot(self) -> dict[MetricKey, Histogram]:
+        """
+        Return a consistent copy of the histograms by (phase, action, mapper).
+        """
+        with self._lock:
+            return {key: histogram.copy() for key, histogram in self._histograms.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+class MetricsExporter(abc.ABC):
+    @abc.abstractmethod
+    def export(self, recorder: HistogramRecorder) -> str:
+        raise NotImplementedError  # pragma: no cover
+
+
+def _cumulative(histogram: Histogram) -> list[int]:
+    cumulative: list[int] = []
+    total = 0
+    for count in histogram.counts:
+        total += count
+        cumulative.append(total)
+    return cumulative
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class PrometheusExporter(MetricsExporter):
+    """
+    Render the histograms in the Prometheus text exposition format.
+    """
+
+    def __init__(self, name: str = "sqlalchemy_auth_hooks_phase_seconds") -> None:
+        self.name = name
+
+    def export(self, recorder: HistogramRecorder) -> str:
+        lines = [
+            f"# HELP {self.name} Duration of authorization phases.",
+            f"# TYPE {self.name} histogram",
+        ]
+        for (phase, action, mapper), histogram in sorted(recorder.snapshot().items()):
+            labels = f'phase="{_escape(phase)}",action="{_escape(action)}",mapper="{_escape(mapper)}"'
+            bounds = [repr(bound) for bound in recorder.buckets] + ["+Inf"]
+            for bound, count in zip(bounds, _cumulative(histogram), strict=True):
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {histogram.sum!r}")
+            lines.append(f"{self.name}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+class JsonExporter(MetricsExporter):
+    """
+    Dump the histograms as a JSON list, with cumulative counts per bucket bound.
+    """
+
+    def export(self, recorder: HistogramRecorder) -> str:
+        return json.dumps(
+            [
+                {
+                    "phase": phase,
+                    "action": action,
+                    "mapper": mapper,
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "buckets": dict(
+                        zip(
+                            [str(bound) for bound in recorder.buckets] + ["+Inf"],
+                            _cumulative(histogram),
+                            strict=True,
+                        )
+                    ),
+                }
+                for (phase, action, mapper), histogram in sorted(recorder.snapshot().items())
+            ]
+        )
@@ -0,0 +1,245 @@
+import operator
+from functools import lru_cache
+from typing import Any, Callable, Iterator
+
+from sqlalchemy import ColumnClause
+from sqlalchemy.sql.operators import (
+    OperatorType,
+    add,
+    and_,
+    concat_op,
+    eq,
+    ge,
+    gt,
+    le,
+    lt,
+    mul,
+    ne,
+    or_,
+    sub,
+    truediv,
+)
+
+from sqlalchemy_auth_hooks.references import (
+    ColumnExpression,
+    CompositeCondition,
+    EntityCondition,
+    Expression,
+    LiteralExpression,
+    NestedExpression,
+    ReferenceCondition,
+    RowsCondition,
+    ValueSet,
+    literal,
+)
+
+# Operators that keep their meaning when the operands are swapped
+_MIRRORED: dict[OperatorType, OperatorType] = {eq: eq, ne: ne, lt: gt, gt: lt, le: ge, ge: le}
+
+_COMPARISONS: dict[OperatorType, Callable[[Any, Any], Any]] = {
+    eq: operator.eq,
+    ne: operator.ne,
+    lt: operator.lt,
+    gt: operator.gt,
+    le: operator.le,
+    ge: operator.ge,
+}
+
+# Modulo is left to the database, the sign of its result differs between Python and SQL
+_ARITHMETIC: dict[OperatorType, Callable[[Any, Any], Any]] = {
+    add: operator.add,
+    sub: operator.sub,
+    mul: operator.mul,
+    truediv: operator.truediv,  # type: ignore
+}
+
+_NUMBER = (int, float)
+
+
+def _numbers(left: Any, right: Any) -> bool:
+    return (
+        isinstance(left, _NUMBER)
+        and isinstance(right, _NUMBER)
+        and not isinstance(left, bool)
+        and not isinstance(right, bool)
+    )
+
+
+_CACHE_SIZE = 1024
+# Trees binding more values than this to an IN parameter bypass the cache
+_CACHED_VALUES_LIMIT = 64
+
+
+class _Constant:
+    """
+    Result of a condition that was folded to a constant truth value.
+    """
+
+    __slots__ = ("value", "condition")
+
+    def __init__(self, value: bool, condition: EntityCondition) -> None:
+        self.value = value
+        self.condition = condition
+
+
+def _fold(op: OperatorType, left: Any, right: Any) -> LiteralExpression | None:
+    if left is None or right is None:
+        # NULL propagates, SQL semantics differ from Python's
+        return None
+    if op is concat_op:
+        return literal(left + right) if isinstance(left, str) and isinstance(right, str) else None
+    fn = _ARITHMETIC.get(op)
+    if fn is None or not _numbers(left, right):
+        return None
+    if op is truediv and isinstance(left, int) and isinstance(right, int):
+        # Integer division truncates in SQL
+        return None
+    try:
+        return literal(fn(left, right))
+    except ArithmeticError:
+        return None
+
+
+def _normalize_expression(expression: Expression | ColumnClause[Any]) -> Expression | ColumnClause[Any]:
+    if not isinstance(expression, (ColumnExpression, NestedExpression)):
+        return expression
+    left = _normalize_expression(expression.left)
+    right = _normalize_expression(expression.right)
+    if isinstance(left, LiteralExpression) and isinstance(right, LiteralExpression):
+        folded = _fold(expression.operator, left.value, right.value)
+        if folded is not None:
+            return folded
+    if left is expression.left and right is expression.right:
+        return expression
+    if isinstance(left, (ColumnClause, LiteralExpression)) and isinstance(right, (ColumnClause, LiteralExpression)):
+        return ColumnExpression(left=left, operator=expression.operator, right=right)
+    return NestedExpression(left=left, operator=expression.operator, right=right)
+
+
+def _normalize_reference(condition: ReferenceCondition) -> ReferenceCondition | _Constant:
+    left = _normalize_expression(condition.left)
+    right = _normalize_expression(condition.right)
+    op = condition.operator
+    if isinstance(left, LiteralExpression) and isinstance(right, LiteralExpression):
+        compare = _COMPARISONS.get(op)
+        # Strings compare by the database's collation, only numbers are compared here
+        if compare is not None and _numbers(left.value, right.value):
+            return _Constant(bool(compare(left.value, right.value)), condition)
+    if not isinstance(left, ColumnClause) and isinstance(right, ColumnClause) and op in _MIRRORED:
+        left, right, op = right, left, _MIRRORED[op]
+    if left is condition.left and right is condition.right and op is condition.operator:
+        return condition
+    return ReferenceCondition(left=left, operator=op, right=right)
+
+
+def _normalize_rows(condition: RowsCondition) -> EntityCondition | _Constant | None:
+    rows: list[EntityCondition] = []
+    for row in condition.conditions:
+        normalized = _normalize(row)
+        if normalized is None or (isinstance(normalized, _Constant) and normalized.value):
+            # A row without restrictions leaves the statement unrestricted
+            return None
+        rows.append(normalized.condition if isinstance(normalized, _Constant) else normalized)
+    return RowsCondition(rows, operator=condition.operator)
+
+
+def _flatten(condition: CompositeCondition) -> Iterator[EntityCondition | _Constant | None]:
+    """
+    Yield the normalized children of `condition`, inlining those of nested conditions with the same operator.
+    """
+    op = condition.operator
+    pending = list(reversed(condition.conditions))
+    while pending:
+        child = pending.pop()
+        if type(child) is CompositeCondition and child.operator is op:
+            # Flatten associative operators
+            pending.extend(reversed(child.conditions))
+            continue
+        normalized = _normalize(child)
+        if type(normalized) is CompositeCondition and normalized.operator is op:
+            pending.extend(reversed(normalized.conditions))
+            continue
+        yield normalized
+
+
+def _normalize_composite(condition: CompositeCondition) -> EntityCondition | _Constant | None:
+    op = condition.operator
+    if op is not and_ and op is not or_:
+        return condition
+    # and_ short-circuits on false, or_ on true
+    absorbing = op is or_
+    seen: set[EntityCondition] = set()
+    children: list[EntityCondition] = []
+    dropped: _Constant | None = None
+    for normalized in _flatten(condition):
+        if normalized is None:
+            # Unrestricted child
+            if absorbing:
+                return None
+        elif isinstance(normalized, _Constant):
+            if normalized.value is absorbing:
+                return normalized
+            dropped = normalized
+        elif normalized not in seen:
+            seen.add(normalized)
+            children.append(normalized)
+    if not children:
+        return dropped
+    if len(children) == 1:
+        return children[0]
+    return CompositeCondition(operator=op, conditions=children)
+
+
+def _normalize(condition: EntityCondition) -> EntityCondition | _Constant | None:
+    if isinstance(condition, RowsCondition):
+        return _normalize_rows(condition)
+    if isinstance(condition, CompositeCondition):
+        return _normalize_composite(condition)
+    if isinstance(condition, ReferenceCondition):
+        return _normalize_reference(condition)
+    return condition
+
+
+def _resolve(normalized: EntityCondition | _Constant | None) -> EntityCondition | None:
+    if isinstance(normalized, _Constant):
+        # Always true conditions do not restrict anything, always false ones are kept as they came
+        return None if normalized.value else normalized.condition
+    return normalized
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _normalize_cached(condition: EntityCondition) -> EntityCondition | None:
+    return _resolve(_normalize(condition))
+
+
+def _large_values(expression: Expression | ColumnClause[Any]) -> bool:
+    return (
+        isinstance(expression, LiteralExpression)
+        and isinstance(expression.value, ValueSet)
+        and len(expression.value) > _CACHED_VALUES_LIMIT
+    )
+
+
+def _cacheable(condition: EntityCondition) -> bool:
+    if isinstance(condition, CompositeCondition):
+        return all(_cacheable(child) for child in condition.conditions)
+    if isinstance(condition, ReferenceCondition):
+        return not _large_values(condition.left) and not _large_values(condition.right)
+    return True
+
+
+def normalize_condition(condition: EntityCondition | None) -> EntityCondition | None:
+    """
+    Bring an extracted condition tree into a canonical form.
+
+    Associative AND/OR operators are flattened, duplicate predicates removed, constant expressions folded,
+    tautologies dropped and column operands moved to the left side of comparisons. Results are cached by the
+    structural key of the input tree, so repeated statements are only normalized once. Single predicates, which
+    mostly differ by their literal between statements, and trees binding large IN value sets, which cache entries
+    would keep alive, are normalized on every call.
+    """
+    if condition is None:
+        return None
+    if isinstance(condition, ReferenceCondition) or not _cacheable(condition):
+        return _resolve(_normalize(condition))
+    return _normalize_cached(condition)
@@ -34,8 +34,9 @@ def default_polar_model_name(model: type[Any]) -> str:
 
 
 def null_query(session: Session, model: type[_OT]) -> Query[_OT]:
-    """Return an intentionally empty query."""
-    # TODO (dhatch): Make this not hit the database.
+    """Return an intentionally empty query.
+
+    Sessions with registered hooks answer it without a database round trip."""
     return session.query(model).filter(sql.false())
 
 
@@ -57,6 +58,18 @@ def register_models(oso: Oso, base_or_registry: registry | type[Any]) -> None:
             ) from e
 
 
+def _get_field_type(model: type[Any], field: str) -> type[Any]:
+    try:
+        model_field = cast(InstrumentedAttribute[Any], getattr(model, field))
+    except AttributeError as e:
+        raise PolarRuntimeError(f"Cannot get property {field} on {model}.") from e
+
+    try:
+        return model_field.entity.class_
+    except AttributeError as e:
+        raise PolarRuntimeError(f"Cannot determine type of {field} on {model}.") from e
+
+
 def authorize_model(
     oso: Oso, actor: object, action: str, session: Session, model: type[Any]
 ) -> ColumnElement[Any] | None:
@@ -73,18 +86,9 @@ def authorize_model(
     :param model: The model to authorize, must be a SQLAlchemy model or alias.
     """
 
-    def get_field_type(model: type[Any], field: str) -> type[Any]:
-        try:
-            model_field = cast(InstrumentedAttribute[Any], getattr(model, field))
-        except AttributeError as e:
-            raise PolarRuntimeError(f"Cannot get property {field} on {model}.") from e
-
-        try:
-            return model_field.entity.class_
-        except AttributeError as e:
-            raise PolarRuntimeError(f"Cannot determine type of {field} on {model}.") from e
-
-    oso.host.get_field = get_field_type
+    if oso.host.get_field is not _get_field_type:
+        # Set once instead of on every call, queries copy the host and concurrent callers share it
+        oso.host.get_field = _get_field_type
 
     try:
         mapped_class = inspect(model, raiseerr=True).class_
@@ -13,7 +13,7 @@ Convert expressions from oso into a format that the SQLAlchemy translation can u
 """
 
 from collections import defaultdict
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterator, List, Optional, Union
 
 from polar.exceptions import UnsupportedError
 from polar.expression import Expression
@@ -94,16 +94,21 @@ def sub_this(variable: Variable, expression: Expression) -> Expression:
 
 def sub_var(variable: Variable, value: Expression | Variable, expression: Expression) -> Expression:
     """Substitute ``value`` for ``variable`` in ``expression``."""
-    new_expr = []
-    for arg in expression.args:
-        if isinstance(arg, Expression):
-            arg = sub_var(variable, value, arg)
-        elif arg == variable:
-            arg = value
-
-        new_expr.append(arg)  # type: ignore
-
-    return Expression(expression.operator, new_expr)
+    # Rebuild the expression bottom-up using an explicit stack of (expression, remaining args, new args)
+    stack: list[tuple[Expression, Iterator[object], list[object]]] = [(expression, iter(expression.args), [])]
+    while True:
+        current, args, new_args = stack[-1]
+        for arg in args:
+            if isinstance(arg, Expression):
+                stack.append((arg, iter(arg.args), []))
+                break
+            new_args.append(value if arg == variable else arg)
+        else:
+            stack.pop()
+            new_expr = Expression(current.operator, new_args)
+            if not stack:
+                return new_expr
+            stack[-1][2].append(new_expr)
 
 
 def preprocess_leaf(expression: Expression, variables: TGroupedExpressions) -> Optional[Expression]:
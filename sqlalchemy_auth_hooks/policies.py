@@ -0,0 +1,85 @@
+from threading import Lock
+from typing import Any, Iterable, get_args
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Mapper
+
+from sqlalchemy_auth_hooks.auth_handler import Action
+from sqlalchemy_auth_hooks.utils import at_fork_in_child
+
+ACTIONS: frozenset[Action] = frozenset(get_args(Action))
+
+# Class attribute with a declarative policy, i.e. `__auth_hooks__ = {"select": "public"}`
+POLICY_ATTRIBUTE = "__auth_hooks__"
+
+_POLICIES = ("public", "checked")
+
+
+def _validate_actions(actions: Iterable[str]) -> frozenset[Action]:
+    actions = frozenset(actions)
+    unknown = actions - ACTIONS
+    if unknown:
+        raise ValueError(f"Unknown actions {sorted(unknown)}, expected any of {sorted(ACTIONS)}")
+    return actions  # type: ignore
+
+
+def _declared_public(mapper: Mapper[Any]) -> frozenset[Action]:
+    declared: dict[str, str] | None = getattr(mapper.class_, POLICY_ATTRIBUTE, None)
+    if not declared:
+        return frozenset()
+    for action, policy in declared.items():
+        if policy not in _POLICIES:
+            raise ValueError(f"Unknown policy {policy!r} for {action!r} on {mapper}, expected any of {_POLICIES}")
+    return _validate_actions(action for action, policy in declared.items() if policy == "public")
+
+
+class AccessPolicy:
+    """
+    Per-mapper opt-out of authorization for lookup and reference tables.
+
+    Public actions are declared on the mapped class with `__auth_hooks__ = {"select": "public"}` or registered with
+    `set_public`. Entities are not passed to the handler for their public actions, and statements touching only public
+    entities are not authorized at all.
+    """
+
+    def __init__(self) -> None:
+        self._explicit: dict[Mapper[Any], frozenset[Action]] = {}
+        # Resolved public actions per mapper, filled on first lookup
+        self._public: dict[Mapper[Any], frozenset[Action]] = {}
+        # Keeps a lookup racing with `set_public` from caching the previous answer
+        self._lock = Lock()
+        at_fork_in_child(self._after_fork)
+
+    def _after_fork(self) -> None:
+        self._lock = Lock()
+
+    def set_public(self, entity: Any, *actions: Action) -> None:
+        """
+        Make `actions` (all of them if none are given) on `entity` public, in addition to the declared ones.
+        """
+        mapper: Mapper[Any] = inspect(entity).mapper
+        added = _validate_actions(actions) if actions else ACTIONS
+        with self._lock:
+            self._explicit[mapper] = self._explicit.get(mapper, frozenset()) | added
+            self._public.clear()
+
+    def public_actions(self, mapper: Mapper[Any]) -> frozenset[Action]:
+        public = self._public.get(mapper)
+        if public is None:
+            with self._lock:
+                public = self._public[mapper] = _declared_public(mapper) | self._explicit.get(mapper, frozenset())
+        return public
+
+    def is_public(self, mapper: Mapper[Any], action: Action) -> bool:
+        return action in self.public_actions(mapper)
+
+    def all_public(self, mappers: Iterable[Mapper[Any]], action: Action) -> bool:
+        """
+        Check whether `action` is public on all `mappers`, there has to be at least one.
+        """
+        found = False
+        for mapper in mappers:
+            if not self.is_public(mapper, action):
+                return False
+            found = True
+        return found
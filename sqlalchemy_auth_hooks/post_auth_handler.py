@@ -1,6 +1,7 @@
 import abc
 from typing import Any
 
+from sqlalchemy_auth_hooks.changeset import Changeset
 from sqlalchemy_auth_hooks.references import EntityCondition, ReferencedEntity
 from sqlalchemy_auth_hooks.session import AuthorizedSession
 
@@ -10,10 +11,20 @@ class PostAuthHandler(abc.ABC):
     Abstract class with post authorization callbacks (i.e. for update propagation)
     """
 
+    async def after_commit_batch(self, session: AuthorizedSession, changeset: Changeset) -> None:
+        """
+        Handle all changes of a committed transaction at once, grouped by mapper.
+
+        Optional, handlers overriding it receive a single call per commit instead of the per-event methods below.
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     async def after_single_insert(self, session: AuthorizedSession, instance: Any) -> None:
         """
         Handle the creation of an SQLAlchemy model.
+
+        `instance` is `None` if the object was no longer referenced when the transaction was committed.
         """
         raise NotImplementedError
 
@@ -21,13 +32,18 @@ class PostAuthHandler(abc.ABC):
     async def after_single_delete(self, session: AuthorizedSession, instance: Any) -> None:
         """
         Handle the deletion of an SQLAlchemy model.
+
+        `instance` is `None` if the object was no longer referenced when the transaction was committed.
         """
         raise NotImplementedError
 
     @abc.abstractmethod
     async def after_single_update(self, session: AuthorizedSession, instance: Any, changes: dict[str, Any]) -> None:
         """
-        Handle the deletion of an SQLAlchemy model.
+        Handle the update of an SQLAlchemy model.
+
+        Changed relationships are given as the primary key of the related object. `instance` is `None` if the object was
+        no longer referenced when the transaction was committed.
         """
         raise NotImplementedError
 
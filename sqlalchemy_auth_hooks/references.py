@@ -1,149 +1,321 @@
 import abc
-from typing import Any
+from typing import Any, ClassVar, Hashable, Iterable, TypeVar
 
-from sqlalchemy import ColumnClause, ReturnsRows
+from sqlalchemy import ClauseElement, ColumnClause, ReturnsRows
 from sqlalchemy.orm import Mapper
-from sqlalchemy.sql.operators import OperatorType
+from sqlalchemy.sql.operators import OperatorType, or_
 
+_INTERNED_LITERAL_TYPES = (type(None), bool, int, float, str)
+
+
+class ValueSet(frozenset[Any]):
+    """
+    Immutable set of the values bound to an expanding (IN) parameter.
+
+    Being a `frozenset`, it supports constant time `len` and membership tests, its hash is computed once, and
+    `intersection` with a set of allowed values iterates only over the smaller of the two.
+    """
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return f"ValueSet({list(self)!r})"
+
+
+def _operand_key(value: Any) -> Hashable:
+    """
+    Return a hashable key consistent with `_cmp_operands` for a node operand.
+    """
+    if isinstance(value, frozenset):
+        # Hashed in place, frozensets cache their own hash
+        return value  # type: ignore
+    if isinstance(value, ColumnClause):
+        table = value.table
+        return "column", getattr(table, "name", None) if table is not None else None, value.name
+    if isinstance(value, ClauseElement):
+        # Arbitrary clauses are compared structurally, so only their type is stable enough to hash
+        return "clause", type(value).__name__
+    if isinstance(value, (list, tuple)):
+        return tuple(_operand_key(item) for item in value)  # type: ignore
+    if isinstance(value, set):
+        return frozenset(_operand_key(item) for item in value)  # type: ignore
+    if isinstance(value, dict):
+        return frozenset((k, _operand_key(v)) for k, v in value.items())  # type: ignore
+    if isinstance(value, _INTERNED_LITERAL_TYPES):
+        # Keep True, 1 and 1.0 apart, handlers see the type of literals
+        return type(value), value
+    try:
+        hash(value)
+    except TypeError:
+        return "unhashable", type(value).__name__, repr(value)
+    return value  # type: ignore
+
+
+def _cmp_operands(left: Any, right: Any) -> bool:
+    if isinstance(left, ClauseElement):
+        return isinstance(right, ClauseElement) and left.compare(right)
+    if isinstance(right, ClauseElement):
+        return False
+    if isinstance(left, _INTERNED_LITERAL_TYPES) and type(left) is not type(right):
+        return False
+    if isinstance(left, (list, tuple)) and isinstance(right, (list, tuple)):
+        return len(left) == len(right) and all(  # type: ignore
+            _cmp_operands(a, b) for a, b in zip(left, right, strict=True)  # type: ignore
+        )
+    return bool(left == right)
+
+
+class Node:
+    """
+    Immutable base for reference and condition nodes.
+
+    Equality and hashing are structural, so nodes can be deduplicated and used as cache keys.
+    """
+
+    __slots__ = ("_hash",)
+
+    _fields: ClassVar[tuple[str, ...]] = ()
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, key: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def _set(self, **values: Any) -> None:
+        for key, value in values.items():
+            object.__setattr__(self, key, value)
+
+    def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
+        if type(other) is not type(self):
+            return NotImplemented
+        if hash(self) != hash(other):
+            return False
+        return all(_cmp_operands(getattr(self, f), getattr(other, f)) for f in self._fields)
+
+    def __hash__(self) -> int:
+        try:
+            return self._hash  # type: ignore
+        except AttributeError:
+            value = hash((type(self).__name__, *(_operand_key(getattr(self, f)) for f in self._fields)))
+            object.__setattr__(self, "_hash", value)
+            return value
+
+    def __copy__(self) -> "Node":
+        return self
+
+    def __deepcopy__(self, _memo: dict[int, Any]) -> "Node":
+        return self
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return type(self), tuple(getattr(self, f) for f in self._fields)
+
+
+_N = TypeVar("_N", bound=Node)
+
+_INTERN_LIMIT = 4096
+_interned: dict[Node, Node] = {}
+
+
+def intern_node(node: _N) -> _N:
+    """
+    Return the canonical instance structurally equal to `node`, registering it if it is the first one.
+
+    The table is bounded and simply reset once full, so interning never grows without limit. Concurrent callers may
+    race to register equal nodes, which only costs a missed deduplication.
+    """
+    interned = _interned.get(node)
+    if interned is not None:
+        return interned  # type: ignore
+    if len(_interned) >= _INTERN_LIMIT:
+        _interned.clear()
+    _interned[node] = node
+    return node
+
+
+class ReferencedEntity(Node):
+    """
+    A mapped entity referenced by a statement through `selectable`.
+
+    `primary_keys` holds the identities the statement is restricted to when its conditions are a primary key
+    lookup (equality or IN), in mapper primary key order, and is `None` otherwise. It is derived data and does not
+    take part in equality or hashing.
+    """
+
+    __slots__ = ("entity", "selectable", "primary_keys")
+
+    _fields = ("entity", "selectable")
+
+    entity: Mapper[Any]
+    selectable: ReturnsRows
+    primary_keys: frozenset[tuple[Any, ...]] | None
 
-class ReferencedEntity:
     def __init__(
         self,
         entity: Mapper[Any],
         selectable: ReturnsRows,
+        primary_keys: frozenset[tuple[Any, ...]] | None = None,
     ) -> None:
-        self.entity = entity
-        self.selectable = selectable
+        self._set(entity=entity, selectable=selectable, primary_keys=primary_keys)
+
+    def with_primary_keys(self, primary_keys: frozenset[tuple[Any, ...]] | None) -> "ReferencedEntity":
+        if primary_keys == self.primary_keys:
+            return self
+        return ReferencedEntity(self.entity, self.selectable, primary_keys)
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, ReferencedEntity):
-            raise NotImplementedError(f"Cannot compare {self} with {other}")
-        return self.entity == other.entity and self.selectable == other.selectable
+            return NotImplemented
+        # Annotated selectables compare (and hash) equal to the selectable they annotate
+        return bool(self.entity == other.entity and self.selectable == other.selectable)
+
+    def __hash__(self) -> int:
+        return hash((self.entity, self.selectable))
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return type(self), (self.entity, self.selectable, self.primary_keys)
 
     def __repr__(self) -> str:
         return f"ReferencedEntity(entity={self.entity}, selectable={repr(self.selectable)})"  # pragma: no cover
 
 
-class EntityCondition:
+class EntityCondition(Node):
+    __slots__ = ("operator",)
+
+    operator: OperatorType
+
     def __init__(self, operator: OperatorType) -> None:
-        self.operator = operator
+        self._set(operator=operator)
 
 
 class UnaryCondition(EntityCondition):
+    __slots__ = ("value",)
+
+    _fields = ("operator", "value")
+
+    value: Any
+
     def __init__(self, operator: OperatorType, value: Any) -> None:
         super().__init__(operator)
-        self.value = value
-
-    def __eq__(self, other: object) -> bool:
-        return (
-            self.operator == other.operator and self.value == other.value
-            if isinstance(other, UnaryCondition)
-            else False
-        )
+        self._set(value=value)
 
     def __repr__(self) -> str:
         return f"UnaryCondition(operator={self.operator.__name__}, value={self.value})"
 
 
 class CompositeCondition(EntityCondition):
-    def __init__(self, operator: OperatorType, conditions: list[EntityCondition]) -> None:
+    __slots__ = ("conditions",)
+
+    _fields = ("operator", "conditions")
+
+    conditions: tuple[EntityCondition, ...]
+
+    def __init__(self, operator: OperatorType, conditions: Iterable[EntityCondition]) -> None:
         super().__init__(operator)
-        self.conditions = conditions
+        self._set(conditions=tuple(conditions))
 
-    def __eq__(self, other: object) -> bool:
-        return (
-            self.conditions == other.conditions and self.operator == other.operator
-            if isinstance(other, CompositeCondition)
-            else False
-        )
+    def __repr__(self) -> str:
+        return f"CompositeCondition(operator={self.operator.__name__}, conditions={list(self.conditions)})"  # pragma: no cover
+
+
+class RowsCondition(CompositeCondition):
+    """
+    Disjunction of per-row conditions extracted from an executemany parameter set, in row order.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, conditions: Iterable[EntityCondition], operator: OperatorType = or_) -> None:
+        super().__init__(operator, conditions)
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return type(self), (self.conditions, self.operator)
 
     def __repr__(self) -> str:
-        return (
-            f"CompositeCondition(operator={self.operator.__name__}, conditions={self.conditions})"  # pragma: no cover
-        )
+        return f"RowsCondition(conditions={list(self.conditions)})"  # pragma: no cover
 
 
-class Expression(abc.ABC):
-    @abc.abstractmethod
-    def __eq__(self, other: object) -> bool:
-        ...
+class Expression(Node, abc.ABC):
+    __slots__ = ()
 
 
 class LiteralExpression(Expression):
-    def __init__(self, value: Any) -> None:
-        self.value = value
+    __slots__ = ("value",)
 
-    def __eq__(self, other: object) -> bool:
-        return self.value == other.value if isinstance(other, LiteralExpression) else False
+    _fields = ("value",)
+
+    value: Any
+
+    def __init__(self, value: Any) -> None:
+        self._set(value=value)
 
     def __repr__(self) -> str:
         return f"LiteralExpression(value={self.value})"
 
 
 class ColumnExpression(Expression):
+    __slots__ = ("left", "operator", "right")
+
+    _fields = ("left", "operator", "right")
+
+    left: ColumnClause[Any] | LiteralExpression
+    operator: OperatorType
+    right: ColumnClause[Any] | LiteralExpression
+
     def __init__(
         self,
         left: ColumnClause[Any] | LiteralExpression,
         operator: OperatorType,
         right: ColumnClause[Any] | LiteralExpression,
     ) -> None:
-        self.left = left
-        self.operator = operator
-        self.right = right
-
-    def __eq__(self, other: object) -> bool:
-        return (
-            isinstance(other, ColumnExpression)
-            and _cmp_expressions(self.left, other.left)
-            and _cmp_expressions(self.right, other.right)
-            and self.operator == other.operator
-        )
+        self._set(left=left, operator=operator, right=right)
 
     def __repr__(self) -> str:
         return f"Expression(left={self.left}, operator={self.operator.__name__}, right={self.right})"
 
 
 class NestedExpression(Expression):
+    __slots__ = ("left", "operator", "right")
+
+    _fields = ("left", "operator", "right")
+
+    left: Expression | ColumnClause[Any]
+    operator: OperatorType
+    right: Expression | ColumnClause[Any]
+
     def __init__(
         self, left: Expression | ColumnClause[Any], operator: OperatorType, right: Expression | ColumnClause[Any]
     ) -> None:
-        self.left = left
-        self.operator = operator
-        self.right = right
-
-    def __eq__(self, other: object) -> bool:
-        return (
-            isinstance(other, NestedExpression)
-            and _cmp_expressions(self.left, other.left)
-            and _cmp_expressions(self.right, other.right)
-            and self.operator == other.operator
-        )
+        self._set(left=left, operator=operator, right=right)
 
     def __repr__(self) -> str:
         return f"NestedExpression(left={self.left}, operator={self.operator.__name__}, right={self.right})"
 
 
 class ReferenceCondition(EntityCondition):
+    __slots__ = ("left", "right")
+
+    _fields = ("left", "operator", "right")
+
+    left: Expression | ColumnClause[Any]
+    right: Expression | ColumnClause[Any]
+
     def __init__(
         self, left: Expression | ColumnClause[Any], operator: OperatorType, right: Expression | ColumnClause[Any]
     ) -> None:
         super().__init__(operator)
-        self.left = left
-        self.right = right
-
-    def __eq__(self, other: object) -> bool:
-        return (
-            isinstance(other, ReferenceCondition)
-            and _cmp_expressions(self.left, other.left)
-            and _cmp_expressions(self.right, other.right)
-            and self.operator == other.operator
-        )
+        self._set(left=left, right=right)
 
     def __repr__(self) -> str:
         return f"ReferenceCondition(left={self.left}, operator={self.operator.__name__}, right={self.right})"
 
 
-def _cmp_expressions(left: Expression | ColumnClause[Any], right: Expression | ColumnClause[Any]) -> bool:
-    if not isinstance(left, ColumnClause):
-        return left == right
-    return left.compare(right) if isinstance(right, ColumnClause) else False
+def literal(value: Any) -> LiteralExpression:
+    """
+    Create a `LiteralExpression`, sharing a single instance for common scalar values.
+    """
+    if isinstance(value, _INTERNED_LITERAL_TYPES):
+        return intern_node(LiteralExpression(value))
+    return LiteralExpression(value)
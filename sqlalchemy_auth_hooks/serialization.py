@@ -0,0 +1,431 @@
+"""
+Compact wire format for referenced entities and extracted conditions.
+
+Decisions (a list of referenced entities with the condition restricting them) are encoded into a payload made of
+JSON compatible values only:
+
+    {
+        "v": 2,
+        "nodes": [...],      # node table, every distinct subtree is stored once
+        "decisions": [...],  # [[entity, ...], condition node index or None]
+    }
+
+Nodes are lists starting with a tag and reference other nodes by their index in the node table. Columns are
+referenced as ``"schema.table.column"`` and entities as ``[module.ClassName, "schema.table", primary keys]``, the
+schema being left out for tables without one, so no SQLAlchemy objects are needed to read a payload. The payload can
+be dumped as JSON or in a compact binary format.
+"""
+import datetime
+import decimal
+import json
+import struct
+import uuid
+from typing import Any, Callable, Iterable, Sequence, cast
+
+from sqlalchemy import ColumnClause, column, table
+from sqlalchemy.orm import Mapper, registry
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.operators import OperatorType
+
+from sqlalchemy_auth_hooks.references import (
+    ColumnExpression,
+    CompositeCondition,
+    EntityCondition,
+    LiteralExpression,
+    NestedExpression,
+    Node,
+    ReferenceCondition,
+    ReferencedEntity,
+    RowsCondition,
+    UnaryCondition,
+    ValueSet,
+)
+
+FORMAT_VERSION = 2
+
+Decision = tuple[Sequence[ReferencedEntity], EntityCondition | None]
+
+_OPERATORS: dict[str, OperatorType] = {
+    name: cast(OperatorType, value)
+    for name, value in vars(operators).items()
+    if callable(value)
+    and not isinstance(value, type)
+    and getattr(value, "__module__", None) in (operators.__name__, "_operator", "operator")
+}
+
+
+class SerializationError(ValueError):
+    pass
+
+
+def _operator_name(operator: OperatorType) -> str:
+    name = operator.__name__
+    if _OPERATORS.get(name) is not operator:
+        raise SerializationError(f"Cannot serialize operator {operator}")
+    return name
+
+
+def _table_name(selectable: Any) -> str | None:
+    # Tables are qualified by their schema, aliases only have a name
+    return getattr(selectable, "fullname", None) or getattr(selectable, "name", None)
+
+
+def _class_name(class_: type) -> str:
+    return f"{class_.__module__}.{class_.__qualname__}"
+
+
+def _column_name(col: ColumnClause[Any]) -> str:
+    return f"{_table_name(col.table)}.{col.name}" if col.table is not None else col.name  # type: ignore
+
+
+# Encoders of non JSON values by type, checked in order as subclasses come before their bases
+_VALUE_ENCODERS: tuple[tuple[type, str, Callable[[Any], Any]], ...] = (
+    (ValueSet, "set", lambda v: [_encode_value(item) for item in v]),
+    (list, "list", lambda v: [_encode_value(item) for item in v]),
+    (tuple, "tuple", lambda v: [_encode_value(item) for item in v]),
+    (datetime.datetime, "datetime", datetime.datetime.isoformat),
+    (datetime.date, "date", datetime.date.isoformat),
+    (datetime.time, "time", datetime.time.isoformat),
+    (decimal.Decimal, "decimal", str),
+    (uuid.UUID, "uuid", str),
+    (bytes, "bytes", bytes.hex),
+)
+
+
+def _encode_value(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    for value_type, tag, encode in _VALUE_ENCODERS:
+        if isinstance(value, value_type):
+            return {"t": tag, "v": encode(value)}
+    raise SerializationError(f"Cannot serialize value of type {type(value).__name__}")
+
+
+_VALUE_DECODERS: dict[str, Callable[[Any], Any]] = {
+    "set": lambda v: ValueSet(_decode_value(item) for item in v),
+    "list": lambda v: [_decode_value(item) for item in v],
+    "tuple": lambda v: tuple(_decode_value(item) for item in v),
+    "datetime": datetime.datetime.fromisoformat,
+    "date": datetime.date.fromisoformat,
+    "time": datetime.time.fromisoformat,
+    "decimal": decimal.Decimal,
+    "uuid": uuid.UUID,
+    "bytes": bytes.fromhex,
+}
+
+
+def _decode_value(value: Any) -> Any:
+    if not isinstance(value, dict):
+        return value
+    try:
+        return _VALUE_DECODERS[value["t"]](value["v"])  # type: ignore
+    except KeyError as e:
+        raise SerializationError(f"Unknown value encoding {value}") from e
+
+
+class _Encoder:
+    def __init__(self) -> None:
+        self.nodes: list[list[Any]] = []
+        self._nodes: dict[Node, int] = {}
+        self._columns: dict[str, int] = {}
+
+    def _add(self, encoded: list[Any]) -> int:
+        self.nodes.append(encoded)
+        return len(self.nodes) - 1
+
+    def operand(self, operand: Any) -> int:
+        if isinstance(operand, ColumnClause):
+            name = _column_name(operand)  # type: ignore
+            if name not in self._columns:
+                self._columns[name] = self._add(["col", name])
+            return self._columns[name]
+        if isinstance(operand, Node):
+            return self.node(operand)
+        raise SerializationError(f"Cannot serialize operand {operand!r}")
+
+    def node(self, node: Node) -> int:
+        # Children are encoded first, so a node only references lower indexes
+        index = self._nodes.get(node)
+        if index is not None:
+            return index
+        if isinstance(node, LiteralExpression):
+            encoded = ["lit", _encode_value(node.value)]
+        elif isinstance(node, (ColumnExpression, NestedExpression, ReferenceCondition)):
+            tag = {ColumnExpression: "colexp", NestedExpression: "nested", ReferenceCondition: "ref"}[type(node)]
+            encoded = [tag, self.operand(node.left), _operator_name(node.operator), self.operand(node.right)]
+        elif isinstance(node, CompositeCondition):
+            tag = "rows" if isinstance(node, RowsCondition) else "and_or"
+            encoded = [tag, _operator_name(node.operator), [self.node(child) for child in node.conditions]]
+        elif isinstance(node, UnaryCondition):
+            if not isinstance(node.value, ColumnClause):
+                raise SerializationError(f"Cannot serialize unary condition over {node.value!r}")
+            encoded = ["unary", _operator_name(node.operator), self.operand(node.value)]  # type: ignore
+        else:
+            raise SerializationError(f"Cannot serialize {node!r}")
+        index = self._add(encoded)
+        self._nodes[node] = index
+        return index
+
+    def entity(self, entity: ReferencedEntity) -> list[Any]:
+        keys = None
+        if entity.primary_keys is not None:
+            keys = [[_encode_value(value) for value in key] for key in entity.primary_keys]
+        return [_class_name(entity.entity.class_), _table_name(entity.selectable), keys]
+
+
+def to_payload(decisions: Iterable[Decision]) -> dict[str, Any]:
+    """
+    Encode decisions into a JSON compatible payload sharing one node table.
+    """
+    encoder = _Encoder()
+    encoded = [
+        [
+            [encoder.entity(entity) for entity in entities],
+            encoder.node(condition) if condition is not None else None,
+        ]
+        for entities, condition in decisions
+    ]
+    return {"v": FORMAT_VERSION, "nodes": encoder.nodes, "decisions": encoded}
+
+
+class _Decoder:
+    def __init__(self, mapper_registry: registry) -> None:
+        self.mappers: dict[str, Mapper[Any]] = {}
+        self.tables: dict[str, Any] = {}
+        for mapper in mapper_registry.mappers:
+            self.mappers[_class_name(mapper.class_)] = mapper
+            # Keys of the metadata's tables are qualified by their schema
+            self.tables.update(mapper.local_table.metadata.tables)  # type: ignore
+
+    def column(self, name: str) -> ColumnClause[Any]:
+        table_name, _, column_name = name.rpartition(".")
+        known = self.tables.get(table_name)
+        if known is not None and column_name in known.c:
+            return known.c[column_name]
+        if not table_name:
+            return column(column_name)
+        # Aliases and unknown tables are represented by lightweight clauses
+        schema, _, name = table_name.rpartition(".")
+        return table(name, column(column_name), schema=schema or None).c[column_name]
+
+    def entity(self, encoded: list[Any]) -> ReferencedEntity:
+        class_name, table_name, keys = encoded
+        try:
+            mapper = self.mappers[class_name]
+        except KeyError as e:
+            raise SerializationError(f"Unknown entity {class_name}") from e
+        selectable = self.tables.get(table_name, mapper.local_table)
+        primary_keys = None
+        if keys is not None:
+            primary_keys = frozenset(tuple(_decode_value(value) for value in key) for key in keys)
+        return ReferencedEntity(mapper, selectable, primary_keys)
+
+    def nodes(self, encoded_nodes: list[list[Any]]) -> list[Any]:
+        nodes: list[Any] = []
+        for encoded in encoded_nodes:
+            tag = encoded[0]
+            if tag == "col":
+                nodes.append(self.column(encoded[1]))
+            elif tag == "lit":
+                nodes.append(LiteralExpression(_decode_value(encoded[1])))
+            elif tag in ("colexp", "nested", "ref"):
+                node_type = {"colexp": ColumnExpression, "nested": NestedExpression, "ref": ReferenceCondition}[tag]
+                nodes.append(node_type(_node(nodes, encoded[1]), _operator(encoded[2]), _node(nodes, encoded[3])))
+            elif tag == "and_or":
+                nodes.append(CompositeCondition(_operator(encoded[1]), [_node(nodes, child) for child in encoded[2]]))
+            elif tag == "rows":
+                nodes.append(RowsCondition([_node(nodes, child) for child in encoded[2]], _operator(encoded[1])))
+            elif tag == "unary":
+                nodes.append(UnaryCondition(_operator(encoded[1]), _node(nodes, encoded[2])))
+            else:
+                raise SerializationError(f"Unknown node {tag}")
+        return nodes
+
+
+def _node(nodes: list[Any], index: Any) -> Any:
+    # Nodes only reference nodes before them, negative indexes would silently count from the end
+    if type(index) is not int or not 0 <= index < len(nodes):
+        raise SerializationError(f"Invalid node reference {index!r}")
+    return nodes[index]
+
+
+def _operator(name: str) -> OperatorType:
+    try:
+        return _OPERATORS[name]
+    except KeyError as e:
+        raise SerializationError(f"Unknown operator {name}") from e
+
+
+def _check_payload(payload: Any) -> None:
+    if not isinstance(payload, dict):
+        raise SerializationError(f"Payload must be an object, not {type(payload).__name__}")
+    payload = cast(dict[str, Any], payload)
+    if payload.get("v") != FORMAT_VERSION:
+        raise SerializationError(f"Unsupported payload version {payload.get('v')}")
+    nodes, decisions = payload.get("nodes"), payload.get("decisions")
+    if not isinstance(nodes, list) or not all(isinstance(node, list) and node != [] for node in cast(list[Any], nodes)):
+        raise SerializationError("Payload nodes must be a list of nodes")
+    if not isinstance(decisions, list) or not all(
+        isinstance(decision, list) and len(cast(list[Any], decision)) == 2 and isinstance(decision[0], list)
+        for decision in cast(list[Any], decisions)
+    ):
+        raise SerializationError("Payload decisions must be a list of [entities, condition] pairs")
+
+
+def from_payload(payload: dict[str, Any], mapper_registry: registry) -> list[Decision]:
+    """
+    Decode a payload produced by `to_payload`, resolving entities and columns against `mapper_registry`.
+    """
+    _check_payload(payload)
+    decoder = _Decoder(mapper_registry)
+    try:
+        nodes = decoder.nodes(payload["nodes"])
+        decisions: list[Decision] = []
+        for entities, condition in payload["decisions"]:
+            decisions.append(
+                (
+                    [decoder.entity(entity) for entity in entities],
+                    _node(nodes, condition) if condition is not None else None,
+                )
+            )
+    except SerializationError:
+        raise
+    except (IndexError, TypeError, ValueError) as e:
+        # Nodes or entities of the wrong shape, or references to nodes out of the table
+        raise SerializationError("Malformed payload") from e
+    return decisions
+
+
+def dumps_json(decisions: Iterable[Decision]) -> str:
+    return json.dumps(to_payload(decisions), separators=(",", ":"))
+
+
+def loads_json(data: str | bytes, mapper_registry: registry) -> list[Decision]:
+    return from_payload(json.loads(data), mapper_registry)
+
+
+# Binary encoding of JSON compatible values: a one byte type tag followed by the value
+_NONE, _TRUE, _FALSE, _INT, _FLOAT, _STR, _LIST, _DICT = b"NTFidslm"
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def _write_int(out: bytearray, value: int) -> None:
+    out.append(_INT)
+    # Zigzag encoding keeps small negative numbers short
+    _write_varint(out, value * 2 if value >= 0 else -value * 2 - 1)
+
+
+def _write_float(out: bytearray, value: float) -> None:
+    out.append(_FLOAT)
+    out += struct.pack("<d", value)
+
+
+def _write_str(out: bytearray, value: str) -> None:
+    encoded = value.encode()
+    out.append(_STR)
+    _write_varint(out, len(encoded))
+    out += encoded
+
+
+def _write_list(out: bytearray, value: list[Any]) -> None:
+    out.append(_LIST)
+    _write_varint(out, len(value))
+    for item in value:
+        _write(out, item)
+
+
+def _write_dict(out: bytearray, value: dict[Any, Any]) -> None:
+    out.append(_DICT)
+    _write_varint(out, len(value))
+    for key, item in value.items():
+        _write(out, key)
+        _write(out, item)
+
+
+# Writers by type, `bool` before `int` for the subclasses looked up by `isinstance`
+_WRITERS: dict[type, Callable[[bytearray, Any], None]] = {
+    type(None): lambda out, _: out.append(_NONE),
+    bool: lambda out, value: out.append(_TRUE if value else _FALSE),
+    int: _write_int,
+    float: _write_float,
+    str: _write_str,
+    list: _write_list,
+    dict: _write_dict,
+}
+
+
+def _write(out: bytearray, value: Any) -> None:
+    writer = _WRITERS.get(value.__class__)
+    if writer is None:
+        writer = next((writer for base, writer in _WRITERS.items() if isinstance(value, base)), None)
+        if writer is None:
+            raise SerializationError(f"Cannot write value of type {type(value).__name__}")
+    writer(out, value)
+
+
+class _Reader:
+    def __init__(self, data: bytes) -> None:
+        self.data = memoryview(data)
+        self.position = 0
+
+    def varint(self) -> int:
+        result = shift = 0
+        while True:
+            byte = self.data[self.position]
+            self.position += 1
+            result |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                return result
+            shift += 7
+
+    def read(self) -> Any:
+        tag = self.data[self.position]
+        self.position += 1
+        if tag == _NONE:
+            return None
+        if tag == _TRUE:
+            return True
+        if tag == _FALSE:
+            return False
+        if tag == _INT:
+            value = self.varint()
+            return value >> 1 if not value & 1 else -((value + 1) >> 1)
+        if tag == _FLOAT:
+            (value,) = struct.unpack_from("<d", self.data, self.position)
+            self.position += 8
+            return value
+        if tag == _STR:
+            length = self.varint()
+            value = bytes(self.data[self.position : self.position + length]).decode()
+            self.position += length
+            return value
+        if tag == _LIST:
+            return [self.read() for _ in range(self.varint())]
+        if tag == _DICT:
+            return {self.read(): self.read() for _ in range(self.varint())}
+        raise SerializationError(f"Unknown binary tag {tag}")
+
+
+def dumps_binary(decisions: Iterable[Decision]) -> bytes:
+    out = bytearray()
+    _write(out, to_payload(decisions))
+    return bytes(out)
+
+
+def loads_binary(data: bytes, mapper_registry: registry) -> list[Decision]:
+    try:
+        payload = _Reader(data).read()
+    except (IndexError, TypeError, struct.error, UnicodeDecodeError) as e:
+        # Truncated data, invalid strings or unhashable object keys
+        raise SerializationError("Malformed binary payload") from e
+    return from_payload(payload, mapper_registry)
@@ -0,0 +1,112 @@
+from threading import Lock
+from typing import Any, Iterable, Sequence, cast
+
+import structlog
+from sqlalchemy import Executable
+from sqlalchemy.orm import Mapper
+from sqlalchemy.sql.cache_key import CacheKey
+from sqlalchemy.sql.visitors import iterate
+from structlog.stdlib import BoundLogger
+
+from sqlalchemy_auth_hooks.utils import at_fork_in_child
+
+logger: BoundLogger = structlog.get_logger()
+
+
+def statement_fingerprint(statement: Executable) -> str:
+    """
+    Return an identifier of the statement's shape, equal for statements differing only in bound values.
+
+    Based on the SQL compilation cache key, it is stable within a process only.
+    """
+    cache_key = cast(CacheKey | None, statement._generate_cache_key())  # type: ignore
+    if cache_key is None:
+        return "uncacheable"
+    return f"{hash(cache_key.key) & 0xFFFFFFFFFFFFFFFF:016x}"
+
+
+def mapper_names(mappers: Iterable[Mapper[Any]]) -> list[str]:
+    return sorted({mapper.class_.__name__ for mapper in mappers})
+
+
+def criteria_size(options: Iterable[Any]) -> int:
+    """
+    Return the number of expression nodes in the filters of loader criteria `options`.
+    """
+    return sum(sum(1 for _ in iterate(option.where_criteria)) for option in options)
+
+
+class SlowAuthorization:
+    """
+    A statement whose authorization took longer than the threshold of a `SlowAuthorizationLog`.
+    """
+
+    __slots__ = ("fingerprint", "action", "mappers", "seconds", "handler_seconds", "criteria", "filter_size")
+
+    def __init__(
+        self,
+        fingerprint: str,
+        action: str,
+        mappers: Sequence[str],
+        seconds: float,
+        handler_seconds: float,
+        criteria: int,
+        filter_size: int,
+    ) -> None:
+        self.fingerprint = fingerprint
+        self.action = action
+        self.mappers = tuple(mappers)
+        # Whole authorization of the statement, including the time spent in the handler
+        self.seconds = seconds
+        self.handler_seconds = handler_seconds
+        # Filters added to the statement and their total number of expression nodes
+        self.criteria = criteria
+        self.filter_size = filter_size
+
+    def as_dict(self) -> dict[str, Any]:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"SlowAuthorization({', '.join(f'{key}={value!r}' for key, value in self.as_dict().items())})"
+
+
+class SlowAuthorizationLog:
+    """
+    Logs statements slower to authorize than `threshold` seconds, and keeps the slowest occurrence of the `size` slowest
+    statement shapes.
+    """
+
+    def __init__(self, threshold: float, size: int = 20) -> None:
+        self.threshold = threshold
+        self.size = size
+        # Slowest occurrence and number of slow occurrences per fingerprint
+        self._slowest: dict[str, tuple[SlowAuthorization, int]] = {}
+        self._lock = Lock()
+        at_fork_in_child(self._after_fork)
+
+    def _after_fork(self) -> None:
+        self._lock = Lock()
+
+    def observe(self, record: SlowAuthorization) -> None:
+        logger.warning("Slow authorization", **record.as_dict())
+        with self._lock:
+            slowest, occurrences = self._slowest.get(record.fingerprint, (record, 0))
+            if record.seconds > slowest.seconds:
+                slowest = record
+            self._slowest[record.fingerprint] = (slowest, occurrences + 1)
+            if len(self._slowest) > self.size:
+                fastest = min(self._slowest, key=lambda fingerprint: self._slowest[fingerprint][0].seconds)
+                del self._slowest[fastest]
+
+    def top(self, n: int | None = None) -> list[tuple[SlowAuthorization, int]]:
+        """
+        Return the slowest occurrence of the slowest statement shapes with their number of slow occurrences, slowest
+        first.
+        """
+        with self._lock:
+            entries = sorted(self._slowest.values(), key=lambda entry: entry[0].seconds, reverse=True)
+        return entries if n is None else entries[:n]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._slowest.clear()
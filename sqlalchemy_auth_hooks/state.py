@@ -0,0 +1,65 @@
+from collections import defaultdict
+from typing import Any
+from weakref import WeakSet
+
+from sqlalchemy.orm import InstanceState, Mapper, Session
+
+from sqlalchemy_auth_hooks.events import Event
+
+_INFO_KEY = "sqlalchemy_auth_hooks"
+
+
+class SessionAuthState:
+    """
+    Authorization state kept for the lifetime of a session.
+    """
+
+    __slots__ = ("actor", "unrestricted", "select_criteria", "authorized_states", "pending_events", "handler_seconds")
+
+    def __init__(self) -> None:
+        # User the cached handler answers were given for
+        self.actor: object | None = None
+        # Handler answers to `AuthHandler.is_unrestricted`, per mapper and action
+        self.unrestricted: dict[tuple[Mapper[Any], str], bool] = {}
+        # Filters the handler returned for selects of a mapper, reused for relationship loads
+        self.select_criteria: dict[Mapper[Any], list[tuple[Any, Any]]] = {}
+        # States of objects loaded or persisted under authorization, dropped with their objects
+        self.authorized_states: WeakSet[InstanceState[Any]] = WeakSet()
+        # Events of the current transaction by identity key, `None` for bulk statements
+        self.pending_events: defaultdict[tuple[Any, ...] | None, list[Event[Any]]] = defaultdict(list)
+        # Time spent in the handler since the hooks last reset it, only summed up for the slow authorization log
+        self.handler_seconds = 0.0
+
+    def scope_to(self, actor: object) -> "SessionAuthState":
+        """
+        Drop handler answers and authorized objects cached for another actor, the user of a session may be replaced
+        while it is in use.
+        """
+        if actor is not self.actor:
+            self.actor = actor
+            self.unrestricted.clear()
+            self.select_criteria.clear()
+            self.authorized_states.clear()
+        return self
+
+    def take_pending_events(self) -> dict[tuple[Any, ...] | None, list[Event[Any]]]:
+        """
+        Return the events of the finished transaction and start collecting those of the next one.
+        """
+        pending_events = self.pending_events
+        self.pending_events = defaultdict(list)
+        return pending_events
+
+
+def get_session_state(session: Session, owner: object) -> SessionAuthState:
+    """
+    Return the authorization state `owner` keeps for `session`, creating it on first use.
+
+    Every set of registered hooks keeps its own state, their handlers may answer differently. A session is only used
+    by one thread at a time, so the state needs no locking and concurrent sessions never contend.
+    """
+    states: dict[object, SessionAuthState] = session.info.setdefault(_INFO_KEY, {})
+    state = states.get(owner)
+    if state is None:
+        state = states[owner] = SessionAuthState()
+    return state
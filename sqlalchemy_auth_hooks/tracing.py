@@ -0,0 +1,54 @@
+from contextlib import nullcontext
+from typing import Any, ContextManager, Mapping, Protocol, Sequence
+
+# Attribute values supported by OpenTelemetry
+AttributeValue = str | bool | int | float | Sequence[str]
+
+
+class Span(Protocol):
+    def set_attribute(self, key: str, value: AttributeValue) -> None:
+        ...  # pragma: no cover
+
+    def record_exception(self, exception: BaseException) -> None:
+        ...  # pragma: no cover
+
+
+class Tracer(Protocol):
+    """
+    The part of the OpenTelemetry tracer API used by the hooks, an `opentelemetry.trace.Tracer` can be passed as is.
+
+    Spans are expected to keep the current span in a context variable. The hooks run handlers in a copy of the calling
+    thread's context, so spans opened by asynchronous handlers on the loop thread have the right parent.
+    """
+
+    def start_as_current_span(
+        self, name: str, *, attributes: Mapping[str, AttributeValue] | None = None
+    ) -> ContextManager[Span]:
+        ...  # pragma: no cover
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: AttributeValue) -> None:
+        pass
+
+    def record_exception(self, exception: BaseException) -> None:
+        pass
+
+
+class NoopTracer:
+    """
+    Records nothing, equivalent to not passing a tracer.
+    """
+
+    def start_as_current_span(
+        self, name: str, *, attributes: Mapping[str, AttributeValue] | None = None
+    ) -> ContextManager[Span]:
+        return nullcontext(_NoopSpan())
+
+
+def start_span(tracer: Tracer | None, name: str, attributes: Mapping[str, Any]) -> ContextManager[Any]:
+    if tracer is None:
+        return nullcontext()
+    return tracer.start_as_current_span(f"sqlalchemy_auth_hooks.{name}", attributes=attributes)
@@ -1,25 +1,90 @@
 import asyncio
-from typing import Any, cast
+import os
+from threading import Lock
+from typing import Any, Callable, cast
+from weakref import WeakKeyDictionary, WeakMethod
 
 import structlog
 from sqlalchemy import (
     FromClause,
     Insert,
+    event,
 )
-from sqlalchemy.orm import DeclarativeBase, Mapper
+from sqlalchemy.orm import DeclarativeBase, Mapper, registry
 
 logger = structlog.get_logger()
 
 
+_table_mappers: "WeakKeyDictionary[registry, tuple[int, dict[FromClause, Mapper[Any]]]]" = WeakKeyDictionary()
+# Serializes writing entries and bumping the version, readers only ever look up a whole entry
+_table_mappers_lock = Lock()
+# Bumped whenever a class is mapped or disposed of, in any registry
+_mappers_version = 0
+
+
+def _mappers_changed(_class: type) -> None:
+    global _mappers_version
+    with _table_mappers_lock:
+        _mappers_version += 1
+
+
+event.listen(object, "class_instrument", _mappers_changed, propagate=True)
+event.listen(object, "class_uninstrument", _mappers_changed, propagate=True)
+
+# Methods called in child processes after a fork, weakly referenced by the id of their reference
+_fork_callbacks: dict[int, "WeakMethod[Callable[[], None]]"] = {}
+
+
+def at_fork_in_child(callback: Callable[[], None]) -> None:
+    """
+    Call the bound method `callback` in child processes after a fork, for as long as its object is alive.
+
+    Locks held by other threads at the time of the fork are never released in the child, so objects use it to replace
+    theirs.
+    """
+    reference = WeakMethod(callback, lambda dead: _fork_callbacks.pop(id(dead), None))
+    _fork_callbacks[id(reference)] = reference
+
+
+def _after_fork_in_child() -> None:
+    global _table_mappers_lock
+    _table_mappers_lock = Lock()
+    for reference in list(_fork_callbacks.values()):
+        callback = reference()
+        if callback is not None:
+            callback()
+
+
+if hasattr(os, "register_at_fork"):
+    # Not available on Windows, which does not fork
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
 def run_loop(loop: asyncio.AbstractEventLoop) -> None:
     asyncio.set_event_loop(loop)
     loop.run_forever()
 
 
+def get_table_mappers(mapper_registry: registry) -> dict[FromClause, Mapper[Any]]:
+    """
+    Return the mappers of `mapper_registry` by their local table.
+
+    The index is cached per registry and rebuilt when classes are mapped or disposed of. Indexes are built without the
+    lock and swapped in whole, so readers never see a partially built one.
+    """
+    version = _mappers_version
+    cached = _table_mappers.get(mapper_registry)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    # Read after the version, a class mapped meanwhile makes the next call rebuild the index again
+    table_mappers: dict[FromClause, Mapper[Any]] = {mapper.local_table: mapper for mapper in mapper_registry.mappers}
+    with _table_mappers_lock:
+        _table_mappers[mapper_registry] = (version, table_mappers)
+    return table_mappers
+
+
 def get_table_mapper(entity: DeclarativeBase) -> Mapper[Any]:
-    registry = entity.registry
-    table_mappers: dict[FromClause, Mapper[Any]] = {mapper.local_table: mapper for mapper in registry.mappers}
-    return table_mappers[entity.__table__]
+    return get_table_mappers(entity.registry)[entity.__table__]
 
 
 def get_insert_columns(statement: Insert) -> list[dict[str, Any]]:
@@ -1,3 +1,4 @@
+import threading
 from typing import Any, AsyncIterable, Iterable
 
 import pytest
@@ -5,8 +6,8 @@ from pytest_mock import MockerFixture
 from sqlalchemy import create_engine, delete, true
 from sqlalchemy.ext.asyncio import create_async_engine
 
-from sqlalchemy_auth_hooks.auth_handler import AuthHandler
-from sqlalchemy_auth_hooks.hooks import register_hooks
+from sqlalchemy_auth_hooks.auth_handler import AuthHandler, SyncAuthHandler
+from sqlalchemy_auth_hooks.hooks import register_hooks, unregister_hooks
 from sqlalchemy_auth_hooks.post_auth_handler import PostAuthHandler
 from sqlalchemy_auth_hooks.references import ReferencedEntity
 from sqlalchemy_auth_hooks.session import (
@@ -18,6 +19,47 @@ from sqlalchemy_auth_hooks.session import (
 from tests.conftest import Base, Group, User, UserGroup
 
 
+class PostAuthHandlerStub(PostAuthHandler):
+    async def after_single_insert(self, *_):
+        pass
+
+    async def after_single_delete(self, *_):
+        pass
+
+    async def after_single_update(self, *_):
+        pass
+
+    async def after_many_insert(self, *_):
+        pass
+
+    async def after_many_delete(self, *_):
+        pass
+
+    async def after_many_update(self, *_):
+        pass
+
+
+class SyncHandler(SyncAuthHandler):
+    def __init__(self):
+        self.threads: list[int] = []
+
+    def _allow(self, references):
+        self.threads.append(threading.get_ident())
+        return [(reference.entity, true()) for reference in references]
+
+    def before_select(self, session, referenced_entities, condition):
+        return self._allow(referenced_entities)
+
+    def before_insert(self, session, entity, values):
+        return self._allow([entity])
+
+    def before_delete(self, session, referenced_entities, condition):
+        return self._allow(referenced_entities)
+
+    def before_update(self, session, referenced_entities, condition, changes):
+        return self._allow(referenced_entities)
+
+
 @pytest.fixture(scope="session")
 def anyio_backend():
     return "asyncio"
@@ -92,8 +134,10 @@ def handlers(mocker: MockerFixture):
     auth_handler.before_update.side_effect = AllowAll
     auth_handler.before_delete.side_effect = AllowAll
     auth_handler.before_insert.side_effect = AllowAllInsert
+    auth_handler.is_unrestricted.return_value = False
     hooks = register_hooks(auth_handler, post_auth_handler)
-    return hooks, auth_handler, post_auth_handler
+    yield hooks, auth_handler, post_auth_handler
+    unregister_hooks(hooks)
 
 
 @pytest.fixture
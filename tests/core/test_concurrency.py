@@ -0,0 +1,45 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+
+import pytest
+from sqlalchemy import create_engine, update
+
+from sqlalchemy_auth_hooks.session import AuthorizedSession
+from tests.conftest import Base
+from tests.core.conftest import User
+
+THREADS = 8
+ROUNDS = 20
+
+
+@pytest.fixture
+def file_engine(tmp_path):
+    # In-memory databases are per connection, threads need a shared database
+    engine = create_engine(f"sqlite:///{tmp_path / 'concurrency.db'}", connect_args={"timeout": 30})
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_concurrent_sessions(file_engine, post_auth_handler, auth_user):
+    barrier = Barrier(THREADS)
+
+    def work(thread: int) -> None:
+        barrier.wait()
+        for i in range(ROUNDS):
+            with AuthorizedSession(file_engine, user=auth_user) as session:
+                users = [User(name=f"User {thread}-{i}-{j}", age=thread) for j in range(3)]
+                session.add_all(users)
+                session.flush()
+                session.execute(update(User).where(User.age == thread).values(name=f"Thread {thread}"))
+                if i % 2:
+                    session.rollback()
+                else:
+                    session.commit()
+
+    with ThreadPoolExecutor(THREADS) as executor:
+        list(executor.map(work, range(THREADS)))
+
+    committed = THREADS * ROUNDS // 2
+    assert post_auth_handler.after_single_insert.call_count == committed * 3
+    assert post_auth_handler.after_many_update.call_count == committed
@@ -1,5 +1,5 @@
 from pytest_mock import MockerFixture
-from sqlalchemy import insert, inspect, select, literal, true
+from sqlalchemy import insert, inspect, select, literal
 from sqlalchemy.orm import ORMExecuteState
 from sqlalchemy.sql.functions import concat
 from sqlalchemy.sql.operators import startswith_op
@@ -75,10 +75,5 @@ def test_insert_from_select(engine, hooks, auth_handler, add_user, authorized_se
     )
     spy.assert_called_once()
     exec_state: ORMExecuteState = spy.call_args[0][0]
-    expected = (
-        select(User.name + literal(" second"), User.age)
-        .where(true())
-        .compile(compile_kwargs={"literal_binds": True})
-        .string
-    )
+    expected = select(User.name + literal(" second"), User.age).compile(compile_kwargs={"literal_binds": True}).string
     assert exec_state.statement.compile(compile_kwargs={"literal_binds": True}).string == expected
@@ -1,5 +1,8 @@
-from sqlalchemy import inspect, literal, select, func, ColumnClause
-from sqlalchemy.sql.operators import and_, concat_op, eq, or_, startswith_op, ne
+import pytest
+from pytest_mock import MockerFixture
+from sqlalchemy import inspect, literal, select, func, ColumnClause, event, false, true
+from sqlalchemy.orm import ORMExecuteState
+from sqlalchemy.sql.operators import and_, concat_op, eq, in_op, or_, startswith_op, ne
 
 from sqlalchemy_auth_hooks.references import (
     CompositeCondition,
@@ -7,6 +10,7 @@ from sqlalchemy_auth_hooks.references import (
     LiteralExpression,
     ReferenceCondition,
     ReferencedEntity,
+    ValueSet,
 )
 from tests.core.conftest import User, UserGroup
 
@@ -186,3 +190,135 @@ def test_column_where(engine, add_user, auth_handler, authorized_session):
             right=User.__table__.c.id,
         ),
     )
+
+
+def test_select_primary_key_lookup(engine, add_user, auth_handler, authorized_session):
+    with authorized_session as session:
+        session.execute(select(User).where(User.id == add_user.id))
+        session.execute(select(User).where(User.id.in_([1, 2, 3]), User.name == "John"))
+        session.execute(select(User).where(or_(User.id == 4, User.id == 5)))
+        session.execute(select(User).where(or_(User.id == 4, User.name == "John")))
+    entities = [call.args[1][0] for call in auth_handler.before_select.call_args_list]
+    assert entities[0].primary_keys == {(add_user.id,)}
+    assert entities[1].primary_keys == {(1,), (2,), (3,)}
+    assert entities[2].primary_keys == {(4,), (5,)}
+    assert entities[3].primary_keys is None
+
+
+def test_select_composite_primary_key_lookup(engine, add_user, user_group, auth_handler, authorized_session):
+    with authorized_session as session:
+        session.execute(select(UserGroup).where(UserGroup.user_id == 1, UserGroup.group_id.in_([2, 3])))
+        session.execute(select(UserGroup).where(UserGroup.user_id == 1))
+    entities = [call.args[1][0] for call in auth_handler.before_select.call_args_list]
+    assert entities[0].primary_keys == {(1, 2), (1, 3)}
+    assert entities[1].primary_keys is None
+
+
+def test_select_in_value_set(engine, add_user, auth_handler, authorized_session):
+    ids = list(range(900))
+    with authorized_session as session:
+        session.execute(select(User).where(User.id.in_(ids)))
+    condition = auth_handler.before_select.call_args.args[2]
+    assert condition.operator is in_op
+    values = condition.right.value
+    assert isinstance(values, ValueSet)
+    assert len(values) == 900
+    assert 899 in values
+    assert values & {1, 2, -1} == {1, 2}
+    assert hash(condition) == hash(condition)
+
+
+@pytest.fixture
+def deny(auth_handler):
+    def set_denied(*denied):
+        auth_handler.before_select.side_effect = _deny(*denied)
+
+    return set_denied
+
+
+def _deny(*denied):
+    mappers = {inspect(entity) for entity in denied}
+
+    class Deny:
+        def __init__(self, _session, references, *_, **__):
+            self.references = iter(references)
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            try:
+                val = next(self.references)
+            except StopIteration as e:
+                raise StopAsyncIteration from e
+            return val.entity, false() if val.entity in mappers else true()
+
+    return Deny
+
+
+@pytest.fixture
+def statements(engine):
+    executed = []
+
+    def before_cursor_execute(_conn, _cursor, statement, *_):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield executed
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def test_select_denied_short_circuit(engine, add_user, deny, authorized_session, statements):
+    deny(User, UserGroup)
+    with authorized_session as session:
+        assert session.execute(select(User).where(User.id == add_user.id)).scalars().all() == []
+        assert session.execute(select(User.id, User.name)).all() == []
+        assert session.get(User, add_user.id) is None
+    deny(User)
+    with authorized_session as session:
+        assert session.execute(select(UserGroup).join(User, User.id == UserGroup.user_id)).all() == []
+    assert statements == []
+
+
+def test_select_denied_needs_database(engine, add_user, deny, authorized_session, statements):
+    deny(User)
+    with authorized_session as session:
+        assert session.execute(select(func.count(User.id))).scalar_one() == 0
+        assert session.execute(select(UserGroup).outerjoin(User, User.id == UserGroup.user_id)).all() == []
+    assert len(statements) == 2
+
+
+async def test_select_denied_short_circuit_async(async_engine, add_user_async, deny, authorized_async_session):
+    deny(User)
+    async with authorized_async_session as session:
+        assert (await session.execute(select(User))).scalars().all() == []
+        assert await session.get(User, add_user_async.id) is None
+
+
+def test_select_true_filter_not_injected(engine, add_user, hooks, authorized_session, mocker: MockerFixture):
+    spy = mocker.spy(hooks.authorizer, "authorize_select")
+    with authorized_session as session:
+        session.execute(select(User))
+    exec_state: ORMExecuteState = spy.call_args[0][0]
+    assert exec_state.statement._with_options == ()
+
+
+def test_select_unrestricted(engine, add_user, auth_handler, authorized_session, mocker: MockerFixture):
+    mocker.patch.object(
+        auth_handler.is_unrestricted, "side_effect", lambda _session, mapper, _action: mapper is inspect(User)
+    )
+    with authorized_session as session:
+        session.execute(select(User))
+        session.execute(select(User).where(User.id == add_user.id))
+        session.execute(select(UserGroup).join(User, User.id == UserGroup.user_id))
+    auth_handler.before_select.assert_called_once_with(
+        authorized_session,
+        [ReferencedEntity(entity=inspect(UserGroup), selectable=UserGroup.__table__)],
+        ReferenceCondition(
+            left=User.__table__.c.id,
+            operator=eq,
+            right=UserGroup.__table__.c.user_id,
+        ),
+    )
+    # Answers are cached per session and action
+    assert auth_handler.is_unrestricted.call_count == 2
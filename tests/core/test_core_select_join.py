@@ -7,6 +7,7 @@ from sqlalchemy_auth_hooks.references import (
     LiteralExpression,
     ReferenceCondition,
     ReferencedEntity,
+    ValueSet,
 )
 from tests.core.conftest import Group, User, UserGroup
 
@@ -106,9 +107,9 @@ def test_join_recursive(engine, add_user, user_group, auth_handler, authorized_s
         authorized_session,
         [ReferencedEntity(entity=inspect(Group), selectable=Group.__table__)],
         ReferenceCondition(
-            left=LiteralExpression(1),
+            left=Group.__table__.c.parent_group_id,
             operator=eq,
-            right=Group.__table__.c.parent_group_id,
+            right=LiteralExpression(1),
         ),
     )
     # Select itself
@@ -140,9 +141,9 @@ def test_join_recursive_with_condition(engine, add_user, user_group, auth_handle
         authorized_session,
         [ReferencedEntity(entity=inspect(Group), selectable=Group.__table__)],
         ReferenceCondition(
-            left=LiteralExpression(1),
+            left=Group.__table__.c.parent_group_id,
             operator=eq,
-            right=Group.__table__.c.parent_group_id,
+            right=LiteralExpression(1),
         ),
     )
     # The select itself
@@ -194,7 +195,7 @@ def test_join_selectinload(engine, add_user, user_group, auth_handler, authorize
         ReferenceCondition(
             left=UserGroup.__table__.c.user_id,
             operator=in_op,
-            right=LiteralExpression([1]),
+            right=LiteralExpression(ValueSet([1])),
         ),
     )
     # Finally, a selectinload is performed on the groups as well
@@ -209,7 +210,7 @@ def test_join_selectinload(engine, add_user, user_group, auth_handler, authorize
         ReferenceCondition(
             left=Group.__table__.c.id,
             operator=in_op,
-            right=LiteralExpression([1]),
+            right=LiteralExpression(ValueSet([1])),
         ),
     )
 
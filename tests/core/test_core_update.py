@@ -1,7 +1,9 @@
-from sqlalchemy import inspect, update
+from sqlalchemy import bindparam, inspect, update
 from sqlalchemy.sql.operators import eq, startswith_op
 
-from sqlalchemy_auth_hooks.references import ReferenceCondition, ReferencedEntity, LiteralExpression
+from sqlalchemy_auth_hooks.clauses import extract_references
+from sqlalchemy_auth_hooks.references import ReferenceCondition, ReferencedEntity, LiteralExpression, RowsCondition
+from sqlalchemy_auth_hooks.session import UnauthorizedSession
 from tests.core.conftest import User
 
 
@@ -64,3 +66,40 @@ def test_update_condition(engine, auth_handler, add_user, authorized_session):
         ),
         {"name": "John", "age": 10},
     )
+
+
+def test_update_many_rows_by_primary_key(engine, auth_handler, add_user, authorized_session):
+    with UnauthorizedSession(engine) as session:
+        other = User(name="Jane", age=10)
+        session.add(other)
+        session.commit()
+        other_id = other.id
+    with authorized_session as session:
+        session.execute(update(User), [{"id": add_user.id, "name": "A"}, {"id": other_id, "name": "B"}])
+        session.commit()
+    auth_handler.before_update.assert_called_once_with(
+        authorized_session,
+        [ReferencedEntity(entity=inspect(User), selectable=User.__table__)],
+        RowsCondition(
+            [
+                ReferenceCondition(left=User.__table__.c.id, operator=eq, right=LiteralExpression(add_user.id)),
+                ReferenceCondition(left=User.__table__.c.id, operator=eq, right=LiteralExpression(other_id)),
+            ]
+        ),
+        {},
+    )
+
+
+def test_update_many_rows_bound_where():
+    statement = update(User).where(User.id == bindparam("uid")).values(name=bindparam("n"))
+    rows = [{"uid": uid, "n": str(uid)} for uid in range(1000)]
+    conditions, _ = extract_references(statement, rows)
+    assert conditions == RowsCondition(
+        [ReferenceCondition(left=User.__table__.c.id, operator=eq, right=LiteralExpression(uid)) for uid in range(1000)]
+    )
+
+
+def test_update_many_rows_unbound_where():
+    statement = update(User).where(User.name == "John").values(name=bindparam("n"))
+    conditions, _ = extract_references(statement, [{"n": "a"}, {"n": "b"}])
+    assert conditions == ReferenceCondition(left=User.__table__.c.name, operator=eq, right=LiteralExpression("John"))
@@ -0,0 +1,69 @@
+import asyncio
+import gc
+import os
+import signal
+
+import pytest
+
+from sqlalchemy_auth_hooks.hooks import SQLAlchemyAuthHooks
+from sqlalchemy_auth_hooks.utils import _fork_callbacks, at_fork_in_child
+from tests.core.conftest import PostAuthHandlerStub, SyncHandler, User
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="Requires fork")
+
+
+async def _answer() -> int:
+    await asyncio.sleep(0)
+    return 42
+
+
+def test_loop_started_lazily():
+    hooks = SQLAlchemyAuthHooks(SyncHandler(), PostAuthHandlerStub())
+    assert hooks._executor_thread is None
+    assert hooks.call_async(_answer) == 42
+    assert hooks._executor_thread is not None and hooks._executor_thread.is_alive()
+
+
+def test_call_async_after_fork(engine, add_user, post_auth_handler, authorized_session):
+    hooks = SQLAlchemyAuthHooks(SyncHandler(), PostAuthHandlerStub())
+    assert hooks.call_async(_answer) == 42
+    pid = os.fork()
+    if pid == 0:
+        # A hanging loop would block the child forever
+        signal.alarm(10)
+        try:
+            assert hooks.call_async(_answer) == 42
+            with authorized_session as session:
+                session.get(User, add_user.id).age = 43
+                session.commit()
+            assert post_auth_handler.after_single_update.call_count == 1
+        except BaseException:
+            os._exit(1)
+        os._exit(0)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+
+
+class _Forked:
+    def __init__(self) -> None:
+        self.forked = False
+        at_fork_in_child(self._after_fork)
+
+    def _after_fork(self) -> None:
+        self.forked = True
+
+
+def test_fork_callbacks_follow_objects():
+    gc.collect()
+    registered = len(_fork_callbacks)
+    dropped = _Forked()
+    kept = _Forked()
+    del dropped
+    gc.collect()
+    assert len(_fork_callbacks) == registered + 1
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0 if kept.forked else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert not kept.forked
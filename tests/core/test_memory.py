@@ -0,0 +1,92 @@
+import gc
+
+import pytest
+from sqlalchemy import inspect
+from sqlalchemy.sql.operators import and_, eq
+
+from sqlalchemy_auth_hooks.hooks import register_hooks, unregister_hooks
+from sqlalchemy_auth_hooks.references import (
+    CompositeCondition,
+    LiteralExpression,
+    ReferenceCondition,
+    ReferencedEntity,
+)
+from sqlalchemy_auth_hooks.state import get_session_state
+from tests.core.conftest import PostAuthHandlerStub, SyncHandler, User, UserGroup
+
+
+@pytest.fixture(scope="module")
+def hooks():
+    hooks = register_hooks(SyncHandler(), PostAuthHandlerStub(), trust_identity_map=True)
+    yield hooks
+    unregister_hooks(hooks)
+
+
+def test_rolled_back_inserts_forgotten(engine, hooks, authorized_session):
+    with authorized_session as session:
+        state = get_session_state(session, hooks.authorizer)
+        user = User(name="Jane", age=30)
+        session.add(user)
+        session.flush()
+        assert len(state.authorized_states) == 1
+        session.rollback()
+        assert not state.authorized_states
+        assert not state.pending_events
+
+
+def test_collected_objects_forgotten(engine, hooks, authorized_session):
+    with authorized_session as session:
+        state = get_session_state(session, hooks.authorizer)
+        session.add_all(User(name=f"User {i}", age=i) for i in range(300))
+        session.commit()
+        gc.collect()
+        assert not session.identity_map
+        user = User(name="Jane", age=30)
+        session.add(user)
+        session.commit()
+        assert len(state.authorized_states) == 1
+
+
+def test_expunged_objects_forgotten(engine, hooks, add_user, authorized_session):
+    with authorized_session as session:
+        state = get_session_state(session, hooks.authorizer)
+        user = session.get(User, add_user.id)
+        assert set(state.authorized_states) == {inspect(user)}
+        session.expunge_all()
+        session.commit()
+        assert not state.authorized_states
+        user = session.get(User, add_user.id)
+        session.close()
+        assert not state.authorized_states
+
+
+def test_replaced_user_forgets_objects(engine, hooks, add_user, authorized_session):
+    with authorized_session as session:
+        state = get_session_state(session, hooks.authorizer)
+        user = session.get(User, add_user.id)
+        assert set(state.authorized_states) == {inspect(user)}
+        session.user = object()
+        session.refresh(user)
+        assert not state.authorized_states
+
+
+def test_delete_expired(engine, hooks, add_user, user_group, auth_handler, authorized_session):
+    user_groups = UserGroup.__table__
+    with authorized_session as session:
+        membership = UserGroup(user_id=add_user.id, group_id=user_group.id + 1)
+        session.add(membership)
+        session.commit()
+        # Attributes expired by the commit, including the primary key
+        session.delete(membership)
+        session.commit()
+        assert session.get(UserGroup, (add_user.id, user_group.id + 1)) is None
+    (_, [entity], condition), _ = auth_handler.before_delete.call_args
+    assert entity == ReferencedEntity(entity=inspect(UserGroup), selectable=user_groups)
+    assert entity.primary_keys == {(add_user.id, user_group.id + 1)}
+    assert condition == CompositeCondition(
+        operator=and_,
+        conditions=[
+            ReferenceCondition(left=user_groups.c.user_id, operator=eq, right=LiteralExpression(add_user.id)),
+            ReferenceCondition(left=user_groups.c.group_id, operator=eq, right=LiteralExpression(user_group.id + 1)),
+        ],
+    )
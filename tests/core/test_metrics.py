@@ -0,0 +1,59 @@
+import json
+
+import pytest
+from sqlalchemy import select
+
+from sqlalchemy_auth_hooks.hooks import register_hooks, unregister_hooks
+from sqlalchemy_auth_hooks.metrics import HistogramRecorder, JsonExporter, NullRecorder, PrometheusExporter
+from tests.core.conftest import PostAuthHandlerStub, SyncHandler, User
+
+
+@pytest.fixture(scope="module")
+def recorder():
+    recorder = HistogramRecorder()
+    hooks = register_hooks(SyncHandler(), PostAuthHandlerStub(), metrics=recorder)
+    yield recorder
+    unregister_hooks(hooks)
+
+
+def test_null_recorder_does_not_time():
+    recorder = NullRecorder()
+    with recorder.time("handler", "select"):
+        pass
+    assert not recorder.enabled
+
+
+def test_phases_recorded(engine, add_user, recorder, authorized_session):
+    recorder.reset()
+    with authorized_session as session:
+        session.execute(select(User).where(User.id == add_user.id)).all()
+        user = User(name="Jane", age=30)
+        session.add(user)
+        session.commit()
+    histograms = recorder.snapshot()
+    assert histograms["collect", "select", ""].count == 1
+    assert histograms["handler", "select", "User"].count == 1
+    assert histograms["criteria", "select", "User"].count == 1
+    assert histograms["handler", "insert", "User"].count == 1
+    assert histograms["post_commit", "commit", ""].count == 1
+    assert histograms["dispatch", "", ""].count >= 1
+
+
+def test_exporters():
+    recorder = HistogramRecorder(buckets=(0.001, 0.01))
+    recorder.record("handler", "select", "User", 0.0005)
+    recorder.record("handler", "select", "User", 0.005)
+    recorder.record("handler", "select", "User", 0.5)
+
+    prometheus = PrometheusExporter().export(recorder)
+    labels = 'phase="handler",action="select",mapper="User"'
+    assert f'sqlalchemy_auth_hooks_phase_seconds_bucket{{{labels},le="0.001"}} 1' in prometheus
+    assert f'sqlalchemy_auth_hooks_phase_seconds_bucket{{{labels},le="0.01"}} 2' in prometheus
+    assert f'sqlalchemy_auth_hooks_phase_seconds_bucket{{{labels},le="+Inf"}} 3' in prometheus
+    assert f"sqlalchemy_auth_hooks_phase_seconds_count{{{labels}}} 3" in prometheus
+
+    [dumped] = json.loads(JsonExporter().export(recorder))
+    assert dumped["phase"] == "handler"
+    assert dumped["mapper"] == "User"
+    assert dumped["count"] == 3
+    assert dumped["buckets"] == {"0.001": 1, "0.01": 2, "+Inf": 3}
@@ -0,0 +1,115 @@
+from sqlalchemy.sql.operators import add, and_, concat_op, eq, gt, in_op, lt, mod, or_, truediv
+
+from sqlalchemy_auth_hooks.normalization import _normalize_cached, normalize_condition
+from sqlalchemy_auth_hooks.references import (
+    ColumnExpression,
+    CompositeCondition,
+    LiteralExpression,
+    NestedExpression,
+    ReferenceCondition,
+    RowsCondition,
+    ValueSet,
+)
+from tests.core.conftest import User
+
+users = User.__table__
+
+
+def _eq(column, value):
+    return ReferenceCondition(left=column, operator=eq, right=LiteralExpression(value))
+
+
+def test_flatten_and_deduplicate():
+    condition = CompositeCondition(
+        operator=and_,
+        conditions=[
+            _eq(users.c.id, 1),
+            CompositeCondition(operator=and_, conditions=[_eq(users.c.name, "John"), _eq(users.c.id, 1)]),
+        ],
+    )
+    assert normalize_condition(condition) == CompositeCondition(
+        operator=and_, conditions=[_eq(users.c.id, 1), _eq(users.c.name, "John")]
+    )
+
+
+def test_single_child_unwrapped():
+    condition = CompositeCondition(operator=or_, conditions=[_eq(users.c.id, 1), _eq(users.c.id, 1)])
+    assert normalize_condition(condition) == _eq(users.c.id, 1)
+
+
+def test_column_moved_left():
+    condition = ReferenceCondition(left=LiteralExpression(3), operator=lt, right=users.c.age)
+    assert normalize_condition(condition) == ReferenceCondition(
+        left=users.c.age, operator=gt, right=LiteralExpression(3)
+    )
+
+
+def test_constant_folding():
+    condition = ReferenceCondition(
+        left=users.c.name,
+        operator=eq,
+        right=ColumnExpression(left=LiteralExpression("Jo"), operator=concat_op, right=LiteralExpression("hn")),
+    )
+    assert normalize_condition(condition) == _eq(users.c.name, "John")
+
+    nested = NestedExpression(
+        left=ColumnExpression(left=LiteralExpression(1), operator=add, right=LiteralExpression(2)),
+        operator=add,
+        right=LiteralExpression(3),
+    )
+    assert normalize_condition(ReferenceCondition(left=users.c.age, operator=eq, right=nested)) == _eq(users.c.age, 6)
+
+
+def test_folding_left_to_database():
+    remainder = ColumnExpression(left=LiteralExpression(-7), operator=mod, right=LiteralExpression(3))
+    quotient = ColumnExpression(left=LiteralExpression(7), operator=truediv, right=LiteralExpression(2))
+    for expression in (remainder, quotient):
+        condition = ReferenceCondition(left=users.c.age, operator=eq, right=expression)
+        assert normalize_condition(condition) == condition
+    # Collations order strings differently than Python
+    strings = ReferenceCondition(left=LiteralExpression("a"), operator=lt, right=LiteralExpression("B"))
+    assert normalize_condition(strings) == strings
+
+
+def test_tautologies():
+    tautology = ReferenceCondition(left=LiteralExpression(1), operator=eq, right=LiteralExpression(1))
+    contradiction = ReferenceCondition(left=LiteralExpression(1), operator=eq, right=LiteralExpression(2))
+    assert normalize_condition(tautology) is None
+    assert normalize_condition(CompositeCondition(operator=and_, conditions=[tautology, _eq(users.c.id, 1)])) == _eq(
+        users.c.id, 1
+    )
+    assert normalize_condition(CompositeCondition(operator=or_, conditions=[tautology, _eq(users.c.id, 1)])) is None
+    assert (
+        normalize_condition(CompositeCondition(operator=and_, conditions=[contradiction, _eq(users.c.id, 1)]))
+        == contradiction
+    )
+
+
+def test_rows_kept_aligned():
+    condition = RowsCondition([_eq(users.c.id, 1), _eq(users.c.id, 1)])
+    assert normalize_condition(condition) == condition
+
+
+def test_cached():
+    condition = CompositeCondition(operator=and_, conditions=[_eq(users.c.id, 1), _eq(users.c.id, 1)])
+    first = normalize_condition(condition)
+    assert normalize_condition(CompositeCondition(operator=and_, conditions=[_eq(users.c.id, 1)] * 2)) is first
+
+
+def test_point_lookup_not_cached():
+    size = _normalize_cached.cache_info().currsize
+    condition = ReferenceCondition(left=LiteralExpression(7), operator=lt, right=users.c.id)
+    assert normalize_condition(condition) == ReferenceCondition(
+        left=users.c.id, operator=gt, right=LiteralExpression(7)
+    )
+    assert _normalize_cached.cache_info().currsize == size
+
+
+def test_large_value_set_not_cached():
+    size = _normalize_cached.cache_info().currsize
+    in_ids = ReferenceCondition(left=users.c.id, operator=in_op, right=LiteralExpression(ValueSet(range(1000))))
+    condition = CompositeCondition(operator=and_, conditions=[in_ids, _eq(users.c.name, "John"), in_ids])
+    assert normalize_condition(condition) == CompositeCondition(
+        operator=and_, conditions=[in_ids, _eq(users.c.name, "John")]
+    )
+    assert _normalize_cached.cache_info().currsize == size
@@ -0,0 +1,50 @@
+import pytest
+from sqlalchemy import inspect, update
+
+from sqlalchemy_auth_hooks.changeset import Changeset
+from sqlalchemy_auth_hooks.hooks import register_hooks, unregister_hooks
+from sqlalchemy_auth_hooks.references import ReferencedEntity
+from tests.core.conftest import PostAuthHandlerStub, SyncHandler, User
+
+
+class BatchPostAuthHandler(PostAuthHandlerStub):
+    def __init__(self):
+        self.changesets: list[Changeset] = []
+
+    async def after_single_insert(self, *_):
+        raise AssertionError("Per-event methods are not called for batching handlers")
+
+    async def after_commit_batch(self, session, changeset):
+        self.changesets.append(changeset)
+
+
+@pytest.fixture(scope="module")
+def batch_handler():
+    handler = BatchPostAuthHandler()
+    hooks = register_hooks(SyncHandler(), handler)
+    yield handler
+    unregister_hooks(hooks)
+
+
+def test_commit_batch(engine, add_user, batch_handler, post_auth_handler, authorized_session):
+    batch_handler.changesets.clear()
+    with authorized_session as session:
+        # Keep references, flushed objects are only weakly referenced by the session
+        users = [User(name=f"User {i}", age=i) for i in range(100)]
+        session.add_all(users)
+        session.get(User, add_user.id).age = 43
+        session.execute(update(User).where(User.age > 1000).values(name="Old"))
+        session.commit()
+    assert len(batch_handler.changesets) == 1
+    changes = batch_handler.changesets[0][inspect(User)]
+    assert len(changes.inserted) == 100
+    assert {values["name"] for values in changes.inserted} == {f"User {i}" for i in range(100)}
+    assert all(values["id"] is not None for values in changes.inserted)
+    assert changes.updated == [((add_user.id,), {"age": 43})]
+    assert changes.deleted == []
+    assert len(changes.bulk_updated) == 1
+    entity, _, values = changes.bulk_updated[0]
+    assert entity == ReferencedEntity(entity=inspect(User), selectable=User.__table__)
+    assert values == {"name": "Old"}
+    # Handlers without after_commit_batch keep receiving single events
+    assert post_auth_handler.after_single_insert.call_count == 100
@@ -1,4 +1,4 @@
-from tests.core.conftest import User
+from tests.core.conftest import User, UserGroup
 
 
 def test_delete(engine, add_user, post_auth_handler, authorized_session):
@@ -17,6 +17,16 @@ async def test_delete_async(async_engine, add_user_async, post_auth_handler, aut
     post_auth_handler.after_single_delete.assert_called_once_with(authorized_async_session.sync_session, u)
 
 
+def test_delete_orphan(engine, add_user, user_group, post_auth_handler, authorized_session):
+    with authorized_session as session:
+        u = session.get(User, add_user.id)
+        [membership] = u.groups
+        new_membership = UserGroup(group_id=user_group.id + 1)
+        u.groups = [new_membership]
+        session.commit()
+    post_auth_handler.after_single_delete.assert_called_once_with(authorized_session, membership)
+
+
 def test_delete_rollback(engine, add_user, post_auth_handler, authorized_session):
     with authorized_session as session:
         u = session.get(User, add_user.id)
@@ -1,4 +1,9 @@
-from tests.core.conftest import User
+import gc
+
+from sqlalchemy import event
+
+from sqlalchemy_auth_hooks import flush
+from tests.core.conftest import Group, User
 
 
 def test_update(engine, add_user, post_auth_handler, authorized_session):
@@ -54,3 +59,60 @@ def test_update_rollback_implicit(engine, add_user, post_auth_handler, authorize
         u = session.get(User, add_user.id)
         u.name = "Jane"
     post_auth_handler.after_single_update.assert_not_called()
+
+
+def test_update_not_reported_as_insert(engine, add_user, post_auth_handler, authorized_session):
+    with authorized_session as session:
+        u = session.get(User, add_user.id)
+        u.name = "Jane"
+        session.commit()
+    post_auth_handler.after_single_insert.assert_not_called()
+    post_auth_handler.after_single_delete.assert_not_called()
+
+
+def test_update_relationship_as_primary_key(engine, user_group, post_auth_handler, authorized_session):
+    with authorized_session as session:
+        group = session.get(Group, user_group.id)
+        parent = Group(name="Parent")
+        group.parent_group = parent
+        session.commit()
+        post_auth_handler.after_single_update.assert_any_call(
+            authorized_session, group, {"parent_group": (parent.id,), "parent_group_id": parent.id}
+        )
+
+
+def test_update_event_does_not_keep_object(engine, add_user, post_auth_handler, authorized_session):
+    with authorized_session as session:
+        session.get(User, add_user.id).name = "Jane"
+        session.flush()
+        gc.collect()
+        # Only the pending event would still reference the updated object
+        assert session.identity_map.get((User, (add_user.id,), None)) is None
+        session.commit()
+    post_auth_handler.after_single_update.assert_called_once_with(authorized_session, None, {"name": "Jane"})
+
+
+def test_update_changes_taken_once_per_phase(engine, add_user, post_auth_handler, authorized_session, mocker):
+    get_state_changes = mocker.spy(flush, "get_state_changes")
+    with authorized_session as session:
+        session.get(User, add_user.id).name = "Jane"
+        session.commit()
+    # Once for the authorization before the flush and once for the event after it
+    assert get_state_changes.call_count == 2
+
+
+def test_update_changes_of_later_before_flush_listener(engine, add_user, post_auth_handler, authorized_session):
+    new_user = User(name="Jill", age=7)
+
+    def before_flush(session, _flush_context, _instances):
+        session.add(new_user)
+        session.get(User, add_user.id).age = 99
+
+    # Runs after the hooks' listener on the Session class
+    event.listen(authorized_session, "before_flush", before_flush)
+    with authorized_session as session:
+        u = session.get(User, add_user.id)
+        u.name = "Jane"
+        session.commit()
+    post_auth_handler.after_single_update.assert_called_once_with(authorized_session, u, {"name": "Jane", "age": 99})
+    post_auth_handler.after_single_insert.assert_called_once_with(authorized_session, new_user)
@@ -1,4 +1,8 @@
-from sqlalchemy import inspect
+import pytest
+from pytest_mock import MockerFixture
+from sqlalchemy import inspect, select
+from sqlalchemy.engine import ChunkedIteratorResult
+from sqlalchemy.orm import joinedload
 from sqlalchemy.sql.operators import and_, eq
 
 from sqlalchemy_auth_hooks.references import (
@@ -7,6 +11,7 @@ from sqlalchemy_auth_hooks.references import (
     ReferenceCondition,
     ReferencedEntity,
 )
+from sqlalchemy_auth_hooks.session import UnauthorizedSession
 from tests.core.conftest import User, UserGroup
 
 
@@ -81,3 +86,78 @@ def test_select_get(engine, add_user, user_group, auth_handler, authorized_sessi
             ],
         ),
     )
+
+
+def test_expired_load_trusts_identity_map(
+    engine, add_user, hooks, auth_handler, authorized_session, mocker: MockerFixture
+):
+    mocker.patch.object(hooks.authorizer, "trust_identity_map", True)
+    with authorized_session as session:
+        user = session.get(User, add_user.id)
+        session.commit()
+        assert user.name == "John"
+        session.refresh(user)
+        session.expunge(user)
+        session.add(user)
+        session.refresh(user)
+    # The last refresh follows detaching the user from the session
+    assert auth_handler.before_select.call_count == 2
+    assert hooks.authorizer.saved_handler_calls == 2
+
+
+def test_expired_load_authorized(engine, add_user, auth_handler, authorized_session):
+    with authorized_session as session:
+        user = session.get(User, add_user.id)
+        session.commit()
+        assert user.name == "John"
+    assert auth_handler.before_select.call_count == 2
+
+
+@pytest.fixture
+def check_strategy(hooks, auth_handler, mocker: MockerFixture):
+    mocker.patch.object(hooks.authorizer, "select_strategy", "check")
+    mocker.patch.object(hooks.authorizer, "check_batch_size", 2)
+    auth_handler.check_objects.side_effect = lambda _session, _action, instances: [
+        instance.name != "Jane" for instance in instances
+    ]
+    return auth_handler
+
+
+def test_select_check_objects(engine, add_user, check_strategy, authorized_session, mocker: MockerFixture):
+    with UnauthorizedSession(engine) as session:
+        session.add_all([User(name=name, age=20) for name in ("Jane", "Jim", "Jane", "Joe")])
+        session.commit()
+    expunge = mocker.spy(authorized_session, "expunge")
+    with authorized_session as session:
+        users = session.scalars(select(User).order_by(User.id)).all()
+        assert [user.name for user in users] == ["John", "Jim", "Joe"]
+        streamed = session.scalars(select(User).order_by(User.id).execution_options(yield_per=2))
+        assert [user.name for user in streamed] == ["John", "Jim", "Joe"]
+        # Denied objects are not left in the session
+        assert [call.args[0].name for call in expunge.call_args_list] == ["Jane"] * 4
+        # Rows of columns can not be checked per object and are filtered by the handler instead
+        assert len(session.execute(select(User.name)).all()) == 5
+    check_strategy.before_select.assert_called_once()
+    # Five users in batches of two, for each of the two entity selects
+    assert check_strategy.check_objects.call_count == 6
+
+
+def test_select_check_objects_eager_loads(engine, user_group, check_strategy, authorized_session):
+    with authorized_session as session:
+        users = session.execute(select(User).options(joinedload(User.groups))).unique().scalars().all()
+        assert [len(user.groups) for user in users] == [1]
+        _ = users[0].groups[0].group
+    # Related objects loaded along with the rows are filtered by the handler
+    assert check_strategy.before_select.call_count == 2
+    check_strategy.check_objects.assert_not_called()
+
+
+def test_select_check_objects_closes_result(engine, add_user, check_strategy, authorized_session, mocker):
+    close = mocker.spy(ChunkedIteratorResult, "close")
+    with authorized_session as session:
+        assert session.scalars(select(User)).all()
+        assert close.call_count == 1
+        partial = session.scalars(select(User).execution_options(yield_per=2))
+        next(partial)
+        partial.close()
+        assert close.call_count == 2
@@ -1,3 +1,5 @@
+import pytest
+from pytest_mock import MockerFixture
 from sqlalchemy import inspect, select
 from sqlalchemy.sql.operators import eq
 
@@ -5,6 +7,27 @@ from sqlalchemy_auth_hooks.references import LiteralExpression, ReferenceConditi
 from tests.core.conftest import Group, User, UserGroup
 
 
+class AllowAllFiltered:
+    def __init__(self, _session, references, *_, **__):
+        self.references = iter(references)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            val = next(self.references)
+        except StopIteration as e:
+            raise StopAsyncIteration from e
+        return val.entity, val.entity.primary_key[0].isnot(None)
+
+
+@pytest.fixture
+def filtered_handler(auth_handler):
+    auth_handler.before_select.side_effect = AllowAllFiltered
+    return auth_handler
+
+
 def test_join_lazyload(engine, add_user, user_group, auth_handler, authorized_session):
     with authorized_session as session:
         user: User = session.scalar(select(User).limit(1))
@@ -20,9 +43,9 @@ def test_join_lazyload(engine, add_user, user_group, auth_handler, authorized_se
         authorized_session,
         [ReferencedEntity(entity=inspect(UserGroup), selectable=UserGroup.__table__)],
         ReferenceCondition(
-            left=LiteralExpression(user.id),
+            left=UserGroup.__table__.c.user_id,
             operator=eq,
-            right=UserGroup.__table__.c.user_id,
+            right=LiteralExpression(user.id),
         ),
     )
     # Only one group should be queried
@@ -40,3 +63,44 @@ def test_join_lazyload(engine, add_user, user_group, auth_handler, authorized_se
             right=LiteralExpression(user_group.id),
         ),
     )
+
+
+def test_join_lazyload_reuse_criteria(
+    engine, add_user, user_group, hooks, auth_handler, authorized_session, mocker: MockerFixture
+):
+    mocker.patch.object(hooks.authorizer, "reuse_relationship_criteria", True)
+    with authorized_session as session:
+        user: User = session.scalar(select(User).limit(1))
+        _ = user.groups
+        session.expire(user, ["groups"])
+        _ = user.groups
+    # The second load of the collection reuses the filters returned for the first one
+    assert auth_handler.before_select.call_count == 2
+    assert hooks.authorizer.saved_handler_calls == 1
+
+
+def test_join_lazyload_reuse_criteria_per_user(
+    engine, add_user, user_group, hooks, auth_handler, authorized_session, mocker: MockerFixture
+):
+    mocker.patch.object(hooks.authorizer, "reuse_relationship_criteria", True)
+    with authorized_session as session:
+        user: User = session.scalar(select(User).limit(1))
+        _ = user.groups
+        session.user = object()
+        session.expire(user, ["groups"])
+        _ = user.groups
+    # Filters returned for the previous user are not reused
+    assert auth_handler.before_select.call_count == 3
+    assert hooks.authorizer.saved_handler_calls == 0
+
+
+def test_join_lazyload_propagated_criteria(
+    engine, add_user, user_group, hooks, filtered_handler, authorized_session, mocker: MockerFixture
+):
+    mocker.patch.object(hooks.authorizer, "trust_propagated_criteria", True)
+    with authorized_session as session:
+        user: User = session.scalar(select(User).join(UserGroup, UserGroup.user_id == User.id).limit(1))
+        _ = user.groups
+    # User groups were authorized along with their user
+    filtered_handler.before_select.assert_called_once()
+    assert hooks.authorizer.saved_handler_calls == 1
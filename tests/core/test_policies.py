@@ -0,0 +1,76 @@
+import pytest
+from pytest_mock import MockerFixture
+from sqlalchemy import false, inspect, select, update
+from sqlalchemy.sql.operators import eq
+
+from sqlalchemy_auth_hooks.policies import AccessPolicy
+from sqlalchemy_auth_hooks.references import ReferenceCondition, ReferencedEntity
+from tests.core.conftest import Group, UserGroup
+
+
+def test_select_public(engine, user_group, hooks, auth_handler, authorized_session):
+    hooks.policy.set_public(Group, "select")
+    with authorized_session as session:
+        session.execute(select(Group))
+        session.execute(select(Group.name).where(Group.id == user_group.id))
+        session.execute(select(UserGroup).join(Group, Group.id == UserGroup.group_id))
+    auth_handler.before_select.assert_called_once_with(
+        authorized_session,
+        [ReferencedEntity(entity=inspect(UserGroup), selectable=UserGroup.__table__)],
+        ReferenceCondition(left=Group.__table__.c.id, operator=eq, right=UserGroup.__table__.c.group_id),
+    )
+    auth_handler.is_unrestricted.assert_called_once()
+
+
+def test_select_public_with_implicit_from(engine, user_group, hooks, auth_handler, authorized_session):
+    hooks.policy.set_public(Group, "select")
+    auth_handler.before_select.side_effect = lambda _session, references, *_: _deny_all(references)
+    with authorized_session as session:
+        # The membership table only enters the statement through the WHERE clause
+        groups = session.scalars(select(Group).where(Group.id == UserGroup.group_id)).all()
+    assert groups == []
+    auth_handler.before_select.assert_called_once_with(
+        authorized_session,
+        [ReferencedEntity(entity=inspect(UserGroup), selectable=UserGroup.__table__)],
+        ReferenceCondition(left=Group.__table__.c.id, operator=eq, right=UserGroup.__table__.c.group_id),
+    )
+
+
+async def _deny_all(references):
+    for reference in references:
+        yield reference.entity, false()
+
+
+def test_unrestricted_per_user(engine, user_group, hooks, auth_handler, authorized_session, mocker: MockerFixture):
+    mocker.patch.object(auth_handler.is_unrestricted, "side_effect", lambda session, *_: session.user == "admin")
+    with authorized_session as session:
+        session.user = "admin"
+        session.execute(select(Group))
+        session.user = "reader"
+        session.execute(select(Group))
+    auth_handler.before_select.assert_called_once()
+    assert auth_handler.is_unrestricted.call_count == 2
+
+
+def test_public_only_for_declared_actions(engine, user_group, hooks, auth_handler, authorized_session):
+    hooks.policy.set_public(Group, "select")
+    with authorized_session as session:
+        session.execute(update(Group).where(Group.id == user_group.id).values(name="Admins"))
+    auth_handler.before_update.assert_called_once()
+
+
+def test_declared_policy(mocker: MockerFixture):
+    mocker.patch.object(Group, "__auth_hooks__", {"select": "public", "update": "checked"}, create=True)
+    policy = AccessPolicy()
+    assert policy.public_actions(inspect(Group)) == {"select"}
+    policy.set_public(Group)
+    assert policy.public_actions(inspect(Group)) == {"select", "insert", "update", "delete"}
+    assert not policy.all_public([], "select")
+
+
+def test_invalid_policy(mocker: MockerFixture):
+    with pytest.raises(ValueError):
+        AccessPolicy().set_public(Group, "read")  # type: ignore
+    mocker.patch.object(Group, "__auth_hooks__", {"select": "open"}, create=True)
+    with pytest.raises(ValueError):
+        AccessPolicy().is_public(inspect(Group), "select")
@@ -0,0 +1,83 @@
+import copy
+import pickle
+
+import pytest
+from sqlalchemy import inspect
+from sqlalchemy.sql.operators import and_, eq, or_
+
+from sqlalchemy_auth_hooks.references import (
+    CompositeCondition,
+    LiteralExpression,
+    ReferenceCondition,
+    ReferencedEntity,
+    literal,
+)
+from tests.core.conftest import Group, User
+
+
+def _condition(value):
+    return ReferenceCondition(left=User.__table__.c.id, operator=eq, right=LiteralExpression(value))
+
+
+def test_condition_structural_hash():
+    assert hash(_condition(1)) == hash(_condition(1))
+    assert _condition(1) == _condition(1)
+    assert _condition(1) != _condition(2)
+    assert len({_condition(1), _condition(1), _condition(2)}) == 2
+
+
+def test_composite_condition_as_cache_key():
+    cache = {CompositeCondition(operator=and_, conditions=[_condition(1), _condition(2)]): "cached"}
+    assert cache[CompositeCondition(operator=and_, conditions=[_condition(1), _condition(2)])] == "cached"
+    assert CompositeCondition(operator=or_, conditions=[_condition(1), _condition(2)]) not in cache
+
+
+def test_column_operands_compared_by_table():
+    assert ReferenceCondition(left=User.__table__.c.id, operator=eq, right=LiteralExpression(1)) != ReferenceCondition(
+        left=Group.__table__.c.id, operator=eq, right=LiteralExpression(1)
+    )
+
+
+def test_unhashable_literal():
+    assert hash(LiteralExpression([1, 2])) == hash(LiteralExpression([1, 2]))
+    assert LiteralExpression([1, 2]) == LiteralExpression([1, 2])
+
+
+def test_bool_literal_not_equal_to_int():
+    assert LiteralExpression(True) != LiteralExpression(1)
+    assert literal(True) is not literal(1)
+
+
+def test_literal_interning_keeps_type():
+    assert type(literal(3).value) is int
+    assert type(literal(3.0).value) is float
+    assert type(literal(4.0).value) is float
+    assert type(literal(4).value) is int
+    assert LiteralExpression(1) != LiteralExpression(1.0)
+
+
+def test_literal_interning():
+    assert literal(None) is literal(None)
+    assert literal("John") is literal("John")
+    assert literal([1]) is not literal([1])
+
+
+def test_nodes_immutable():
+    condition = _condition(1)
+    with pytest.raises(AttributeError):
+        condition.operator = or_
+    with pytest.raises(AttributeError):
+        condition.extra = True
+    assert copy.deepcopy(condition) is condition
+
+
+def test_nodes_picklable():
+    condition = CompositeCondition(operator=and_, conditions=[LiteralExpression(1)])
+    assert pickle.loads(pickle.dumps(condition)) == condition
+
+
+def test_referenced_entity_foreign_comparison():
+    entity = ReferencedEntity(entity=inspect(User), selectable=User.__table__)
+    assert entity != object()
+    assert entity == ReferencedEntity(entity=inspect(User), selectable=User.__table__)
+    assert len({entity, ReferencedEntity(entity=inspect(User), selectable=User.__table__)}) == 1
@@ -0,0 +1,131 @@
+import datetime
+import json
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table, inspect
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql.operators import and_, concat_op, eq, in_op, or_
+
+from sqlalchemy_auth_hooks.references import (
+    ColumnExpression,
+    CompositeCondition,
+    LiteralExpression,
+    ReferenceCondition,
+    ReferencedEntity,
+    RowsCondition,
+    ValueSet,
+)
+from sqlalchemy_auth_hooks.serialization import (
+    SerializationError,
+    dumps_binary,
+    dumps_json,
+    loads_binary,
+    loads_json,
+    to_payload,
+)
+from tests.conftest import Base, Group, User
+
+users = User.__table__
+
+
+def _eq(column, value):
+    return ReferenceCondition(left=column, operator=eq, right=LiteralExpression(value))
+
+
+CONDITION = CompositeCondition(
+    operator=and_,
+    conditions=[
+        CompositeCondition(operator=or_, conditions=[_eq(users.c.id, 1), _eq(users.c.id, -300)]),
+        ReferenceCondition(left=users.c.id, operator=in_op, right=LiteralExpression(ValueSet([1, 2, 3]))),
+        ReferenceCondition(
+            left=ColumnExpression(left=users.c.name, operator=concat_op, right=LiteralExpression(" x")),
+            operator=eq,
+            right=LiteralExpression("John x"),
+        ),
+        _eq(users.c.age, 1.5),
+        _eq(users.c.name, datetime.date(2023, 1, 2)),
+        RowsCondition([_eq(users.c.id, 1), _eq(users.c.id, 2)]),
+    ],
+)
+ENTITY = ReferencedEntity(inspect(User), users, frozenset({(1,), (2,)}))
+
+
+@pytest.mark.parametrize("dumps,loads", [(dumps_json, loads_json), (dumps_binary, loads_binary)])
+def test_round_trip(dumps, loads):
+    [(entities, condition)] = loads(dumps([([ENTITY], CONDITION)]), Base.registry)
+    assert entities == [ENTITY]
+    assert entities[0].primary_keys == ENTITY.primary_keys
+    assert condition == CONDITION
+    assert isinstance(condition.conditions[-1], RowsCondition)
+
+
+def test_columns_referenced_by_name():
+    payload = json.loads(dumps_json([([ENTITY], _eq(users.c.id, 1))]))
+    assert ["col", "users.id"] in payload["nodes"]
+    assert payload["decisions"][0][0] == [["tests.conftest.User", "users", [[1], [2]]]]
+
+
+def test_batch_shares_subtrees():
+    repeated = _eq(users.c.id, 1)
+    payload = to_payload([([ENTITY], repeated), ([ENTITY], CompositeCondition(operator=or_, conditions=[repeated]))])
+    assert [node[0] for node in payload["nodes"]].count("ref") == 1
+    assert [node[0] for node in payload["nodes"]].count("col") == 1
+    assert len(loads_binary(dumps_binary([([ENTITY], repeated)] * 100), Base.registry)) == 100
+
+
+def test_binary_smaller_than_json():
+    decisions = [([ENTITY], CONDITION)]
+    assert len(dumps_binary(decisions)) < len(dumps_json(decisions).encode())
+
+
+def test_alias_columns():
+    alias = aliased(Group, name="parent")
+    condition = _eq(inspect(alias).selectable.c.id, 1)
+    [(_, decoded)] = loads_json(dumps_json([([], condition)]), Base.registry)
+    assert decoded.left.table.name == "parent"
+    assert decoded.left.name == "id"
+
+
+def test_unknown_values_rejected():
+    with pytest.raises(SerializationError):
+        dumps_json([([ENTITY], _eq(users.c.id, object()))])
+    with pytest.raises(SerializationError):
+        loads_binary(b"l\x05", Base.registry)
+
+
+def test_schema_qualified_names():
+    metadata = MetaData()
+    tables = [Table("users", metadata, Column("id", Integer, primary_key=True), schema=schema) for schema in ("a", "b")]
+    condition = CompositeCondition(operator=and_, conditions=[_eq(table_.c.id, 1) for table_ in tables])
+    payload = to_payload([([], condition)])
+    assert ["col", "a.users.id"] in payload["nodes"]
+    [(_, decoded)] = loads_json(dumps_json([([], condition)]), Base.registry)
+    assert [child.left.table.schema for child in decoded.conditions] == ["a", "b"]
+
+
+@pytest.mark.parametrize(
+    "data",
+    ["[]", '{"v": 2}', '{"v": 2, "nodes": [], "decisions": [[]]}', '{"v": 2, "nodes": [], "decisions": [[[], 3]]}'],
+)
+def test_malformed_payload_rejected(data):
+    with pytest.raises(SerializationError):
+        loads_json(data, Base.registry)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        '{"v": 2, "nodes": [["col", "users.id"]], "decisions": [[[], -1]]}',
+        '{"v": 2, "nodes": [["col", "users.id"], ["lit", 1], ["ref", -2, "eq", 1]], "decisions": [[[], 2]]}',
+        '{"v": 2, "nodes": [["col", "users.id"], ["unary", "desc_op", true]], "decisions": [[[], 1]]}',
+    ],
+)
+def test_invalid_node_references_rejected(data):
+    with pytest.raises(SerializationError):
+        loads_json(data, Base.registry)
+
+
+def test_unhashable_binary_keys_rejected():
+    # An object with an empty list as its key
+    with pytest.raises(SerializationError):
+        loads_binary(b"m\x01l\x00N", Base.registry)
@@ -0,0 +1,75 @@
+import pytest
+from sqlalchemy import select
+
+from sqlalchemy_auth_hooks.hooks import register_hooks, unregister_hooks
+from sqlalchemy_auth_hooks.slow_log import SlowAuthorization, SlowAuthorizationLog
+from tests.core.conftest import PostAuthHandlerStub, SyncHandler, User
+
+
+class FilteringHandler(SyncHandler):
+    def before_select(self, session, referenced_entities, condition):
+        return [(reference.entity, User.age >= 0) for reference in referenced_entities]
+
+    def check_objects(self, session, action, instances):
+        return [True] * len(instances)
+
+
+@pytest.fixture(scope="module")
+def slow_hooks():
+    hooks = register_hooks(FilteringHandler(), PostAuthHandlerStub(), slow_threshold=0.0)
+    yield hooks
+    unregister_hooks(hooks)
+
+
+@pytest.fixture
+def slow_log(slow_hooks):
+    return slow_hooks.slow_log
+
+
+def test_slow_statements_logged(engine, add_user, slow_log, authorized_session):
+    slow_log.clear()
+    with authorized_session as session:
+        session.execute(select(User).where(User.id == add_user.id)).all()
+        session.execute(select(User).where(User.id == add_user.id + 1)).all()
+        session.execute(select(User.name)).all()
+
+    (record, occurrences), (other, other_occurrences) = sorted(slow_log.top(), key=lambda entry: -entry[1])
+    assert occurrences == 2
+    assert other_occurrences == 1
+    assert record.fingerprint != other.fingerprint
+    assert record.action == "select"
+    assert record.mappers == ("User",)
+    assert record.criteria == 1
+    assert record.filter_size > 0
+    assert 0 < record.handler_seconds <= record.seconds
+
+
+def test_checked_chunks_logged(engine, add_user, slow_hooks, slow_log, authorized_session, mocker):
+    mocker.patch.object(slow_hooks.authorizer, "select_strategy", "check")
+    slow_log.clear()
+    with authorized_session as session:
+        session.execute(select(User).where(User.id == add_user.id)).all()
+
+    [(record, occurrences)] = slow_log.top()
+    assert occurrences == 1
+    assert record.action == "select"
+    assert record.mappers == ("User",)
+    assert record.criteria == 0
+    assert 0 < record.handler_seconds <= record.seconds
+
+
+def _record(fingerprint, seconds):
+    return SlowAuthorization(fingerprint, "select", ["User"], seconds, seconds, 0, 0)
+
+
+def test_top_bounded():
+    log = SlowAuthorizationLog(threshold=0.0, size=2)
+    log.observe(_record("a", 0.3))
+    log.observe(_record("b", 0.1))
+    log.observe(_record("c", 0.2))
+    log.observe(_record("a", 0.5))
+    assert [(record.fingerprint, record.seconds, count) for record, count in log.top()] == [
+        ("a", 0.5, 2),
+        ("c", 0.2, 1),
+    ]
+    assert len(log.top(1)) == 1
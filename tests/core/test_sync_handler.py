@@ -0,0 +1,43 @@
+import threading
+
+import pytest
+from pytest_mock import MockerFixture
+from sqlalchemy import inspect, select, update
+
+from sqlalchemy_auth_hooks.hooks import register_hooks, unregister_hooks
+from sqlalchemy_auth_hooks.references import ReferencedEntity
+from tests.core.conftest import PostAuthHandlerStub, SyncHandler, User
+
+
+@pytest.fixture(scope="module")
+def sync_handler():
+    handler = SyncHandler()
+    hooks = register_hooks(handler, PostAuthHandlerStub())
+    yield handler
+    unregister_hooks(hooks)
+
+
+def test_sync_handler_on_calling_thread(engine, add_user, sync_handler, authorized_session, mocker: MockerFixture):
+    spy = mocker.spy(sync_handler, "before_select")
+    sync_handler.threads.clear()
+    with authorized_session as session:
+        assert session.get(User, add_user.id).name == "John"
+        session.execute(update(User).where(User.id == add_user.id).values(age=43))
+        session.add(User(name="Jane", age=20))
+        session.commit()
+    spy.assert_called_once_with(
+        authorized_session, [ReferencedEntity(entity=inspect(User), selectable=User.__table__)], mocker.ANY
+    )
+    assert sync_handler.threads == [threading.get_ident()] * 3
+    with authorized_session as session:
+        assert session.scalars(select(User.age).where(User.id == add_user.id)).one() == 43
+
+
+def test_sync_handler_error_propagates(engine, add_user, sync_handler, authorized_session, mocker: MockerFixture):
+    def failing(*_):
+        raise RuntimeError("Handler failed")
+        yield
+
+    mocker.patch.object(sync_handler, "before_select", side_effect=failing)
+    with authorized_session as session, pytest.raises(RuntimeError, match="Handler failed"):
+        session.get(User, add_user.id)
@@ -0,0 +1,83 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import pytest
+from pytest_mock import MockerFixture
+from sqlalchemy import select
+
+from tests.core.conftest import User
+
+
+class RecordedSpan:
+    def __init__(self, name, attributes, parent):
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.parent = parent
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_exception(self, exception):
+        pass
+
+
+class RecordingTracer:
+    def __init__(self):
+        self.current: ContextVar[RecordedSpan | None] = ContextVar("current", default=None)
+        self.spans: list[RecordedSpan] = []
+
+    @contextmanager
+    def start_as_current_span(self, name, *, attributes=None):
+        span = RecordedSpan(name, attributes, self.current.get())
+        self.spans.append(span)
+        token = self.current.set(span)
+        try:
+            yield span
+        finally:
+            self.current.reset(token)
+
+
+@pytest.fixture
+def tracer(hooks, mocker: MockerFixture):
+    tracer = RecordingTracer()
+    mocker.patch.object(hooks.authorizer, "tracer", tracer)
+    return tracer
+
+
+def _named(tracer, name):
+    return [span for span in tracer.spans if span.name == f"sqlalchemy_auth_hooks.{name}"]
+
+
+def test_checked_chunks_traced(engine, add_user, hooks, auth_handler, tracer, authorized_session, mocker):
+    mocker.patch.object(hooks.authorizer, "select_strategy", "check")
+    mocker.patch.object(hooks.authorizer, "check_chunk_size", 1)
+    auth_handler.check_objects.side_effect = lambda _session, _action, instances: [True] * len(instances)
+    with authorized_session as session:
+        session.add(User(name="Jane", age=30))
+        session.commit()
+        assert len(session.execute(select(User)).all()) == 2
+
+    spans = _named(tracer, "authorize")
+    assert [span.attributes for span in spans] == [{"action": "select", "mappers": ["User"]}] * 2
+    checks = [span for span in _named(tracer, "handler") if span.attributes["action"] == "select"]
+    assert [span.parent for span in checks] == spans
+
+
+def test_spans(engine, add_user, tracer, authorized_session):
+    with authorized_session as session:
+        session.execute(select(User).where(User.id == add_user.id)).all()
+        user = User(name="Jane", age=30)
+        session.add(user)
+        session.commit()
+
+    [authorize] = _named(tracer, "authorize")
+    assert authorize.attributes == {"action": "select", "mappers": ["User"]}
+    [flush] = _named(tracer, "flush")
+    assert flush.attributes == {"inserts": 1, "deletes": 0, "updates": 0}
+    select_handler, insert_handler = _named(tracer, "handler")
+    # Handlers run on the hooks' loop thread, the span context is carried over
+    assert select_handler.parent is authorize
+    assert select_handler.attributes == {"action": "select", "mappers": ["User"]}
+    assert insert_handler.parent is flush
+    [post_commit] = _named(tracer, "post_commit")
+    assert post_commit.attributes == {"event": "CreateSingleEvent"}
@@ -0,0 +1,67 @@
+import sys
+
+from sqlalchemy import Column, Integer, MetaData, Table, or_, select
+from sqlalchemy.sql.operators import concat_op, eq, sub
+
+from sqlalchemy_auth_hooks.clauses import _extract_mappers_from_clause
+from sqlalchemy_auth_hooks.conditions import traverse_conditions
+from sqlalchemy_auth_hooks.references import (
+    ColumnExpression,
+    CompositeCondition,
+    LiteralExpression,
+    NestedExpression,
+    ReferenceCondition,
+)
+from tests.core.conftest import User
+
+DEPTH = sys.getrecursionlimit() * 2
+
+
+def test_wide_or():
+    condition = traverse_conditions(or_(*[User.id == i for i in range(10_000)]), {})
+    assert isinstance(condition, CompositeCondition)
+    assert len(condition.conditions) == 10_000
+    assert condition.conditions[-1].right.value == 9_999
+
+
+def test_deep_binary_expression():
+    expression = User.age
+    for _ in range(DEPTH):
+        expression = expression - 1
+    condition = traverse_conditions(expression == 5, {})
+    assert isinstance(condition, ReferenceCondition)
+    assert condition.operator is eq
+    depth = 0
+    left = condition.left
+    while isinstance(left, NestedExpression):
+        assert left.operator is sub
+        left, depth = left.left, depth + 1
+    # The innermost subtraction has two plain operands
+    assert isinstance(left, ColumnExpression)
+    assert depth == DEPTH - 1
+
+
+def test_flattened_associative_chain():
+    condition = traverse_conditions(User.name.concat("a").concat("b") == "John", {})
+    assert condition.left == NestedExpression(
+        left=ColumnExpression(left=User.__table__.c.name, operator=concat_op, right=LiteralExpression("a")),
+        operator=concat_op,
+        right=LiteralExpression("b"),
+    )
+
+
+def test_deep_join_chain():
+    metadata = MetaData()
+    tables = [Table(f"t{i}", metadata, Column("id", Integer, primary_key=True)) for i in range(DEPTH)]
+    join = tables[0]
+    for table in tables[1:]:
+        join = join.join(table, tables[0].c.id == table.c.id)
+    table_mappers = {table: f"mapper{index}" for index, table in enumerate(tables)}
+    assert [mapper for mapper, _ in _extract_mappers_from_clause(join, table_mappers)] == [
+        f"mapper{index}" for index in range(DEPTH)
+    ]
+
+
+def test_select_where_column():
+    statement = select(User).where(User.id == 1)
+    assert traverse_conditions(statement.whereclause, {}).left.compare(User.__table__.c.id)
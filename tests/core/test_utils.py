@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, Table
+from sqlalchemy.orm import registry
+
+from sqlalchemy_auth_hooks.utils import get_table_mappers
+
+
+def test_table_mappers_follow_dispose_and_map():
+    mapper_registry = registry()
+    table_ = Table("items", mapper_registry.metadata, Column("id", Integer, primary_key=True))
+
+    class First:
+        pass
+
+    class Second:
+        pass
+
+    first = mapper_registry.map_imperatively(First, table_)
+    assert get_table_mappers(mapper_registry) == {table_: first}
+    mapper_registry.dispose()
+    # Same number of mappers as the cached index
+    second = mapper_registry.map_imperatively(Second, table_)
+    assert get_table_mappers(mapper_registry) == {table_: second}